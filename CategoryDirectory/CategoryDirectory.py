@@ -1,8 +1,10 @@
-import pandas as pd
+import hashlib
+import pickle
 
 from datetime import datetime
 
 import CategoryDirectory.identify_category as identify_category_cython
+from CategoryDirectory.IdentifierAutomaton import IdentifierAutomaton
 from Utilities.Utilities import *
 
 """
@@ -62,7 +64,9 @@ class CategoryDirectory:
             # Сообщение о начале составления справочника
             set_msg_func('Составление справочника')
 
-            # Чтение данных из файла data_path
+            # Чтение данных из файла data_path; pandas нужен только при составлении справочника, определение категорий работает без него
+            import pandas as pd
+
             with pd.ExcelFile(data_path) as reader:
                 # Замена пустого значения листа со справочником а название первого листа в файле
                 if len(directory_sheet_name) == 0:
@@ -106,6 +110,11 @@ class CategoryDirectory:
             self.excluding_identifiers = features_preprocessing(features_df[excluding_identifiers_title])
             # Функция предобработки SKU
             self.preprocessing_func = preprocessing_func
+            # Составление автомата Ахо-Корасик по всем идентификаторам справочника и индекса категорий по основным идентификаторам
+            self.build_matching_index()
+            set_message_with_countdown('Автомат поиска идентификаторов и индекс категорий составлены', timer_start, set_msg_func)
+            set_message_with_tab("".join(['кол-во уникальных идентификаторов:\t', str(len(self.identifier_automaton))]), set_msg_func)
+            set_message_with_tab("".join(['кол-во уникальных основных идентификаторов:\t', str(len(self.main_identifier_index))]), set_msg_func)
             
             # Сообщение о завершении составлния спраочника
             set_message_with_countdown("".join(['Справочник \"' + dir_name + '\" составлен']), timer_start, set_msg_func)
@@ -114,6 +123,63 @@ class CategoryDirectory:
         except Exception as e:
             set_error_message(str(e), timer_start, set_msg_func)
 
+    def __setstate__(self, state):
+        """
+        Восстановление справочника при распаковке pickle; для справочников, сохраненных до появления автомата Ахо-Корасик и индекса категорий, они составляются заново
+        """
+        self.__dict__.update(state)
+        if 'identifier_automaton' not in state or 'main_identifier_index' not in state:
+            self.build_matching_index()
+
+    def build_matching_index(self):
+        """
+        Составление автомата Ахо-Корасик self.identifier_automaton по всем основным, основным ограничивающим, дополнительным ограничивающим и исключающим идентификаторам справочника,
+        а также индекса self.main_identifier_index, сопоставляющего каждому основному идентификатору номера категорий (по возрастанию), в которых он используется
+        """
+        all_identifiers = (identifier
+                           for identifiers in (self.main_identifiers, self.main_limit_identifiers, self.add_limit_identifiers, self.excluding_identifiers)
+                           for row in identifiers
+                           for identifier in row)
+        self.identifier_automaton = IdentifierAutomaton(all_identifiers)
+        self.build_main_identifier_index()
+
+    def build_main_identifier_index(self):
+        """
+        Составление индекса self.main_identifier_index, сопоставляющего каждому основному идентификатору номера категорий (по возрастанию), в которых он используется
+        """
+        main_identifier_index = {}
+        for i, row in enumerate(self.main_identifiers):
+            for main_id in row:
+                rows = main_identifier_index.setdefault(main_id, [])
+                # Один и тот же основной идентификатор может повторяться в строке справочника
+                if len(rows) == 0 or rows[-1] != i:
+                    rows.append(i)
+        self.main_identifier_index = {main_id: tuple(rows) for main_id, rows in main_identifier_index.items()}
+
+    def get_fingerprint(self):
+        """
+        Отпечаток содержания справочника: хэш категорий, идентификаторов всех типов и функции предобработки SKU
+
+        :return: хэш SHA-1 в шестнадцатеричном виде (str)
+        """
+        preprocessing_func_name = ".".join([getattr(self.preprocessing_func, '__module__', ''), getattr(self.preprocessing_func, '__qualname__', '')])
+        content = (self.category_rightholders, self.main_identifiers, self.main_limit_identifiers, self.add_limit_identifiers, self.excluding_identifiers, preprocessing_func_name)
+        return hashlib.sha1(pickle.dumps(content, protocol=4)).hexdigest()
+
+    def find_candidate_rows(self, found_identifiers):
+        """
+        Номера категорий-кандидатов, в которых используется хотя бы один из найденных основных идентификаторов, по индексу self.main_identifier_index
+
+        :param found_identifiers: множество идентификаторов, найденных в SKU (set)
+        :return: номера категорий-кандидатов в порядке возрастания (list)
+        """
+        candidate_rows = set()
+        for identifier in found_identifiers:
+            rows = self.main_identifier_index.get(identifier)
+            if rows is not None:
+                candidate_rows.update(rows)
+        return sorted(candidate_rows)
+
     def identify_category(self, sku_row):
         """
         Определение категории по заданному SKU.
@@ -379,3 +445,93 @@ class CategoryDirectory:
         prep_sku_row = self.preprocessing_func(sku_row)
         return list(identify_category_cython.identify_category_and_dec_id(prep_sku_row, self.category_rightholders, self.main_identifiers, self.main_limit_identifiers, self.add_limit_identifiers, self.excluding_identifiers))
 
+    def identify_category_aho_corasick(self, sku_row):
+        """
+        Определение категории по заданному SKU.
+        Все идентификаторы справочника ищутся в SKU за один проход автоматом Ахо-Корасик self.identifier_automaton, затем по индексу self.main_identifier_index отбираются категории,
+        содержащие найденные основные идентификаторы, и среди них в порядке возрастания номера выбирается категория с теми же условиями на ограничивающие и исключающие идентификаторы,
+        что и в функции identify_category_cython
+
+        :param sku_row: SKU, по которому определяется категория
+        :return: обозначение категории из self.category_rightholders или пустая строка, если категория не удается определить (list)
+        """
+        # Предобработка строки SKU
+        prep_sku_row = self.preprocessing_func(sku_row)
+        # Поиск всех идентификаторов справочника в SKU
+        found_identifiers = self.identifier_automaton.find(prep_sku_row)
+        # Категории-кандидаты, содержащие найденные основные идентификаторы
+        candidate_rows = self.find_candidate_rows(found_identifiers)
+        if len(candidate_rows) == 0:
+            return ['']
+        return [identify_category_cython.identify_category_by_found(found_identifiers, candidate_rows, self.category_rightholders, self.main_identifiers, self.main_limit_identifiers, self.add_limit_identifiers, self.excluding_identifiers)]
+
+    def identify_category_and_dec_id_aho_corasick(self, sku_row):
+        """
+        Определение категории по заданному SKU, а также вывод главного, главного ограничивающего и дополнительного ограничивающего идентификаторов, найденных в SKU и определивших
+        предадлежность выбранной категории, если они есть, а иначе пустую строку.
+        Работает аналогично функции identify_category_and_dec_id_cython, но идентификаторы ищутся в SKU за один проход автоматом Ахо-Корасик self.identifier_automaton,
+        а проверяются только категории, отобранные по индексу self.main_identifier_index
+
+        :param sku_row: SKU, по которому определяется категория
+        :return: обозначение категории из self.category_rightholders или пустая строка, если категория не удается определить; главный решающий идентификатор; главный ограничивающий решающий
+        идентификатор; дополнительный ограничивающий решающий идентификатор (list)
+        """
+        # Предобработка строки SKU
+        prep_sku_row = self.preprocessing_func(sku_row)
+        # Поиск всех идентификаторов справочника в SKU
+        found_identifiers = self.identifier_automaton.find(prep_sku_row)
+        # Категории-кандидаты, содержащие найденные основные идентификаторы
+        candidate_rows = self.find_candidate_rows(found_identifiers)
+        if len(candidate_rows) == 0:
+            return ['', '', '', '']
+        return list(identify_category_cython.identify_category_and_dec_id_by_found(found_identifiers, candidate_rows, self.category_rightholders, self.main_identifiers, self.main_limit_identifiers, self.add_limit_identifiers, self.excluding_identifiers))
+
+    def identify_category_batch(self, sku_rows, use_aho_corasick=False):
+        """
+        Определение категорий по списку SKU за один вызов. SKU предобрабатываются все сразу, затем категории определяются пакетной функцией Cython или,
+        если use_aho_corasick, автоматом Ахо-Корасик по индексу категорий. Результат совпадает с поочередным применением identify_category_cython (identify_category_aho_corasick)
+
+        :param sku_rows: список SKU, по которым определяются категории (list)
+        :param use_aho_corasick: флаг, означающий, что идентификаторы ищутся автоматом Ахо-Корасик (bool)
+        :return: результат в виде списка столбцов: единственный столбец - обозначения категорий из self.category_rightholders или пустые строки (list)
+        """
+        # Предобработка всех строк SKU
+        prep_sku_rows = list(map(self.preprocessing_func, sku_rows))
+        if not use_aho_corasick:
+            return [identify_category_cython.identify_category_batch(prep_sku_rows, self.category_rightholders, self.main_identifiers, self.main_limit_identifiers, self.add_limit_identifiers, self.excluding_identifiers)]
+        categories = []
+        for prep_sku_row in prep_sku_rows:
+            found_identifiers = self.identifier_automaton.find(prep_sku_row)
+            candidate_rows = self.find_candidate_rows(found_identifiers)
+            if len(candidate_rows) == 0:
+                categories.append('')
+            else:
+                categories.append(identify_category_cython.identify_category_by_found(found_identifiers, candidate_rows, self.category_rightholders, self.main_identifiers, self.main_limit_identifiers, self.add_limit_identifiers, self.excluding_identifiers))
+        return [categories]
+
+    def identify_category_and_dec_id_batch(self, sku_rows, use_aho_corasick=False):
+        """
+        Определение категорий и решающих идентификаторов по списку SKU за один вызов. SKU предобрабатываются все сразу, затем категории определяются пакетной функцией Cython или,
+        если use_aho_corasick, автоматом Ахо-Корасик по индексу категорий. Результат совпадает с поочередным применением identify_category_and_dec_id_cython
+        (identify_category_and_dec_id_aho_corasick)
+
+        :param sku_rows: список SKU, по которым определяются категории (list)
+        :param use_aho_corasick: флаг, означающий, что идентификаторы ищутся автоматом Ахо-Корасик (bool)
+        :return: результат в виде списка столбцов: обозначения категорий из self.category_rightholders или пустые строки; главные решающие идентификаторы; главные ограничивающие
+        решающие идентификаторы; дополнительные ограничивающие решающие идентификаторы (list)
+        """
+        # Предобработка всех строк SKU
+        prep_sku_rows = list(map(self.preprocessing_func, sku_rows))
+        if not use_aho_corasick:
+            return list(identify_category_cython.identify_category_and_dec_id_batch(prep_sku_rows, self.category_rightholders, self.main_identifiers, self.main_limit_identifiers, self.add_limit_identifiers, self.excluding_identifiers))
+        columns = [[], [], [], []]
+        for prep_sku_row in prep_sku_rows:
+            found_identifiers = self.identifier_automaton.find(prep_sku_row)
+            candidate_rows = self.find_candidate_rows(found_identifiers)
+            if len(candidate_rows) == 0:
+                result = ('', '', '', '')
+            else:
+                result = identify_category_cython.identify_category_and_dec_id_by_found(found_identifiers, candidate_rows, self.category_rightholders, self.main_identifiers, self.main_limit_identifiers, self.add_limit_identifiers, self.excluding_identifiers)
+            for column, value in zip(columns, result):
+                column.append(value)
+        return columns
@@ -0,0 +1,343 @@
+"""
+Двоичный формат сохраненного справочника категорий. Файл состоит из сигнатуры, номера версии формата, заголовка в формате JSON и выровненных числовых массивов:
+таблицы строк (байты всех строк в UTF-8 и смещения их начал), номеров строк категорий, номеров идентификаторов каждого типа со смещениями начал строк справочника и, если сохранен,
+автомата Ахо-Корасик. Массивы читаются из отображенного в память файла без копирования, поэтому один и тот же файл могут читать несколько процессов
+"""
+import gc
+import importlib
+import json
+import mmap
+import os
+import numpy as np
+
+from itertools import islice
+
+from CategoryDirectory.CategoryDirectory import CategoryDirectory
+from CategoryDirectory.IdentifierAutomaton import restore_identifier_automaton
+
+# Сигнатура файла справочника
+DIRECTORY_FILE_MAGIC = b'CATDIR\x00\x00'
+# Версия формата; файлы других версий не читаются
+DIRECTORY_FILE_VERSION = 1
+# Выравнивание начал массивов в файле (байт)
+ARRAY_ALIGNMENT = 8
+# Типы идентификаторов справочника в порядке их хранения (названия атрибутов CategoryDirectory)
+IDENTIFIER_KINDS = ('main_identifiers', 'main_limit_identifiers', 'add_limit_identifiers', 'excluding_identifiers')
+# Обозначения типов значений категорий: категории хранятся строками в таблице строк и приводятся к исходному типу при загрузке
+CATEGORY_VALUE_TYPES = (str, int, float, bool)
+
+
+class StringTable:
+    """
+    Таблица уникальных строк, составляемая при сохранении справочника: каждой строке присваивается номер в порядке ее первого появления
+    """
+    def __init__(self):
+        self.string_ids = {}
+        self.strings = []
+
+    def add(self, string):
+        """
+        Добавление строки в таблицу
+
+        :param string: строка (str)
+
+        :return: номер строки в таблице (int)
+        """
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.string_ids[string] = string_id
+            self.strings.append(string)
+        return string_id
+
+    def to_arrays(self):
+        """
+        :return: байты всех строк в UTF-8 подряд (np.ndarray, uint8) и смещения начал строк с длиной данных последним элементом (np.ndarray, int64)
+        """
+        encoded_strings = [string.encode('utf-8', 'surrogatepass') for string in self.strings]
+        offsets = np.zeros(len(encoded_strings) + 1, dtype=np.int64)
+        np.cumsum([len(encoded_string) for encoded_string in encoded_strings], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded_strings), dtype=np.uint8), offsets
+
+
+def nested_lists_to_arrays(rows, string_table):
+    """
+    Представление списка списков строк (идентификаторов строк справочника) двумя массивами
+
+    :param rows: список списков строк (list)
+    :param string_table: таблица строк, в которую добавляются строки (StringTable)
+
+    :return: смещения начал строк справочника с общим количеством строк последним элементом (np.ndarray, int64) и номера строк в таблице строк (np.ndarray, int32)
+    """
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=offsets[1:])
+    ids = np.array([string_table.add(string) for row in rows for string in row], dtype=np.int32)
+    return offsets, ids
+
+
+def arrays_to_nested_lists(offsets, ids, strings):
+    """
+    Восстановление списка списков строк по массивам, составленным функцией nested_lists_to_arrays
+
+    :param offsets: смещения начал строк справочника (np.ndarray)
+    :param ids: номера строк в таблице строк (np.ndarray)
+    :param strings: таблица строк (list)
+
+    :return: список списков строк (list)
+    """
+    strings_iter = iter([strings[string_id] for string_id in ids.tolist()])
+    return [list(islice(strings_iter, row_len)) for row_len in np.diff(offsets).tolist()]
+
+
+def func_to_ref(func):
+    """
+    Ссылка на функцию, по которой ее можно импортировать при загрузке справочника
+
+    :param func: функция уровня модуля или None
+
+    :return: название модуля и полное название функции (list) или None
+    """
+    if func is None:
+        return None
+    module_name = getattr(func, '__module__', None)
+    qualname = getattr(func, '__qualname__', None)
+    if module_name is None or qualname is None or '<' in qualname:
+        raise ValueError("".join(['Функция предобработки справочника \"', str(func), '\" не может быть сохранена: она должна быть функцией уровня модуля']))
+    return [module_name, qualname]
+
+
+def ref_to_func(func_ref):
+    """
+    Импорт функции по ссылке, составленной функцией func_to_ref
+
+    :param func_ref: название модуля и полное название функции (list) или None
+
+    :return: функция или None
+    """
+    if func_ref is None:
+        return None
+    func = importlib.import_module(func_ref[0])
+    for name in func_ref[1].split('.'):
+        func = getattr(func, name)
+    return func
+
+
+def restore_category_value(string, category_type):
+    """
+    Приведение категории, хранящейся в файле строкой, к исходному типу
+
+    :param string: категория в виде строки (str)
+    :param category_type: номер типа значения категории в CATEGORY_VALUE_TYPES (int)
+
+    :return: категория исходного типа
+    """
+    value_type = CATEGORY_VALUE_TYPES[category_type]
+    if value_type is bool:
+        return string == 'True'
+    return value_type(string)
+
+
+def save_directory_file(category_directory, data_path, save_matching_index=True):
+    """
+    Сохранение справочника в файл двоичного формата. Файл сначала записывается во временный файл, который затем переименовывается, чтобы не оставить недописанный справочник
+
+    :param category_directory: справочник категорий (CategoryDirectory)
+    :param data_path: путь к сохраняемому файлу (str)
+    :param save_matching_index: флаг сохранения автомата Ахо-Корасик, чтобы не составлять его заново при загрузке (bool)
+    """
+    string_table = StringTable()
+    arrays = {}
+
+    # Категории хранятся строками с обозначением исходного типа значения
+    category_types = []
+    category_ids = []
+    for category in category_directory.category_rightholders:
+        category_type = type(category) if type(category) in CATEGORY_VALUE_TYPES else str
+        category_types.append(CATEGORY_VALUE_TYPES.index(category_type))
+        category_ids.append(string_table.add(str(category)))
+    arrays['category_ids'] = np.array(category_ids, dtype=np.int32)
+    arrays['category_types'] = np.array(category_types, dtype=np.uint8)
+
+    for identifier_kind in IDENTIFIER_KINDS:
+        offsets, ids = nested_lists_to_arrays(getattr(category_directory, identifier_kind), string_table)
+        arrays["_".join([identifier_kind, 'offsets'])] = offsets
+        arrays["_".join([identifier_kind, 'ids'])] = ids
+
+    automaton = getattr(category_directory, 'identifier_automaton', None) if save_matching_index else None
+    if automaton is not None:
+        arrays['automaton_identifier_ids'] = np.array([string_table.add(identifier) for identifier in automaton.identifiers], dtype=np.int32)
+        arrays['automaton_goto_keys'] = np.fromiter(automaton.goto.keys(), dtype=np.int64, count=len(automaton.goto))
+        arrays['automaton_goto_states'] = np.fromiter(automaton.goto.values(), dtype=np.int32, count=len(automaton.goto))
+        arrays['automaton_fail'] = np.array(automaton.fail, dtype=np.int32)
+        # Выходы хранятся только для состояний, в которых заканчиваются идентификаторы
+        output_states = [state for state, state_output in enumerate(automaton.output) if len(state_output) > 0]
+        output_offsets, output_ids = nested_lists_to_arrays([automaton.output[state] for state in output_states], string_table)
+        arrays['automaton_output_states'] = np.array(output_states, dtype=np.int32)
+        arrays['automaton_output_offsets'] = output_offsets
+        arrays['automaton_output_ids'] = output_ids
+
+    arrays['strings_data'], arrays['strings_offsets'] = string_table.to_arrays()
+
+    # Размещение массивов в файле
+    array_table = {}
+    data_offset = 0
+    for name, array in arrays.items():
+        data_offset = align(data_offset)
+        array_table[name] = {'dtype': array.dtype.str, 'offset': data_offset, 'count': int(array.size)}
+        data_offset += array.nbytes
+    header = json.dumps({'preprocessing_func': func_to_ref(category_directory.preprocessing_func),
+                         'matching_index': automaton is not None,
+                         'arrays': array_table}, ensure_ascii=False).encode('utf-8')
+    prefix = b"".join([DIRECTORY_FILE_MAGIC, np.array([DIRECTORY_FILE_VERSION, len(header)], dtype='<u4').tobytes(), header])
+    data_start = align(len(prefix))
+
+    tmp_data_path = "".join([data_path, '.tmp'])
+    with open(tmp_data_path, 'wb') as f:
+        f.write(prefix)
+        f.write(bytes(data_start - len(prefix)))
+        position = 0
+        for name, array in arrays.items():
+            f.write(bytes(array_table[name]['offset'] - position))
+            f.write(array.tobytes())
+            position = array_table[name]['offset'] + array.nbytes
+    os.replace(tmp_data_path, data_path)
+
+
+def align(offset):
+    """
+    :return: ближайшее не меньшее offset смещение, кратное ARRAY_ALIGNMENT (int)
+    """
+    return (offset + ARRAY_ALIGNMENT - 1) // ARRAY_ALIGNMENT * ARRAY_ALIGNMENT
+
+
+def is_directory_file(data_path):
+    """
+    Проверка того, что файл записан в двоичном формате справочника (по сигнатуре)
+
+    :param data_path: путь к файлу (str)
+
+    :return: True, если файл начинается с сигнатуры DIRECTORY_FILE_MAGIC (bool)
+    """
+    with open(data_path, 'rb') as f:
+        return f.read(len(DIRECTORY_FILE_MAGIC)) == DIRECTORY_FILE_MAGIC
+
+
+class DirectoryFile:
+    """
+    Файл справочника, отображенный в память только для чтения. Массивы файла доступны без копирования; справочник категорий (CategoryDirectory) составляется по ним
+    функцией to_category_directory
+    """
+    def __init__(self, data_path):
+        """
+        :param data_path: путь к файлу справочника (str)
+        """
+        self.data_path = data_path
+        with open(data_path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic_len = len(DIRECTORY_FILE_MAGIC)
+            if self.buffer[:magic_len] != DIRECTORY_FILE_MAGIC:
+                raise ValueError("".join(['Файл \"', data_path, '\" не является файлом справочника']))
+            version, header_len = np.frombuffer(self.buffer, dtype='<u4', count=2, offset=magic_len).tolist()
+            if version != DIRECTORY_FILE_VERSION:
+                raise ValueError("".join(['Версия формата файла справочника \"', data_path, '\" (', str(version), ') не поддерживается, поддерживается версия ',
+                                          str(DIRECTORY_FILE_VERSION)]))
+            header_start = magic_len + 8
+            self.header = json.loads(bytes(self.buffer[header_start:header_start + header_len]).decode('utf-8'))
+            self.data_start = align(header_start + header_len)
+        except Exception:
+            self.buffer.close()
+            raise
+
+    def get_array(self, name):
+        """
+        Массив файла без копирования данных
+
+        :param name: название массива (str)
+
+        :return: массив только для чтения (np.ndarray)
+        """
+        array_info = self.header['arrays'][name]
+        return np.frombuffer(self.buffer, dtype=np.dtype(array_info['dtype']), count=array_info['count'], offset=self.data_start + array_info['offset'])
+
+    def get_strings(self):
+        """
+        :return: таблица строк файла (list of str)
+        """
+        strings_data = self.get_array('strings_data')
+        strings_offsets = self.get_array('strings_offsets').tolist()
+        data = strings_data.tobytes()
+        return [data[strings_offsets[i]:strings_offsets[i + 1]].decode('utf-8', 'surrogatepass') for i in range(len(strings_offsets) - 1)]
+
+    def get_string(self, string_id):
+        """
+        :param string_id: номер строки в таблице строк файла (int)
+
+        :return: строка таблицы строк файла (str)
+        """
+        strings_offsets = self.get_array('strings_offsets')
+        start = self.data_start + self.header['arrays']['strings_data']['offset']
+        return self.buffer[start + int(strings_offsets[string_id]):start + int(strings_offsets[string_id + 1])].decode('utf-8', 'surrogatepass')
+
+    def to_category_directory(self, load_matching_index=True):
+        """
+        Составление справочника категорий по данным файла. Если load_matching_index, то автомат Ахо-Корасик восстанавливается из файла или, если его нет в файле, составляется
+        заново; иначе автомат и индекс категорий не загружаются (равны None), и справочником нельзя пользоваться для поиска идентификаторов автоматом Ахо-Корасик
+
+        :param load_matching_index: флаг загрузки автомата Ахо-Корасик и индекса категорий (bool)
+
+        :return: справочник категорий (CategoryDirectory)
+        """
+        strings = self.get_strings()
+        category_directory = CategoryDirectory.__new__(CategoryDirectory)
+        category_directory.category_rightholders = [restore_category_value(strings[category_id], category_type)
+                                                    for category_id, category_type in zip(self.get_array('category_ids').tolist(), self.get_array('category_types').tolist())]
+        for identifier_kind in IDENTIFIER_KINDS:
+            setattr(category_directory, identifier_kind, arrays_to_nested_lists(self.get_array("_".join([identifier_kind, 'offsets'])),
+                                                                                self.get_array("_".join([identifier_kind, 'ids'])), strings))
+        category_directory.preprocessing_func = ref_to_func(self.header['preprocessing_func'])
+        if not load_matching_index:
+            category_directory.identifier_automaton = None
+            category_directory.main_identifier_index = None
+        elif self.header['matching_index']:
+            fail = self.get_array('automaton_fail').tolist()
+            output = [()] * len(fail)
+            for state, state_output in zip(self.get_array('automaton_output_states').tolist(),
+                                           arrays_to_nested_lists(self.get_array('automaton_output_offsets'), self.get_array('automaton_output_ids'), strings)):
+                output[state] = tuple(state_output)
+            category_directory.identifier_automaton = restore_identifier_automaton(
+                [strings[string_id] for string_id in self.get_array('automaton_identifier_ids').tolist()],
+                dict(zip(self.get_array('automaton_goto_keys').tolist(), self.get_array('automaton_goto_states').tolist())),
+                fail,
+                output)
+            category_directory.build_main_identifier_index()
+        else:
+            category_directory.build_matching_index()
+        return category_directory
+
+    def close(self):
+        """
+        Закрытие отображения файла в память
+        """
+        self.buffer.close()
+
+
+def load_directory_file(data_path, load_matching_index=True):
+    """
+    Загрузка справочника категорий из файла двоичного формата
+
+    :param data_path: путь к файлу справочника (str)
+    :param load_matching_index: флаг загрузки автомата Ахо-Корасик и индекса категорий, см. DirectoryFile.to_category_directory (bool)
+
+    :return: справочник категорий (CategoryDirectory)
+    """
+    directory_file = DirectoryFile(data_path)
+    # При составлении справочника создается множество списков без циклических ссылок, поэтому сборщик мусора на это время отключается
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return directory_file.to_category_directory(load_matching_index)
+    finally:
+        if gc_enabled:
+            gc.enable()
+        directory_file.close()
@@ -0,0 +1,49 @@
+"""
+Сохранение и загрузка справочников категорий в директории saves, общие для графического интерфейса и командной строки
+"""
+import os
+import pickle
+
+from CategoryDirectory.DirectoryFile import save_directory_file, load_directory_file, is_directory_file
+from CategoryDirectory.SharedCategoryDirectory import SharedCategoryDirectory
+
+# Директория, в которой хранятся сохраненные справочники
+SAVES_DIR = 'saves'
+
+
+def find_directories():
+    """
+    :return: названия справочников, сохраненных в saves, или пустой список, если директории saves нет (list)
+    """
+    try:
+        return os.listdir(SAVES_DIR)
+    except OSError:
+        return []
+
+def save_directory(dir, dir_name):
+    """
+    :param dir: справочик категорий - объект CategoryDirectory, который сохраняется в диреторию saves
+    :param dir_name: название справочника категорий dir, под которым он будет сохраняться
+
+    :return: сохраняет справочник dir в директорию saves с названием dir_name в двоичном формате справочника (см. CategoryDirectory.DirectoryFile);
+    если директория saves отсутствует, создает ее
+    """
+    if not os.path.exists(SAVES_DIR):
+        os.makedirs(SAVES_DIR)
+    save_directory_file(dir, os.path.join(SAVES_DIR, dir_name))
+
+def load_directory(dir_name, load_matching_index=True, shared=False):
+    """
+    Загружает справочник по заданному пути, если папка с сохраненными справочниками существует. Справочники, сохраненные раньше с помощью pickle, тоже загружаются
+    :param dir_name: путь до загружаемого справочника
+    :param load_matching_index: флаг загрузки автомата Ахо-Корасик и индекса категорий (для справочников в двоичном формате)
+    :param shared: флаг чтения справочника в двоичном формате напрямую из отображенного в память файла, общего для всех процессов пула (SharedCategoryDirectory)
+    :return: справочник по заданному пути, объект CategoryDirectory или SharedCategoryDirectory
+    """
+    dir_path = os.path.join(SAVES_DIR, dir_name)
+    if is_directory_file(dir_path):
+        if shared:
+            return SharedCategoryDirectory(dir_path)
+        return load_directory_file(dir_path, load_matching_index)
+    with open(dir_path, 'rb') as file:
+        return pickle.load(file)
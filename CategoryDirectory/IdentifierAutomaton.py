@@ -0,0 +1,110 @@
+"""
+Автомат Ахо-Корасик для одновременного поиска всех идентификаторов справочника в строке SKU за один проход
+"""
+
+# Размер алфавита (количество кодовых точек Unicode); ключ перехода автомата - состояние * CHAR_SPAN + код символа
+CHAR_SPAN = 0x110000
+
+
+class IdentifierAutomaton:
+    """
+    Автомат Ахо-Корасик, составленный по всем идентификаторам справочника. Находит все идентификаторы, содержащиеся в строке, за один проход по ней.
+    Переходы автомата хранятся в одном словаре с целочисленными ключами (состояние * CHAR_SPAN + код символа)
+    """
+    def __init__(self, identifiers):
+        """
+        :param identifiers: идентификаторы, по которым составляется автомат; повторяющиеся и пустые идентификаторы пропускаются (iterable of str)
+        """
+        # Уникальные идентификаторы в порядке их первого появления
+        self.identifiers = []
+        # Переходы автомата по символам
+        self.goto = {}
+        # Суффиксные ссылки состояний
+        self.fail = [0]
+        # Идентификаторы, заканчивающиеся в каждом состоянии (с учетом суффиксных ссылок)
+        self.output = [()]
+
+        # Дочерние состояния каждого состояния, нужны только при составлении автомата
+        children = [[]]
+        # Составление бора по всем идентификаторам
+        known_identifiers = set()
+        for identifier in identifiers:
+            if len(identifier) == 0 or identifier in known_identifiers:
+                continue
+            known_identifiers.add(identifier)
+            self.identifiers.append(identifier)
+            state = 0
+            for ch in identifier:
+                key = state * CHAR_SPAN + ord(ch)
+                next_state = self.goto.get(key)
+                if next_state is None:
+                    next_state = len(self.fail)
+                    self.goto[key] = next_state
+                    self.fail.append(0)
+                    self.output.append(())
+                    children.append([])
+                    children[state].append((ord(ch), next_state))
+                state = next_state
+            self.output[state] = (identifier,)
+
+        # Вычисление суффиксных ссылок обходом бора в ширину, выходы состояния дополняются выходами его суффиксной ссылки
+        queue = [child for ch_code, child in children[0]]
+        for state in queue:
+            for ch_code, child in children[state]:
+                fail_state = self.fail[state]
+                while fail_state and (fail_state * CHAR_SPAN + ch_code) not in self.goto:
+                    fail_state = self.fail[fail_state]
+                self.fail[child] = self.goto.get(fail_state * CHAR_SPAN + ch_code, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+                queue.append(child)
+
+    def __len__(self):
+        """
+        Количество уникальных идентификаторов в автомате
+        """
+        return len(self.identifiers)
+
+    def find(self, sku_row):
+        """
+        Поиск всех идентификаторов автомата, содержащихся в строке sku_row
+
+        :param sku_row: строка, в которой ведется поиск (str)
+
+        :return: множество идентификаторов, содержащихся в sku_row (set)
+        """
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        found_identifiers = set()
+        state = 0
+        for ch in sku_row:
+            ch_code = ord(ch)
+            next_state = goto.get(state * CHAR_SPAN + ch_code)
+            # Переход по суффиксным ссылкам, пока не найдется переход по символу или не будет достигнут корень
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto.get(state * CHAR_SPAN + ch_code)
+            state = next_state or 0
+            if output[state]:
+                found_identifiers.update(output[state])
+        return found_identifiers
+
+
+def restore_identifier_automaton(identifiers, goto, fail, output):
+    """
+    Восстановление автомата по ранее составленным идентификаторам, переходам, суффиксным ссылкам и выходам состояний без повторного составления (например, при загрузке
+    сохраненного справочника)
+
+    :param identifiers: уникальные идентификаторы автомата в порядке их первого появления (list)
+    :param goto: переходы автомата (dict)
+    :param fail: суффиксные ссылки состояний (list)
+    :param output: идентификаторы, заканчивающиеся в каждом состоянии (list of tuple)
+
+    :return: автомат (IdentifierAutomaton)
+    """
+    automaton = IdentifierAutomaton.__new__(IdentifierAutomaton)
+    automaton.identifiers = identifiers
+    automaton.goto = goto
+    automaton.fail = fail
+    automaton.output = output
+    return automaton
@@ -0,0 +1,162 @@
+"""
+Справочник категорий, читаемый напрямую из файла справочника двоичного формата, отображенного в память. Все процессы пула читают одни и те же страницы файла,
+поэтому идентификаторы справочника не копируются в каждый процесс
+"""
+import hashlib
+
+from CategoryDirectory.DirectoryFile import DirectoryFile, ref_to_func, restore_category_value
+import CategoryDirectory.identify_category as identify_category_cython
+
+# Названия массивов файла справочника, по которым определяются категории, в порядке параметров identify_category_shared_batch
+MATCHING_ARRAY_NAMES = ('strings_data', 'strings_offsets',
+                        'main_identifiers_offsets', 'main_identifiers_ids',
+                        'main_limit_identifiers_offsets', 'main_limit_identifiers_ids',
+                        'add_limit_identifiers_offsets', 'add_limit_identifiers_ids',
+                        'excluding_identifiers_offsets', 'excluding_identifiers_ids')
+
+
+class SharedCategoryDirectory:
+    """
+    Справочник категорий, данные которого не загружаются в память процесса, а читаются из отображенного в память файла справочника (см. CategoryDirectory.DirectoryFile).
+    При передаче в процессы пула сериализуется только путь к файлу, каждый процесс отображает в память тот же файл. Функции определения категорий совпадают по названиям и
+    результатам с функциями CategoryDirectory; поиск идентификаторов автоматом Ахо-Корасик не поддерживается, вместо него идентификаторы перебираются
+    """
+    def __init__(self, data_path):
+        """
+        :param data_path: путь к файлу справочника двоичного формата (str)
+        """
+        self.data_path = data_path
+        self.open()
+
+    def open(self):
+        """
+        Отображение файла справочника в память и получение массивов, по которым определяются категории
+        """
+        self.directory_file = DirectoryFile(self.data_path)
+        self.matching_arrays = tuple(self.directory_file.get_array(name) for name in MATCHING_ARRAY_NAMES)
+        self.category_ids = self.directory_file.get_array('category_ids')
+        self.category_types = self.directory_file.get_array('category_types')
+        # Функция предобработки SKU
+        self.preprocessing_func = ref_to_func(self.directory_file.header['preprocessing_func'])
+        # Уже прочитанные из файла категории и решающие идентификаторы
+        self.categories = {-1: ''}
+        self.dec_ids = {-1: ''}
+
+    def close(self):
+        """
+        Закрытие отображения файла справочника в память
+        """
+        self.matching_arrays = None
+        self.category_ids = None
+        self.category_types = None
+        self.directory_file.close()
+
+    def __getstate__(self):
+        """
+        При сериализации сохраняется только путь к файлу справочника
+        """
+        return {'data_path': self.data_path}
+
+    def __setstate__(self, state):
+        """
+        При восстановлении файл справочника заново отображается в память
+        """
+        self.data_path = state['data_path']
+        self.open()
+
+    def __len__(self):
+        """
+        Количество категорий в справочнике
+        """
+        return len(self.category_ids)
+
+    def get_fingerprint(self):
+        """
+        Отпечаток содержания справочника: хэш файла справочника
+
+        :return: хэш SHA-1 в шестнадцатеричном виде (str)
+        """
+        return hashlib.sha1(self.directory_file.buffer).hexdigest()
+
+    def get_category(self, row):
+        """
+        :param row: номер строки категории в справочнике, -1 - категория не определена (int)
+
+        :return: обозначение категории или пустая строка
+        """
+        category = self.categories.get(row)
+        if category is None:
+            category = restore_category_value(self.directory_file.get_string(int(self.category_ids[row])), int(self.category_types[row]))
+            self.categories[row] = category
+        return category
+
+    def get_dec_id(self, string_id):
+        """
+        :param string_id: номер решающего идентификатора в таблице строк файла, -1 - идентификатора нет (int)
+
+        :return: решающий идентификатор или пустая строка (str)
+        """
+        dec_id = self.dec_ids.get(string_id)
+        if dec_id is None:
+            dec_id = self.directory_file.get_string(string_id)
+            self.dec_ids[string_id] = dec_id
+        return dec_id
+
+    def identify_rows(self, sku_rows):
+        """
+        Определение номеров строк категорий и решающих идентификаторов по списку SKU
+
+        :param sku_rows: список SKU (list)
+
+        :return: см. identify_category_shared_batch
+        """
+        prep_sku_rows = list(map(self.preprocessing_func, sku_rows))
+        return identify_category_cython.identify_category_shared_batch(prep_sku_rows, *self.matching_arrays)
+
+    def identify_category_batch(self, sku_rows, use_aho_corasick=False):
+        """
+        Определение категорий по списку SKU за один вызов, результат совпадает с CategoryDirectory.identify_category_batch
+
+        :param sku_rows: список SKU, по которым определяются категории (list)
+        :param use_aho_corasick: не используется, идентификаторы всегда перебираются (bool)
+        :return: результат в виде списка столбцов: единственный столбец - обозначения категорий или пустые строки (list)
+        """
+        rows = self.identify_rows(sku_rows)[0]
+        return [[self.get_category(row) for row in rows]]
+
+    def identify_category_and_dec_id_batch(self, sku_rows, use_aho_corasick=False):
+        """
+        Определение категорий и решающих идентификаторов по списку SKU за один вызов, результат совпадает с CategoryDirectory.identify_category_and_dec_id_batch
+
+        :param sku_rows: список SKU, по которым определяются категории (list)
+        :param use_aho_corasick: не используется, идентификаторы всегда перебираются (bool)
+        :return: результат в виде списка столбцов: обозначения категорий или пустые строки; главные решающие идентификаторы; главные ограничивающие решающие идентификаторы;
+        дополнительные ограничивающие решающие идентификаторы (list)
+        """
+        rows, main_dec_ids, main_limit_dec_ids, add_limit_dec_ids = self.identify_rows(sku_rows)
+        return [[self.get_category(row) for row in rows],
+                [self.get_dec_id(string_id) for string_id in main_dec_ids],
+                [self.get_dec_id(string_id) for string_id in main_limit_dec_ids],
+                [self.get_dec_id(string_id) for string_id in add_limit_dec_ids]]
+
+    def identify_category_cython(self, sku_row):
+        """
+        Определение категории по заданному SKU, результат совпадает с CategoryDirectory.identify_category_cython
+
+        :param sku_row: SKU, по которому определяется категория
+        :return: обозначение категории или пустая строка (list)
+        """
+        return [column[0] for column in self.identify_category_batch([sku_row])]
+
+    def identify_category_and_dec_id_cython(self, sku_row):
+        """
+        Определение категории и решающих идентификаторов по заданному SKU, результат совпадает с CategoryDirectory.identify_category_and_dec_id_cython
+
+        :param sku_row: SKU, по которому определяется категория
+        :return: обозначение категории или пустая строка; главный, главный ограничивающий и дополнительный ограничивающий решающие идентификаторы (list)
+        """
+        return [column[0] for column in self.identify_category_and_dec_id_batch([sku_row])]
+
+    # Поиск автоматом Ахо-Корасик не поддерживается, результаты тех же функций совпадают с результатами перебора идентификаторов
+    identify_category_aho_corasick = identify_category_cython
+    identify_category_and_dec_id_aho_corasick = identify_category_and_dec_id_cython
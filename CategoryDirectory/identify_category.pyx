@@ -1,3 +1,7 @@
+cimport cython
+from libc.stdint cimport int32_t, int64_t
+from libc.string cimport memchr, memcmp
+
 cpdef str identify_category(str sku_row, list category_rightholders, list main_identifiers, list main_limit_identifiers, list add_limit_identifiers, list excluding_identifiers):
     """
     Определение категории по заданному SKU.
@@ -162,4 +166,308 @@ cpdef tuple identify_category_and_dec_id(str sku_row, list category_rightholders
                     # Возвращается соответствующее обозначение категории
                     return category_rightholders[i], main_id, main_limit_dec_id, add_limit_dec_id
     # Если не найдено ни одной подходящей категории, возвращается пустая строка
-    return '', '', '', ''
\ No newline at end of file
+    return '', '', '', ''
+
+cpdef str identify_category_by_found(set found_identifiers, list candidate_rows, list category_rightholders, list main_identifiers, list main_limit_identifiers, list add_limit_identifiers, list excluding_identifiers):
+    """
+    Определение категории по множеству идентификаторов, заранее найденных в SKU (например, автоматом Ахо-Корасик).
+    Проверяются только категории candidate_rows в порядке возрастания номера, условия на основные, ограничивающие и исключающие идентификаторы те же, что и в функции identify_category,
+    но вместо поиска подстроки в SKU проверяется принадлежность идентификатора множеству found_identifiers
+
+    :param found_identifiers: множество идентификаторов, содержащихся в SKU
+    :param candidate_rows: номера проверяемых категорий в порядке возрастания (категории, в которых используется хотя бы один из найденных основных идентификаторов)
+    :param category_rightholders: список обозначений категории
+    :param main_identifiers: список основных идентификаторов
+    :param main_limit_identifiers: список основных ограничивающих идентификаторов
+    :param add_limit_identifiers: список дополнительных ограничивающих идентификаторов
+    :param excluding_identifiers: список исключающих идентификаторов
+    :return: обозначение категории из category_rightholders или пустая строка, если категория не удается определить
+    """
+    # Типизация используемых переменных
+    cdef int i
+    cdef bint limit_id_found, excluding_id_found
+    cdef str main_id, main_limit_id, add_limit_id, excluding_id
+    # Перебор категорий-кандидатов
+    for i in candidate_rows:
+        # Перебор основых идентификаторов
+        for main_id in main_identifiers[i]:
+            # Если основной идентификатор найден
+            if main_id in found_identifiers:
+                # Флаг "ограничивающие идентификаторы найдены"
+                limit_id_found = False
+                # Если есть основные ограничивающие идентификаторы
+                if len(main_limit_identifiers[i]) > 0:
+                    # Перебор основных ограничивающих идентификаторов
+                    for main_limit_id in main_limit_identifiers[i]:
+                        # Если основной ограничивающий идентификатор найден
+                        if main_limit_id in found_identifiers:
+                            # Если есть дополнительные ограничивающие идентификаторы
+                            if len(add_limit_identifiers[i]) > 0:
+                                # Перебор дополнительных ограничивающих идентификаторов
+                                for add_limit_id in add_limit_identifiers[i]:
+                                    # Если дополнительный ограничивающий идентификатор найден
+                                    if add_limit_id in found_identifiers:
+                                        limit_id_found = True
+                                        break
+                            # Если дополнительных ограничивающих идентификаторов нет
+                            else:
+                                limit_id_found = True
+                        if limit_id_found:
+                            break
+                # Если основных ограничивающих идентификаторов нет
+                else:
+                    limit_id_found = True
+                # если "ограничивающие идентификаторы найдены", начинается поиск исключающих идентификаторов
+                if limit_id_found:
+                    excluding_id_found = False
+                    for excluding_id in excluding_identifiers[i]:
+                        if excluding_id in found_identifiers:
+                            excluding_id_found = True
+                            break
+                # Если "ограничивающие идентификаторы найдены" и не "исключающий дентификатор найден"
+                if limit_id_found and not excluding_id_found:
+                    return category_rightholders[i]
+    # Если не найдено ни одной подходящего категории, возвращается пустая строка
+    return ''
+
+cpdef tuple identify_category_and_dec_id_by_found(set found_identifiers, list candidate_rows, list category_rightholders, list main_identifiers, list main_limit_identifiers, list add_limit_identifiers, list excluding_identifiers):
+    """
+    Определение категории, а также главного, главного ограничивающего и дополнительного ограничивающего решающих идентификаторов по множеству идентификаторов, заранее найденных в SKU.
+    Работает аналогично функции identify_category_and_dec_id, но проверяются только категории candidate_rows, а вместо поиска подстроки в SKU проверяется принадлежность идентификатора
+    множеству found_identifiers
+
+    :param found_identifiers: множество идентификаторов, содержащихся в SKU
+    :param candidate_rows: номера проверяемых категорий в порядке возрастания (категории, в которых используется хотя бы один из найденных основных идентификаторов)
+    :param category_rightholders: список обозначений категорий
+    :param main_identifiers: список основных идентификаторов
+    :param main_limit_identifiers: список основных ограничивающих идентификаторов
+    :param add_limit_identifiers: список дополнительных ограничивающих идентификаторов
+    :param excluding_identifiers: список исключающих идентификаторов
+    :return: обозначение категории из category_rightholders или пустая строка, если категория не удается определить; главный решающий идентификатор; главный ограничивающий решающий
+    идентификатор; дополнительный ограничивающий решающий идентификатор
+    """
+    # Типизация используемых переменных
+    cdef int i
+    cdef bint limit_id_found, excluding_id_found
+    cdef str main_id, main_limit_id, add_limit_id, excluding_id, main_limit_dec_id, add_limit_dec_id
+    # Перебор категорий-кандидатов
+    for i in candidate_rows:
+        # Перебор основых идентификаторов
+        for main_id in main_identifiers[i]:
+            # Если основной идентификатор найден
+            if main_id in found_identifiers:
+                # Флаг "ограничивающие идентификаторы найдены"
+                limit_id_found = False
+                # Если есть основные ограничивающие идентификаторы
+                if len(main_limit_identifiers[i]) > 0:
+                    # Перебор основных ограничивающих идентификаторов
+                    for main_limit_id in main_limit_identifiers[i]:
+                        # Если основной ограничивающий идентификатор найден
+                        if main_limit_id in found_identifiers:
+                            # Если есть дополнительные ограничивающие идентификаторы
+                            if len(add_limit_identifiers[i]) > 0:
+                                # Перебор дополнительных ограничивающих идентификаторов
+                                for add_limit_id in add_limit_identifiers[i]:
+                                    # Если дополнительный ограничивающий идентификатор найден
+                                    if add_limit_id in found_identifiers:
+                                        limit_id_found = True
+                                        main_limit_dec_id = main_limit_id
+                                        add_limit_dec_id = add_limit_id
+                                        break
+                            # Если дополнительных ограничивающих идентификаторов нет
+                            else:
+                                limit_id_found = True
+                                main_limit_dec_id = main_limit_id
+                                add_limit_dec_id = ''
+                        if limit_id_found:
+                            break
+                # Если основных ограничивающих идентификаторов нет
+                else:
+                    limit_id_found = True
+                    main_limit_dec_id = ''
+                    add_limit_dec_id = ''
+                # если "ограничивающие идентификаторы найдены", начинается поиск исключающих идентификаторов
+                if limit_id_found:
+                    excluding_id_found = False
+                    for excluding_id in excluding_identifiers[i]:
+                        if excluding_id in found_identifiers:
+                            excluding_id_found = True
+                            break
+                # Если "ограничивающие идентификаторы найдены" и не "исключающий дентификатор найден"
+                if limit_id_found and not excluding_id_found:
+                    return category_rightholders[i], main_id, main_limit_dec_id, add_limit_dec_id
+    # Если не найдено ни одной подходящей категории, возвращается пустая строка
+    return '', '', '', ''
+
+
+cpdef list identify_category_batch(list sku_rows, list category_rightholders, list main_identifiers, list main_limit_identifiers, list add_limit_identifiers, list excluding_identifiers):
+    """
+    Определение категорий по списку предобработанных SKU функцией identify_category за один вызов
+
+    :param sku_rows: список предобработанных SKU, по которым определяются категории
+    :param category_rightholders: список обозначений категории
+    :param main_identifiers: список основных идентификаторов
+    :param main_limit_identifiers: список основных ограничивающих идентификаторов
+    :param add_limit_identifiers: список дополнительных ограничивающих идентификаторов
+    :param excluding_identifiers: список исключающих идентификаторов
+    :return: список обозначений категорий (или пустых строк), соответствующих sku_rows
+    """
+    cdef str sku_row
+    return [identify_category(sku_row, category_rightholders, main_identifiers, main_limit_identifiers, add_limit_identifiers, excluding_identifiers) for sku_row in sku_rows]
+
+cpdef tuple identify_category_and_dec_id_batch(list sku_rows, list category_rightholders, list main_identifiers, list main_limit_identifiers, list add_limit_identifiers, list excluding_identifiers):
+    """
+    Определение категорий и решающих идентификаторов по списку предобработанных SKU функцией identify_category_and_dec_id за один вызов, результат возвращается по столбцам
+
+    :param sku_rows: список предобработанных SKU, по которым определяются категории
+    :param category_rightholders: список обозначений категорий
+    :param main_identifiers: список основных идентификаторов
+    :param main_limit_identifiers: список основных ограничивающих идентификаторов
+    :param add_limit_identifiers: список дополнительных ограничивающих идентификаторов
+    :param excluding_identifiers: список исключающих идентификаторов
+    :return: списки обозначений категорий, главных решающих идентификаторов, главных ограничивающих решающих идентификаторов и дополнительных ограничивающих решающих
+    идентификаторов, соответствующих sku_rows
+    """
+    cdef str sku_row
+    cdef list categories = [], main_dec_ids = [], main_limit_dec_ids = [], add_limit_dec_ids = []
+    cdef tuple result
+    for sku_row in sku_rows:
+        result = identify_category_and_dec_id(sku_row, category_rightholders, main_identifiers, main_limit_identifiers, add_limit_identifiers, excluding_identifiers)
+        categories.append(result[0])
+        main_dec_ids.append(result[1])
+        main_limit_dec_ids.append(result[2])
+        add_limit_dec_ids.append(result[3])
+    return categories, main_dec_ids, main_limit_dec_ids, add_limit_dec_ids
+
+
+cdef inline bint bytes_contain(const unsigned char* text, Py_ssize_t text_len, const unsigned char* pattern, Py_ssize_t pattern_len) noexcept nogil:
+    """
+    Проверка того, что строка байтов pattern содержится в строке байтов text. Для строк в UTF-8 результат совпадает с проверкой вхождения исходных строк.
+    Ищутся вхождения последнего байта pattern: в UTF-8 первые байты символов одного алфавита почти всегда одинаковые, а последние различаются
+    """
+    cdef Py_ssize_t last = pattern_len - 1
+    cdef const unsigned char* position
+    cdef const unsigned char* text_end = text + text_len
+    if pattern_len == 0:
+        return True
+    if pattern_len > text_len:
+        return False
+    position = text + last
+    while position < text_end:
+        # Поиск следующего вхождения последнего байта pattern
+        position = <const unsigned char*>memchr(position, pattern[last], text_end - position)
+        if position == NULL:
+            return False
+        if memcmp(position - last, pattern, last) == 0:
+            return True
+        position += 1
+    return False
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline bint sku_contain_string(const unsigned char* sku, Py_ssize_t sku_len, const unsigned char[::1] strings_data, const int64_t[::1] strings_offsets, int32_t string_id) noexcept nogil:
+    """
+    Проверка того, что строка номер string_id таблицы строк справочника содержится в SKU (обе строки в UTF-8)
+    """
+    cdef int64_t start = strings_offsets[string_id]
+    cdef int64_t string_len = strings_offsets[string_id + 1] - start
+    if string_len == 0:
+        return True
+    return bytes_contain(sku, sku_len, &strings_data[start], string_len)
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef Py_ssize_t identify_category_shared_row(const unsigned char* sku, Py_ssize_t sku_len, const unsigned char[::1] strings_data, const int64_t[::1] strings_offsets,
+                                             const int64_t[::1] main_offsets, const int32_t[::1] main_ids, const int64_t[::1] main_limit_offsets, const int32_t[::1] main_limit_ids,
+                                             const int64_t[::1] add_limit_offsets, const int32_t[::1] add_limit_ids, const int64_t[::1] excluding_offsets, const int32_t[::1] excluding_ids,
+                                             int32_t* dec_ids) noexcept nogil:
+    """
+    Определение категории по SKU в UTF-8 по справочнику в виде массивов двоичного формата справочника (см. CategoryDirectory.DirectoryFile): идентификаторы - номера строк
+    таблицы строк, идентификаторы строки справочника i - номера с main_offsets[i] по main_offsets[i + 1] (и так же для остальных типов идентификаторов).
+    Условия определения категории и порядок перебора идентификаторов те же, что и в функции identify_category_and_dec_id
+
+    :return: номер строки категории в справочнике или -1, если категорию не удается определить; в dec_ids записываются номера строк главного, главного ограничивающего и
+    дополнительного ограничивающего решающих идентификаторов (-1, если идентификатора нет)
+    """
+    cdef Py_ssize_t i, j, k, m
+    cdef bint limit_id_found, excluding_id_found
+    cdef int32_t main_limit_dec_id = -1, add_limit_dec_id = -1
+    # Перебор всех категорий из словаря
+    for i in range(main_offsets.shape[0] - 1):
+        # Перебор основых идентификаторов
+        for j in range(main_offsets[i], main_offsets[i + 1]):
+            if sku_contain_string(sku, sku_len, strings_data, strings_offsets, main_ids[j]):
+                limit_id_found = False
+                # Если есть основные ограничивающие идентификаторы
+                if main_limit_offsets[i + 1] > main_limit_offsets[i]:
+                    for k in range(main_limit_offsets[i], main_limit_offsets[i + 1]):
+                        if sku_contain_string(sku, sku_len, strings_data, strings_offsets, main_limit_ids[k]):
+                            # Если есть дополнительные ограничивающие идентификаторы
+                            if add_limit_offsets[i + 1] > add_limit_offsets[i]:
+                                for m in range(add_limit_offsets[i], add_limit_offsets[i + 1]):
+                                    if sku_contain_string(sku, sku_len, strings_data, strings_offsets, add_limit_ids[m]):
+                                        limit_id_found = True
+                                        main_limit_dec_id = main_limit_ids[k]
+                                        add_limit_dec_id = add_limit_ids[m]
+                                        break
+                            else:
+                                limit_id_found = True
+                                main_limit_dec_id = main_limit_ids[k]
+                                add_limit_dec_id = -1
+                        if limit_id_found:
+                            break
+                else:
+                    limit_id_found = True
+                    main_limit_dec_id = -1
+                    add_limit_dec_id = -1
+                # Если ограничивающие идентификаторы найдены, ищутся исключающие идентификаторы
+                if limit_id_found:
+                    excluding_id_found = False
+                    for m in range(excluding_offsets[i], excluding_offsets[i + 1]):
+                        if sku_contain_string(sku, sku_len, strings_data, strings_offsets, excluding_ids[m]):
+                            excluding_id_found = True
+                            break
+                    if not excluding_id_found:
+                        dec_ids[0] = main_ids[j]
+                        dec_ids[1] = main_limit_dec_id
+                        dec_ids[2] = add_limit_dec_id
+                        return i
+    return -1
+
+cpdef tuple identify_category_shared_batch(list sku_rows, const unsigned char[::1] strings_data, const int64_t[::1] strings_offsets,
+                                           const int64_t[::1] main_offsets, const int32_t[::1] main_ids, const int64_t[::1] main_limit_offsets, const int32_t[::1] main_limit_ids,
+                                           const int64_t[::1] add_limit_offsets, const int32_t[::1] add_limit_ids, const int64_t[::1] excluding_offsets, const int32_t[::1] excluding_ids):
+    """
+    Определение категорий и решающих идентификаторов по списку предобработанных SKU по справочнику в виде массивов двоичного формата справочника (массивы могут быть
+    отображены в память из файла справочника и использоваться несколькими процессами без копирования). Результат совпадает с результатом identify_category_and_dec_id_batch
+
+    :param sku_rows: список предобработанных SKU, по которым определяются категории
+    :param strings_data: байты всех строк справочника в UTF-8
+    :param strings_offsets: смещения начал строк справочника в strings_data
+    :param main_offsets, main_ids: основные идентификаторы
+    :param main_limit_offsets, main_limit_ids: основные ограничивающие идентификаторы
+    :param add_limit_offsets, add_limit_ids: дополнительные ограничивающие идентификаторы
+    :param excluding_offsets, excluding_ids: исключающие идентификаторы
+    :return: списки номеров строк категорий в справочнике (-1, если категорию не удается определить), номеров строк главных решающих идентификаторов, главных ограничивающих
+    решающих идентификаторов и дополнительных ограничивающих решающих идентификаторов (-1, если идентификатора нет), соответствующих sku_rows
+    """
+    cdef str sku_row
+    cdef bytes sku_bytes
+    cdef Py_ssize_t row
+    cdef int32_t dec_ids[3]
+    cdef list rows = [], main_dec_ids = [], main_limit_dec_ids = [], add_limit_dec_ids = []
+    dec_ids[0] = dec_ids[1] = dec_ids[2] = -1
+    for sku_row in sku_rows:
+        sku_bytes = sku_row.encode('utf-8', 'surrogatepass')
+        row = identify_category_shared_row(sku_bytes, len(sku_bytes), strings_data, strings_offsets, main_offsets, main_ids, main_limit_offsets, main_limit_ids,
+                                           add_limit_offsets, add_limit_ids, excluding_offsets, excluding_ids, dec_ids)
+        rows.append(row)
+        if row < 0:
+            main_dec_ids.append(-1)
+            main_limit_dec_ids.append(-1)
+            add_limit_dec_ids.append(-1)
+        else:
+            main_dec_ids.append(dec_ids[0])
+            main_limit_dec_ids.append(dec_ids[1])
+            add_limit_dec_ids.append(dec_ids[2])
+    return rows, main_dec_ids, main_limit_dec_ids, add_limit_dec_ids
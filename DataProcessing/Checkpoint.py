@@ -0,0 +1,107 @@
+"""
+Контрольная точка обработки: файл рядом с обработанным файлом, в котором после записи каждого батча сохраняется количество обработанных строк, размер обработанного файла
+и отпечатки обрабатываемого файла и параметров обработки. По контрольной точке прерванная обработка продолжается со следующего батча
+"""
+import hashlib
+import json
+import os
+
+# Окончание имени файла контрольной точки, хранящегося рядом с обработанным файлом
+CHECKPOINT_FILE_SUFFIX = '.checkpoint.json'
+# Версия формата контрольной точки; контрольные точки других версий не используются
+CHECKPOINT_VERSION = 1
+
+
+def get_file_fingerprint(data_path):
+    """
+    Отпечаток файла: размер и время изменения
+
+    :param data_path: путь к файлу (str)
+
+    :return: размер файла и время его изменения в наносекундах (list)
+    """
+    stat = os.stat(data_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def hash_config(*config_parts):
+    """
+    Хэш параметров обработки, от которых зависит содержание обработанного файла
+
+    :param config_parts: параметры обработки, приводимые к JSON (значения, не приводимые к JSON, приводятся к строкам)
+
+    :return: хэш SHA-1 в шестнадцатеричном виде (str)
+    """
+    return hashlib.sha1(json.dumps(config_parts, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class Checkpoint:
+    """
+    Контрольная точка обработки файла input_data_path с записью результатов в файл output_data_path
+    """
+    def __init__(self, input_data_path, output_data_path, config_hash):
+        """
+        :param input_data_path: путь к обрабатываемому файлу (str)
+        :param output_data_path: путь к обработанному файлу (str)
+        :param config_hash: хэш параметров обработки (str)
+        """
+        self.input_data_path = input_data_path
+        self.output_data_path = output_data_path
+        self.checkpoint_path = "".join([output_data_path, CHECKPOINT_FILE_SUFFIX])
+        self.config_hash = config_hash
+        self.input_fingerprint = get_file_fingerprint(input_data_path)
+
+    def save(self, rows_done_num):
+        """
+        Сохранение контрольной точки после записи батча: количество обработанных строк и размер обработанного файла. Контрольная точка записывается во временный файл, который
+        затем переименовывается, чтобы не оставить недописанную контрольную точку
+
+        :param rows_done_num: количество строк, обработанных и записанных в обработанный файл (int)
+        """
+        state = {'version': CHECKPOINT_VERSION,
+                 'input_data_path': os.path.abspath(self.input_data_path),
+                 'input_fingerprint': self.input_fingerprint,
+                 'config_hash': self.config_hash,
+                 'rows_done_num': rows_done_num,
+                 'output_size': os.path.getsize(self.output_data_path)}
+        tmp_checkpoint_path = "".join([self.checkpoint_path, '.tmp'])
+        with open(tmp_checkpoint_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_checkpoint_path, self.checkpoint_path)
+
+    def load(self):
+        """
+        Чтение контрольной точки и проверка того, что она сохранена при обработке того же обрабатываемого файла с теми же параметрами, а обработанный файл не короче,
+        чем при ее сохранении
+
+        :return: количество обработанных строк и размер обработанного файла (tuple), если обработку можно продолжить с контрольной точки, иначе None
+        """
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('version') != CHECKPOINT_VERSION or state.get('input_data_path') != os.path.abspath(self.input_data_path) or \
+                state.get('input_fingerprint') != self.input_fingerprint or state.get('config_hash') != self.config_hash:
+            return None
+        if not os.path.exists(self.output_data_path) or os.path.getsize(self.output_data_path) < state['output_size']:
+            return None
+        return state['rows_done_num'], state['output_size']
+
+    def remove(self):
+        """
+        Удаление контрольной точки после завершения обработки
+        """
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+
+def truncate_output_file(output_data_path, output_size):
+    """
+    Обрезка обработанного файла до размера, записанного в контрольной точке: строки батчей, записанных после нее, удаляются
+
+    :param output_data_path: путь к обработанному файлу (str)
+    :param output_size: размер файла (байт) (int)
+    """
+    with open(output_data_path, 'r+b') as f:
+        f.truncate(output_size)
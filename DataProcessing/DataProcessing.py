@@ -3,10 +3,16 @@ import numpy as np
 import multiprocessing as mp
 import filecmp
 import os
+import queue
+import threading
 
 from datetime import datetime
+from functools import partial
 
 from DataProcessing.SKUPreprocessing import init_sku_reader, init_writer, CLEAR_PATTERNS_DICT
+from DataProcessing.PoolWorker import init_pool_worker, call_pool_worker_func, read_and_call_pool_worker_func
+from DataProcessing.ResultCache import ResultCache, DedupStats, dedup_sku_rows
+from DataProcessing.Checkpoint import Checkpoint, hash_config, truncate_output_file
 from Utilities.Utilities import *
 
 class SKUProcessor:
@@ -14,19 +20,35 @@ class SKUProcessor:
     Обработчик SKU. Содержит функции многопоточного чтения SKU из файла батчами с предобработкой, многопоточное применение на каждой строке батча SKU некоторой функции, многопоточная
     запись результатов обработки в единый файл.
     """
-    def __init__(self, sku_reader, output_data_path, proc_func, max_batch_len, use_threads_count):
+    def __init__(self, sku_reader, output_data_path, proc_func, max_batch_len, use_threads_count, proc_batch_func=None, workers_read_input=False, dedup_sku=False, result_cache_size=0):
         """
         :param sku_reader: ридер SKU (объект, содержащий функцию read(batch_start, batch_len), считывающий batch_len строк SKU начиная с batch_start)
         :param output_data_path: путь к файлу, в который будут выводиться результаты распознавания
         :param proc_func: функция, обрабатывающая одну строку SKU (получает string, возвращает string)
         :param max_batch_len: количество строк SKU, содержащихся в одном обрабатываемом батче
         :param use_threads_count: количество потоков, использумых для обработки, если превышает максимально доступное оличество потоков, то применяетс максимально доступное количество (int)
+        :param proc_batch_func: функция, обрабатывающая сразу список строк SKU и возвращающая результат в виде списка столбцов; если задана, то используется вместо proc_func,
+        по умолчанию None
+        :param workers_read_input: флаг чтения SKU процессами пула: каждый процесс сам читает и разбирает свою часть батча по ее байтовому диапазону в файле; действует, только если ридер
+        поддерживает байтовые диапазоны (есть индекс строк, строки которого совпадают с записями файла), по умолчанию False (bool)
+        :param dedup_sku: флаг устранения повторов: каждая уникальная строка SKU батча обрабатывается один раз, результаты раскладываются по всем ее вхождениям; если процессы пула
+        сами читают SKU, то повторы устраняются внутри частей батча, по умолчанию False (bool)
+        :param result_cache_size: максимальное количество результатов, хранимых между батчами для устранения повторов в разных батчах, действует при dedup_sku, по умолчанию 0 -
+        результаты между батчами не хранятся (int)
         """
         self.sku_reader = sku_reader
         self.writer = init_writer(output_data_path)
         self.proc_func = proc_func
+        self.proc_batch_func = proc_batch_func
         self.max_batch_len = max_batch_len
         self.use_threads_count = use_threads_count
+        # Пул процессов, используемый для обработки всех батчей; создается один раз при начале обработки
+        self.pool = None
+        self.workers_read_input = workers_read_input and sku_reader.line_offsets is not None
+        self.dedup_sku = dedup_sku
+        # Кэш результатов между батчами и статистика устранения повторов
+        self.result_cache = ResultCache(result_cache_size)
+        self.dedup_stats = DedupStats()
 
     def read_batch(self, batch_start):
         """
@@ -37,6 +59,39 @@ class SKUProcessor:
         :return: self.max_batch_len предобаботанных SKU строк из ридера self.sku_reader
         """
         return self.sku_reader.read(batch_start, self.max_batch_len)
+
+    def create_pool(self, proc_func):
+        """
+        Создание пула из self.use_threads_count процессов, каждому из которых при создании один раз передается функция обработки proc_func (вместе с объектом, методом которого она
+        является), чтобы она не сериализовалась заново для каждой задачи
+
+        :param proc_func: функция обработки строки SKU или списка строк SKU
+
+        :return: пул процессов (multiprocessing.Pool), задачи которого выполняются функцией call_pool_worker_func
+        """
+        return mp.Pool(self.use_threads_count, initializer=init_pool_worker, initargs=(proc_func, self.proc_batch_func is not None, self.dedup_sku))
+
+    def open_pool(self):
+        """
+        Создание пула процессов self.pool, если он еще не создан. Процессам передается функция self.proc_batch_func, если она задана, иначе self.proc_func
+
+        :return: пул процессов self.pool
+        """
+        if self.pool is None:
+            if self.proc_batch_func is not None:
+                self.pool = self.create_pool(self.proc_batch_func)
+            else:
+                self.pool = self.create_pool(self.proc_func)
+        return self.pool
+
+    def close_pool(self):
+        """
+        Завершение процессов пула self.pool, если он создан
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
     
     def process_batch(self, data_rows):
         """
@@ -50,13 +105,143 @@ class SKUProcessor:
         # for i, row in enumerate(data_rows):
         #     processed_rows[i] = self.proc_func(row)
 
-        # Создание пула потоков для self.use_threads_count потоков
-        pool = mp.Pool(self.use_threads_count)
-        # Распознование категорий в соответствии справочнику self.category_directory
-        processed_rows = list(pool.map(self.proc_func, data_rows))
-        # Закрытие пула потоков
-        pool.close()
+        # Пул потоков для self.use_threads_count потоков, общий для всех батчей
+        pool = self.open_pool()
+        # Распознование категорий в соответствии справочнику self.category_directory, задачи содержат только строки SKU
+        processed_rows = list(pool.map(call_pool_worker_func, data_rows))
         return processed_rows
+
+    def split_batch(self, data_rows):
+        """
+        Разделение батча на части для пакетной обработки в пуле потоков; частей в несколько раз больше, чем потоков, чтобы нагрузка распределялась равномерно
+
+        :param data_rows: строки SKU
+
+        :return: список частей батча data_rows в исходном порядке
+        """
+        chunks_num = self.use_threads_count * 4
+        chunk_len = max(int(np.ceil(len(data_rows) / chunks_num)), 1)
+        return [data_rows[i : i + chunk_len] for i in range(0, len(data_rows), chunk_len)]
+
+    def process_batch_columns(self, data_rows):
+        """
+        Пакетная обработка строк data_rows функцией self.proc_batch_func: батч делится на части, каждая часть обрабатывается одним вызовом self.proc_batch_func в пуле потоков
+
+        :param data_rows: строки SKU
+
+        :return: список столбцов, возвращаемых функцией self.proc_batch_func, объединенных по всем частям батча в исходном порядке
+        """
+        # Пул потоков для self.use_threads_count потоков, общий для всех батчей
+        pool = self.open_pool()
+        # Обработка частей батча, каждая часть - один вызов self.proc_batch_func, задачи содержат только строки SKU
+        processed_chunks = pool.map(call_pool_worker_func, self.split_batch(data_rows), chunksize=1)
+        # Объединение столбцов всех частей
+        return merge_chunk_columns(processed_chunks)
+    
+    def process_sku_batch(self, sku_batch):
+        """
+        Обработка батча SKU и подготовка данных для записи в обработанный файл, первыми в данных идут исходные SKU
+
+        :param sku_batch: строки SKU
+
+        :return: данные для записи: список столбцов, если задана self.proc_batch_func, иначе список строк
+        """
+        if self.dedup_sku:
+            return self.process_sku_batch_dedup(sku_batch)
+        if self.proc_batch_func is not None:
+            # Пакетная обработка, результат по столбцам, первым столбцом идут исходные SKU
+            return [sku_batch] + self.process_batch_columns(sku_batch)
+        proc_data_batch = self.process_batch(sku_batch)
+        # Добавление исходных SKU в массив данных
+        return [[sku_batch[j]] + proc_data_batch[j] for j in range(len(sku_batch))]
+
+    def process_sku_batch_dedup(self, sku_batch):
+        """
+        Обработка батча SKU с устранением повторов: обрабатываются только уникальные строки батча, результатов для которых нет в кэше self.result_cache, затем результаты
+        раскладываются по исходным строкам батча
+
+        :param sku_batch: строки SKU
+
+        :return: данные для записи в том же виде, что и у функции process_sku_batch
+        """
+        sku_results, new_rows = dedup_sku_rows(sku_batch, self.result_cache, self.dedup_stats)
+        # Обработка новых строк, результат каждой строки - список значений
+        if len(new_rows) > 0:
+            if self.proc_batch_func is not None:
+                new_results = [list(row_result) for row_result in zip(*self.process_batch_columns(new_rows))]
+            else:
+                new_results = self.process_batch(new_rows)
+            for sku, result in zip(new_rows, new_results):
+                sku_results[sku] = result
+                self.result_cache.put(sku, result)
+        # Раскладка результатов по исходным строкам батча
+        if self.proc_batch_func is not None:
+            return [sku_batch] + [list(column) for column in zip(*[sku_results[sku] for sku in sku_batch])]
+        return [[sku] + sku_results[sku] for sku in sku_batch]
+
+    def split_byte_ranges(self, batch_start):
+        """
+        Разделение батча, начинающегося со строки batch_start, на части и вычисление их байтовых диапазонов в читаемом файле для чтения частей процессами пула;
+        частей в несколько раз больше, чем потоков, чтобы нагрузка распределялась равномерно
+
+        :param batch_start: строка, с которой начинается батч, не считая заголовка
+
+        :return: список задач для read_and_call_pool_worker_func - параметров чтения частей батча в исходном порядке
+        """
+        batch_end = min(batch_start + self.max_batch_len, len(self.sku_reader))
+        chunk_len = max(int(np.ceil(self.max_batch_len / (self.use_threads_count * 4))), 1)
+        return [self.sku_reader.get_byte_range_task(chunk_start, min(chunk_len, batch_end - chunk_start)) for chunk_start in range(batch_start, batch_end, chunk_len)]
+
+    def process_byte_ranges(self, byte_range_tasks):
+        """
+        Чтение и обработка частей батча процессами пула: каждый процесс читает свою часть из файла и обрабатывает ее
+
+        :param byte_range_tasks: параметры чтения частей батча, полученные функцией split_byte_ranges
+
+        :return: данные для записи в том же виде, что и у функции process_sku_batch
+        """
+        pool = self.open_pool()
+        processed_chunks = pool.map(read_and_call_pool_worker_func, byte_range_tasks, chunksize=1)
+        if self.proc_batch_func is None:
+            # Объединение строк всех частей
+            return [row for chunk_rows in processed_chunks for row in chunk_rows]
+        # Объединение столбцов всех частей
+        return merge_chunk_columns(processed_chunks)
+
+    def load_batch(self, batch_start):
+        """
+        Подготовка батча к обработке: чтение строк SKU ридером или, если процессы пула сами читают свои части батча, только вычисление байтовых диапазонов этих частей
+
+        :param batch_start: строка, с которой начинается батч, не считая заголовка
+
+        :return: строки SKU или параметры чтения частей батча
+        """
+        if self.workers_read_input:
+            return self.split_byte_ranges(batch_start)
+        return self.read_batch(batch_start)
+
+    def process_loaded_batch(self, loaded_batch):
+        """
+        Обработка батча, подготовленного функцией load_batch
+
+        :param loaded_batch: строки SKU или параметры чтения частей батча
+
+        :return: данные для записи в том же виде, что и у функции process_sku_batch
+        """
+        if self.workers_read_input:
+            return self.process_byte_ranges(loaded_batch)
+        return self.process_sku_batch(loaded_batch)
+
+    def write_output_data(self, output_data):
+        """
+        Запись данных, подготовленных функцией process_sku_batch, в обработанный файл
+
+        :param output_data: список столбцов, если задана self.proc_batch_func, иначе список строк
+        """
+        if self.proc_batch_func is not None:
+            self.write_columns_to_csv_file(output_data)
+        else:
+            self.write_batch_to_csv_file(output_data)
     
     def write_batch_to_csv_file(self, output_rows):
         """
@@ -69,12 +254,25 @@ class SKUProcessor:
         df = pd.DataFrame(output_rows)
         self.writer.append(df)
 
+    def write_columns_to_csv_file(self, output_columns):
+        """
+        Запись в csv-файл по пути self.output_data_path данных, заданных по столбцам
+
+        :param output_columns: список столбцов данных, преднозначенных для записи
+
+        :return: csv-файл по пути self.output_data_path с записанным фреймом данных output_columns
+        """
+        df = pd.DataFrame(dict(enumerate(output_columns)))
+        self.writer.append(df)
+
 
 class SKUProcessorInterface(SKUProcessor):
     """
     Интерфейс для многопоточной обработки SKU, вывода сообщений о работе, прогресса, записи результатов обработки
     """
-    def __init__(self, input_data_path, sku_sheet_name, sku_col_name, output_data_path, proc_func, max_batch_len, use_threads_count, set_msg_func, pbar, is_running_flag=None):
+    def __init__(self, input_data_path, sku_sheet_name, sku_col_name, output_data_path, proc_func, max_batch_len, use_threads_count, set_msg_func, pbar, is_running_flag=None,
+                 proc_batch_func=None, pipelined=False, pipeline_depth=2, workers_read_input=False, dedup_sku=False, result_cache_size=0, use_checkpoint=False, resume=False,
+                 config_hash='', cache_line_index=False):
         """
         :param input_data_path: путь к файлу, со строками SKU для обработки
         :param sku_sheet_name: название листа, содержащей строки SKU для обработки, если строка пустая, то берется первый лист в заданном файле
@@ -86,9 +284,24 @@ class SKUProcessorInterface(SKUProcessor):
         :param set_msg_func: функция вывода сообщения
         :param pbar: объект progress bar, содержащий функции reset, set
         :param is_running_flag: функция, возвращающая False, если вычисления были остановлены, по умолчанию None - при том вычисления не могут быть остановлены
+        :param proc_batch_func: функция, обрабатывающая сразу список строк SKU и возвращающая результат в виде списка столбцов; если задана, то используется вместо proc_func,
+        по умолчанию None
+        :param pipelined: флаг конвейерной обработки - чтение, обработка и запись батчей идут одновременно в разных потоках, по умолчанию False (bool)
+        :param pipeline_depth: максимальное количество батчей, ожидающих обработки или записи при конвейерной обработке (int)
+        :param workers_read_input: флаг чтения частей батчей из csv-файла самими процессами пула, по умолчанию False (bool)
+        :param dedup_sku: флаг обработки каждой уникальной строки SKU батча один раз, по умолчанию False (bool)
+        :param result_cache_size: максимальное количество результатов, хранимых между батчами при dedup_sku, по умолчанию 0 (int)
+        :param use_checkpoint: флаг сохранения контрольной точки после записи каждого батча, по умолчанию False (bool)
+        :param resume: флаг продолжения обработки с контрольной точки, если она сохранена при обработке того же файла с теми же параметрами; обработанный файл обрезается до
+        последнего батча, записанного до контрольной точки; иначе обработка начинается сначала, по умолчанию False (bool)
+        :param config_hash: хэш параметров обработки, от которых зависит содержание обработанного файла, для проверки контрольной точки (str)
+        :param cache_line_index: флаг хранения индекса строк обрабатываемого csv, txt-файла рядом с ним (файл <input_data_path>.lines.npz) для повторных обработок того же файла,
+        по умолчанию False (bool)
         """
         # Начало отсчета времени
         self.timer_start = datetime.now()
+        self.pipelined = pipelined
+        self.pipeline_depth = pipeline_depth
 
         try:
             # Проверка того, различается ли обрабатываемый и обработанный файл
@@ -106,7 +319,7 @@ class SKUProcessorInterface(SKUProcessor):
             self.pbar.reset(1)
             
             # Создание ридера SKU, соответствующего формату обрабатываемого файла
-            sku_reader = init_sku_reader(input_data_path, sku_sheet_name, sku_col_name)
+            sku_reader = init_sku_reader(input_data_path, sku_sheet_name, sku_col_name, cache_line_index)
             
             # Количество задействованных потоков
             cpu_num = mp.cpu_count()
@@ -121,7 +334,31 @@ class SKUProcessorInterface(SKUProcessor):
             # Назначение максимального значения progress bar
             self.pbar.reset(len(sku_reader))
 
-            super(SKUProcessorInterface, self).__init__(sku_reader, output_data_path, proc_func, max_batch_len, cpu_count)
+            super(SKUProcessorInterface, self).__init__(sku_reader, output_data_path, proc_func, max_batch_len, cpu_count, proc_batch_func, workers_read_input, dedup_sku, result_cache_size)
+            if workers_read_input and not self.workers_read_input:
+                # Байтовые диапазоны частей батча нельзя вычислить: excel-файл, поля в кавычках, которые могут содержать перенос строки, или переносы строки одним символом \r
+                set_message_with_countdown('Строки файла нельзя разделить по байтовым диапазонам, SKU читаются основным процессом, а не процессами пула', self.timer_start,
+                                           self.set_msg_func)
+
+            # Контрольная точка и строка, с которой начинается обработка
+            self.checkpoint = None
+            self.start_row = 0
+            self.resumed = False
+            if use_checkpoint or resume:
+                self.checkpoint = Checkpoint(input_data_path, output_data_path, config_hash)
+            if resume:
+                checkpoint_state = self.checkpoint.load()
+                if checkpoint_state is not None:
+                    self.start_row, output_size = checkpoint_state
+                    # Удаление из обработанного файла строк, записанных после контрольной точки
+                    truncate_output_file(output_data_path, output_size)
+                    self.resumed = True
+                    self.pbar.set(self.start_row)
+                    set_message_with_countdown("".join(['Обработка продолжается с контрольной точки: ', str(self.start_row), ' строк уже обработано']), self.timer_start,
+                                               self.set_msg_func)
+                else:
+                    set_message_with_countdown('Контрольная точка не найдена или сохранена для другого файла или других параметров, обработка начинается сначала',
+                                               self.timer_start, self.set_msg_func)
 
         except Exception as e:
             set_error_message(str(e), self.timer_start, set_msg_func)
@@ -129,62 +366,203 @@ class SKUProcessorInterface(SKUProcessor):
     def process(self):
         """
         Проведение основных вычислений: чтение SKU батчами из ридера self.sku_reader, многопоточная обработка батчей SKU (применение функции self.proc_func на каждом SKU),
-        запись результатов обработки в обработанный файл self.output_data_path с выводом сообщений о процессе обработки и отображением прогресса
+        запись результатов обработки в обработанный файл self.output_data_path с выводом сообщений о процессе обработки и отображением прогресса.
+        Все батчи обрабатываются одним пулом процессов, который завершается по окончании обработки, при ее остановке или ошибке.
+        Если self.pipelined, то чтение, обработка и запись батчей идут одновременно (см. process_pipelined), иначе последовательно
         """
         try:
-            # Количество обработанных строк
-            rows_done_num = 0
-            # Список начал батчей
-            batches_starts = np.arange(self.batches_num) * self.max_batch_len
+            # Создание пула процессов, общего для всех батчей
+            self.open_pool()
+            # Список начал батчей, при продолжении с контрольной точки - начиная со строки, следующей за последним записанным батчем
+            batches_starts = np.arange(self.start_row, len(self.sku_reader), self.max_batch_len)
+            # Контрольная точка перед первым батчем: обработанный файл содержит только заголовок или батчи, записанные до продолжения
+            if self.checkpoint is not None:
+                self.checkpoint.save(self.start_row)
             # Обработка батчей
-            for i, batch_start in enumerate(batches_starts):
+            if self.pipelined:
+                self.process_pipelined(batches_starts)
+            else:
+                self.process_serial(batches_starts)
+
+            if self.is_running():
+                # Сообщение о корректном завершении обработки
+                set_message_with_countdown('Обработка SKU завершена, результаты сохранены в обработанный файл', self.timer_start, self.set_msg_func)
+                # Контрольная точка завершенной обработки не нужна
+                if self.checkpoint is not None:
+                    self.checkpoint.remove()
+                # Статистика устранения повторов
+                if self.dedup_sku and self.dedup_stats.rows_count > 0:
+                    self.report_dedup_stats()
+            else:
+                # Сообщение об экстренной остановке работы
+                set_message_with_countdown('Обработка остановлена', self.timer_start, self.set_msg_func)
+        except Exception as e:
+            set_error_message(str(e), self.timer_start, self.set_msg_func)
+        finally:
+            # Завершение процессов пула
+            self.close_pool()
+            # Закрытие читаемого файла
+            self.sku_reader.close()
+
+    def process_serial(self, batches_starts):
+        """
+        Последовательная обработка батчей: каждый батч читается, обрабатывается и записывается до начала чтения следующего
+
+        :param batches_starts: номера строк, с которых начинаются батчи
+        """
+        # Количество обработанных строк
+        rows_done_num = self.start_row
+        for i, batch_start in enumerate(batches_starts, self.start_row // self.max_batch_len):
+            # Проверка условия прерывания работы
+            if not self.is_running():
+                # Выход из цикла обработки
+                break
+
+            # Сообщение о начале обработки батча
+            set_message_with_countdown("".join(['Обрабатывается батч №', str(i + 1)]), self.timer_start, self.set_msg_func)
+
+            # Загрузка батча
+            #   Процесс загрузки
+            sku_batch = self.load_batch(batch_start)
+            #   Сообщение о завершении загрузки и предобработке батчей
+            set_message_with_countdown('Батч загружен', self.timer_start, self.set_msg_func)
+        
+            # Процесс обработки
+            output_data = self.process_loaded_batch(sku_batch)
+            # Сообщение о окончании обработки батча
+            set_message_with_countdown('Батч обработан', self.timer_start, self.set_msg_func)
+
+            # Добавление обработанных данных в обработанный файл
+            #       Сообщение о начале записи обработанных данных
+            set_message_with_countdown('Сохранение полученных данных', self.timer_start, self.set_msg_func)
+            #   Запись исходящих данных в обработанный файл
+            self.write_output_data(output_data)
+
+            # Обновление количества обработанных строк, вывод сообщения и обновление progress bar
+            rows_done_num = self.report_batch_saved(rows_done_num)
+
+    def process_pipelined(self, batches_starts):
+        """
+        Конвейерная обработка батчей: пока батч N обрабатывается пулом процессов, батч N+1 читается отдельным потоком, а батч N-1 записывается другим потоком.
+        Батчи передаются между потоками через очереди длины не более self.pipeline_depth, поэтому в памяти одновременно находится лишь несколько батчей.
+        Батчи записываются в том же порядке, в котором были прочитаны
+
+        :param batches_starts: номера строк, с которых начинаются батчи
+        """
+        # Очереди прочитанных и обработанных батчей, None означает конец очереди
+        read_queue = queue.Queue(maxsize=self.pipeline_depth)
+        write_queue = queue.Queue(maxsize=self.pipeline_depth)
+        # Сигнал о прекращении работы потоков чтения и записи
+        stop_event = threading.Event()
+        # Ошибки, возникшие в потоках чтения и записи
+        thread_errors = []
+
+        def read_batches():
+            try:
+                for batch_start in batches_starts:
+                    if stop_event.is_set():
+                        break
+                    sku_batch = self.load_batch(batch_start)
+                    if not put_until_stopped(read_queue, sku_batch, stop_event):
+                        break
+            except Exception as e:
+                thread_errors.append(e)
+            finally:
+                put_until_stopped(read_queue, None, stop_event)
+
+        def write_batches():
+            rows_done_num = self.start_row
+            try:
+                while True:
+                    output_data = write_queue.get()
+                    if output_data is None:
+                        break
+                    self.write_output_data(output_data)
+                    rows_done_num = self.report_batch_saved(rows_done_num)
+            except Exception as e:
+                thread_errors.append(e)
+                stop_event.set()
+
+        reader_thread = threading.Thread(target=read_batches, daemon=True)
+        writer_thread = threading.Thread(target=write_batches, daemon=True)
+        reader_thread.start()
+        writer_thread.start()
+        try:
+            i = self.start_row // self.max_batch_len
+            while not stop_event.is_set():
                 # Проверка условия прерывания работы
-                if (self.is_running_flag is not None) and (not self.is_running_flag()):
-                    # Выход из цикла обработки
+                if not self.is_running():
                     break
-
+                sku_batch = read_queue.get()
+                if sku_batch is None:
+                    break
+                i += 1
                 # Сообщение о начале обработки батча
-                set_message_with_countdown("".join(['Обрабатывается батч №', str(i + 1)]), self.timer_start, self.set_msg_func)
-
-                # Загрузка батча
-                #   Процесс загрузки
-                sku_batch = self.read_batch(batch_start)
-                #   Сообщение о завершении загрузки и предобработке батчей
-                set_message_with_countdown('Батч загружен', self.timer_start, self.set_msg_func)
-            
-                # Процесс обработки
-                proc_data_batch = self.process_batch(sku_batch)
-                # Добавление исходных SKU в массив данных
-                proc_data_batch = [[sku_batch[j]] + proc_data_batch[j] for j in range(len(sku_batch))]
+                set_message_with_countdown("".join(['Обрабатывается батч №', str(i)]), self.timer_start, self.set_msg_func)
+                output_data = self.process_loaded_batch(sku_batch)
                 # Сообщение о окончании обработки батча
                 set_message_with_countdown('Батч обработан', self.timer_start, self.set_msg_func)
+                if not put_until_stopped(write_queue, output_data, stop_event):
+                    break
+        finally:
+            # Завершение записи уже обработанных батчей и остановка чтения
+            put_until_stopped(write_queue, None, stop_event)
+            writer_thread.join()
+            stop_event.set()
+            reader_thread.join()
+        if len(thread_errors) > 0:
+            raise thread_errors[0]
+
+    def is_running(self):
+        """
+        :return: False, если вычисления были остановлены через self.is_running_flag, иначе True
+        """
+        return (self.is_running_flag is None) or self.is_running_flag()
 
-                # Добавление обработанных данных в обработанный файл
-                #       Сообщение о начале записи обработанных данных
-                set_message_with_countdown('Сохранение полученных данных', self.timer_start, self.set_msg_func)
-                
-                #   Запись исходящих данных в обработанный файл
-                self.write_batch_to_csv_file(proc_data_batch)
+    def report_batch_saved(self, rows_done_num):
+        """
+        Обновление количества обработанных строк после записи батча, вывод сообщения и обновление progress bar
 
-                # Обновление количества обработанных строк
-                rows_done_num += self.max_batch_len
-                if rows_done_num > len(self.sku_reader):
-                    rows_done_num = len(self.sku_reader)
-                # Сообщение о завершении записи обработанных данных
-                set_message_with_countdown("".join([str(rows_done_num), '/', str(len(self.sku_reader)), ' строк обработано и сохранено в обработанный файл']), self.timer_start, self.set_msg_func)
+        :param rows_done_num: количество строк, обработанных до записанного батча
 
-                # Обновление project bar
-                self.pbar.set(rows_done_num)
+        :return: количество строк, обработанных с учетом записанного батча
+        """
+        rows_done_num += self.max_batch_len
+        if rows_done_num > len(self.sku_reader):
+            rows_done_num = len(self.sku_reader)
+        # Сообщение о завершении записи обработанных данных
+        set_message_with_countdown("".join([str(rows_done_num), '/', str(len(self.sku_reader)), ' строк обработано и сохранено в обработанный файл']), self.timer_start, self.set_msg_func)
+        # Обновление project bar
+        self.pbar.set(rows_done_num)
+        # Сохранение контрольной точки после записи батча
+        if self.checkpoint is not None:
+            self.checkpoint.save(rows_done_num)
+        return rows_done_num
+
+    def write_output_header(self, output_file_header):
+        """
+        Создание обработанного файла с заголовком output_file_header; при продолжении с контрольной точки файл уже содержит заголовок и записанные батчи и не создается заново
 
-            if (self.is_running_flag is None) or (self.is_running_flag()):
-                # Сообщение о корректном завершении обработки
-                set_message_with_countdown('Обработка SKU завершена, результаты сохранены в обработанный файл', self.timer_start, self.set_msg_func)
-            else:
-                # Сообщение об экстренной остановке работы
-                set_message_with_countdown('Обработка остановлена', self.timer_start, self.set_msg_func)
-        except Exception as e:
-            set_error_message(str(e), self.timer_start, self.set_msg_func)
+        :param output_file_header: пустой фрейм данных с названиями столбцов обработанного файла (pandas.DataFrame)
+        """
+        if self.resumed:
+            set_message_with_countdown("".join(['Обработанный файл "', self.writer.file_path, '" дополняется с контрольной точки']), self.timer_start, self.set_msg_func)
+            return
+        self.writer.write(output_file_header)
+        #   Сообщение о создании обработанного файла
+        set_message_with_countdown("".join(['Обработанный файл "', self.writer.file_path, '" создан']), self.timer_start, self.set_msg_func)
     
+    def report_dedup_stats(self):
+        """
+        Вывод статистики устранения повторяющихся SKU: сколько строк обработано на самом деле, сколько результатов получено по повторам внутри батчей и из кэша между батчами
+        """
+        stats = self.dedup_stats
+        set_message_with_tab(" ".join(['из', str(stats.rows_count), 'строк SKU обработано', str(stats.processed_count), 'уникальных;']), self.set_msg_func)
+        set_message_with_tab(" ".join(['повторов внутри батчей:', "".join([str(stats.batch_dup_count), ';'])]), self.set_msg_func)
+        if self.result_cache.max_size > 0:
+            set_message_with_tab(" ".join(['результатов из кэша между батчами:', "".join([str(stats.cache_hit_count), ';'])]), self.set_msg_func)
+        set_message_with_tab("".join(['доля строк без повторной обработки: ', str(round(stats.get_hit_rate() * 100, 1)), '%']), self.set_msg_func)
+
     def stop(self):
         set_message_with_countdown('Обработка останавливатся...', self.timer_start, self.set_msg_func)
 
@@ -195,7 +573,9 @@ class CategoryRecognizer(SKUProcessorInterface):
     категорий в csv файл по заданному пути. Поддерживает многопоточную обработку для ускорния вычислений. При инициализации в csv-файл output_data_path записываются исходные SKU и соответствующии им категории,
     определенные по идентификаторам из справочника category_directory, а также идентификаторы определяющую полученную категорию, если get_dec_id
     """
-    def __init__(self, input_data_path, sku_sheet_name, sku_col_name, output_data_path, category_directory, max_batch_len, get_dec_id, use_threads_count, set_msg_func, pbar, is_running_flag=None):
+    def __init__(self, input_data_path, sku_sheet_name, sku_col_name, output_data_path, category_directory, max_batch_len, get_dec_id, use_threads_count, set_msg_func, pbar, is_running_flag=None,
+                 use_aho_corasick=False, pipelined=False, pipeline_depth=2, workers_read_input=False, dedup_sku=False, result_cache_size=0, use_checkpoint=False, resume=False,
+                 cache_line_index=False):
         """
         :param input_data_path: путь к файлу, со строками SKU для обработки
         :param sku_sheet_name: название листа, содержащей строки SKU для обработки, если строка пустая, то берется первый лист в заданном файле
@@ -208,15 +588,35 @@ class CategoryRecognizer(SKUProcessorInterface):
         :param set_msg_func: функция вывода сообщения
         :param pbar: объект progress bar, содержащий функции reset, set
         :param is_running_flag: функция, возвращающая False, если вычисления были остановлены, по умолчанию None - при том вычисления не могут быть остановлены
+        :param use_aho_corasick: флаг, означающий, что идентификаторы ищутся в SKU за один проход автоматом Ахо-Корасик, а не перебором всех идентификаторов справочника (bool)
+        :param pipelined: флаг конвейерной обработки - чтение, обработка и запись батчей идут одновременно в разных потоках, по умолчанию False (bool)
+        :param pipeline_depth: максимальное количество батчей, ожидающих обработки или записи при конвейерной обработке (int)
+        :param workers_read_input: флаг чтения частей батчей из csv-файла самими процессами пула, по умолчанию False (bool)
+        :param dedup_sku: флаг обработки каждой уникальной строки SKU батча один раз, по умолчанию False (bool)
+        :param result_cache_size: максимальное количество результатов, хранимых между батчами при dedup_sku, по умолчанию 0 (int)
+        :param use_checkpoint: флаг сохранения контрольной точки после записи каждого батча, по умолчанию False (bool)
+        :param resume: флаг продолжения обработки с контрольной точки, по умолчанию False (bool)
+        :param cache_line_index: флаг хранения индекса строк обрабатываемого csv, txt-файла рядом с ним для повторных обработок того же файла, по умолчанию False (bool)
         """
-        # Функция обработки строк зависит от ожидаемых данных
+        # Функция обработки строк зависит от ожидаемых данных и способа поиска идентификаторов; части батча обрабатываются пакетными функциями справочника за один вызов
         if not get_dec_id:
             # Выводится только категория
-            proc_func = category_directory.identify_category_cython
+            if use_aho_corasick:
+                proc_func = category_directory.identify_category_aho_corasick
+            else:
+                proc_func = category_directory.identify_category_cython
+            proc_batch_func = partial(category_directory.identify_category_batch, use_aho_corasick=use_aho_corasick)
         else:
             # Выводится категория и идентификаторы, по которым алгоритм определил категорию
-            proc_func = category_directory.identify_category_and_dec_id_cython
-        super(CategoryRecognizer, self).__init__(input_data_path, sku_sheet_name, sku_col_name, output_data_path, proc_func, max_batch_len, use_threads_count, set_msg_func, pbar, is_running_flag)
+            if use_aho_corasick:
+                proc_func = category_directory.identify_category_and_dec_id_aho_corasick
+            else:
+                proc_func = category_directory.identify_category_and_dec_id_cython
+            proc_batch_func = partial(category_directory.identify_category_and_dec_id_batch, use_aho_corasick=use_aho_corasick)
+        super(CategoryRecognizer, self).__init__(input_data_path, sku_sheet_name, sku_col_name, output_data_path, proc_func, max_batch_len, use_threads_count, set_msg_func, pbar, is_running_flag,
+                                                 proc_batch_func, pipelined, pipeline_depth, workers_read_input, dedup_sku, result_cache_size,
+                                                 use_checkpoint, resume, hash_config('CategoryRecognizer', get_dec_id, category_directory.get_fingerprint()) if use_checkpoint or resume else '',
+                                                 cache_line_index)
 
         try:
             # Обработка
@@ -228,6 +628,8 @@ class CategoryRecognizer(SKUProcessorInterface):
                 id_output_add_msg = ''
             set_message_with_countdown("".join(['Распознование категорий по SKU', id_output_add_msg]), self.timer_start, set_msg_func)
             set_message_with_tab("".join(['из файла \"', input_data_path, '\";']), set_msg_func)
+            if use_aho_corasick:
+                set_message_with_tab('поиск идентификаторов автоматом Ахо-Корасик;', set_msg_func)
             if self.sku_reader.get_sku_excel_sheet() is not None:
                 set_message_with_tab("".join(['лист SKU: \"', self.sku_reader.get_sku_excel_sheet(), '\";']), self.set_msg_func)
             set_message_with_tab("".join(['столбец SKU: \"', self.sku_reader.get_sku_column_name(), '\";']), self.set_msg_func)
@@ -243,9 +645,7 @@ class CategoryRecognizer(SKUProcessorInterface):
             if get_dec_id:
                 dec_id_header = pd.DataFrame({'Главный идентификатор': [], 'Главный ограничивающий идентификатор': [], 'Дополнительный ограничивающий идентификатор': []})
                 output_file_header = pd.concat([output_file_header, dec_id_header], axis=1)
-            self.writer.write(output_file_header)
-            #   Сообщение о создании обработанного файла
-            set_message_with_countdown("".join(['Обработанный файл \"', output_data_path, '\" создан']), self.timer_start, self.set_msg_func)
+            self.write_output_header(output_file_header)
 
         except Exception as e:
             set_error_message(str(e), self.timer_start, self.set_msg_func)
@@ -259,7 +659,9 @@ class SKUCleaner(SKUProcessorInterface):
     Очистка SKU от лишней информации, характерной для любых случаев и приведенеи к более общему виду. Обрабатывает SKU из заданного файла по батчам заданного размера используя заданную функцию очистки clean_func.
     Поддерживает многопоточную обработку для ускорния вычислений. При инициализации в csv-файл output_data_path записываются исходные SKU и измененные по clean_func
     """
-    def __init__(self, input_data_path, sku_sheet_name, sku_col_name, output_data_path, max_batch_len, name_clean_func, use_threads_count, set_msg_func, pbar, is_running_flag=None):
+    def __init__(self, input_data_path, sku_sheet_name, sku_col_name, output_data_path, max_batch_len, name_clean_func, use_threads_count, set_msg_func, pbar, is_running_flag=None,
+                 pipelined=False, pipeline_depth=2, workers_read_input=False, dedup_sku=False, result_cache_size=0, use_checkpoint=False, resume=False,
+                 cache_line_index=False):
         """
         :param input_data_path: путь к файлу, со строками SKU для обработки
         :param sku_sheet_name: название листа, содержащей строки SKU для обработки, если строка пустая, то берется первый лист в заданном файле
@@ -271,11 +673,23 @@ class SKUCleaner(SKUProcessorInterface):
         :param set_msg_func: функция вывода сообщения (string)
         :param pbar: объект progress bar, содержащий функции reset, set
         :param is_running_flag: функция, возвращающая False, если вычисления были остановлены, по умолчанию None - при том вычисления не могут быть остановлены
+        :param pipelined: флаг конвейерной обработки - чтение, обработка и запись батчей идут одновременно в разных потоках, по умолчанию False (bool)
+        :param pipeline_depth: максимальное количество батчей, ожидающих обработки или записи при конвейерной обработке (int)
+        :param workers_read_input: флаг чтения частей батчей из csv-файла самими процессами пула, по умолчанию False (bool)
+        :param dedup_sku: флаг обработки каждой уникальной строки SKU батча один раз, по умолчанию False (bool)
+        :param result_cache_size: максимальное количество результатов, хранимых между батчами при dedup_sku, по умолчанию 0 (int)
+        :param use_checkpoint: флаг сохранения контрольной точки после записи каждого батча, по умолчанию False (bool)
+        :param resume: флаг продолжения обработки с контрольной точки, по умолчанию False (bool)
+        :param cache_line_index: флаг хранения индекса строк обрабатываемого csv, txt-файла рядом с ним для повторных обработок того же файла, по умолчанию False (bool)
         """
-        # Функция очистки SKU
+        # Функция очистки SKU; части батча очищаются за один вызов и возвращаются одним столбцом
         proc_func = ListWraper(CLEAR_PATTERNS_DICT[name_clean_func]).func_return_in_list
+        proc_batch_func = ColumnWraper(CLEAR_PATTERNS_DICT[name_clean_func]).func_return_column
 
-        super(SKUCleaner, self).__init__(input_data_path, sku_sheet_name, sku_col_name, output_data_path, proc_func, max_batch_len, use_threads_count, set_msg_func, pbar, is_running_flag)
+        super(SKUCleaner, self).__init__(input_data_path, sku_sheet_name, sku_col_name, output_data_path, proc_func, max_batch_len, use_threads_count, set_msg_func, pbar, is_running_flag,
+                                         proc_batch_func, pipelined=pipelined, pipeline_depth=pipeline_depth, workers_read_input=workers_read_input,
+                                         dedup_sku=dedup_sku, result_cache_size=result_cache_size, use_checkpoint=use_checkpoint, resume=resume,
+                                         config_hash=hash_config('SKUCleaner', name_clean_func) if use_checkpoint or resume else '', cache_line_index=cache_line_index)
 
         try:
             # Обработка
@@ -295,9 +709,7 @@ class SKUCleaner(SKUProcessorInterface):
             # Создание пустого обработанного файла, в который будут записываться результаты распознавания по батчам
             output_file_header = pd.DataFrame({'SKU': [], 'Очищенные SKU': []})
             #   Добавление в создаваемый файл столбцов для записи определяющих идентификаторов, если это необходимо
-            self.writer.write(output_file_header)
-            #   Сообщение о создании обработанного файла
-            set_message_with_countdown("".join(['Обработанный файл \"', output_data_path, '\" создан']), self.timer_start, self.set_msg_func)
+            self.write_output_header(output_file_header)
 
         except Exception as e:
             set_error_message(str(e), self.timer_start, self.set_msg_func)
@@ -309,14 +721,17 @@ class FeatureParser(SKUProcessorInterface):
     """
     Функция поиска значения характеристики в sku по заданному алгоритму
     """
-    def __init__(self, input_data_path, sku_sheet_name, sku_col_name, output_data_path, feature_name, feature_parser, max_batch_len, use_threads_count, remove_feature_check, pattern_check, set_msg_func, pbar, is_running_flag=None):
+    def __init__(self, input_data_path, sku_sheet_name, sku_col_name, output_data_path, feature_name, feature_parser, max_batch_len, use_threads_count, remove_feature_check, pattern_check, set_msg_func, pbar, is_running_flag=None,
+                 pipelined=False, pipeline_depth=2, workers_read_input=False, dedup_sku=False, result_cache_size=0, use_checkpoint=False, resume=False,
+                 cache_line_index=False):
         """
         :param input_data_path: путь к файлу, со строками SKU для обработки
         :param sku_sheet_name: название листа, содержащей строки SKU для обработки, если строка пустая, то берется первый лист в заданном файле
         :param sku_col_name: название столбца, содержащего строки SKU для обработки, если строка пустая, то берется первый столбец в заданном файле
         :param output_data_path: путь к файлу, в который будут выводиться результаты распознавания
-        :param feature_name: название искомой характеристики
-        :param feature_parser: объект, содержащий шаблоны поиска характеристики
+        :param feature_name: название искомой характеристики или список названий нескольких характеристик, которые ищутся за один проход по файлу
+        :param feature_parser: объект, содержащий шаблоны поиска характеристики (FeatureParser.FeatureParser), или, если задан список названий, шаблоны поиска всех этих
+        характеристик (FeatureParser.MultiFeatureParser)
         :param max_batch_len: максимальное количество строк SKU, содержащихся в одном обрабатываемом батче
         :param use_threads_count: количество потоков, использумых для обработки, если превышает максимально доступное оличество потоков, то применяетс максимально доступное количество (int)
         :param remove_feature_check: выводить SKU без найденной характеристики
@@ -324,25 +739,43 @@ class FeatureParser(SKUProcessorInterface):
         :param set_msg_func: функция вывода сообщения (string)
         :param pbar: объект progress bar, содержащий функции reset, set
         :param is_running_flag: функция, возвращающая False, если вычисления были остановлены, по умолчанию None - при том вычисления не могут быть остановлены
+        :param pipelined: флаг конвейерной обработки - чтение, обработка и запись батчей идут одновременно в разных потоках, по умолчанию False (bool)
+        :param pipeline_depth: максимальное количество батчей, ожидающих обработки или записи при конвейерной обработке (int)
+        :param workers_read_input: флаг чтения частей батчей из csv-файла самими процессами пула, по умолчанию False (bool)
+        :param dedup_sku: флаг обработки каждой уникальной строки SKU батча один раз, по умолчанию False (bool)
+        :param result_cache_size: максимальное количество результатов, хранимых между батчами при dedup_sku, по умолчанию 0 (int)
+        :param use_checkpoint: флаг сохранения контрольной точки после записи каждого батча, по умолчанию False (bool)
+        :param resume: флаг продолжения обработки с контрольной точки, по умолчанию False (bool)
+        :param cache_line_index: флаг хранения индекса строк обрабатываемого csv, txt-файла рядом с ним для повторных обработок того же файла, по умолчанию False (bool)
         """
         # Выбор функции
         if remove_feature_check:
             if pattern_check:
-                parse_func = feature_parser.parse_and_remove_and_pattern
+                parse_func_name = "parse_and_remove_and_pattern"
             else:
-                parse_func = feature_parser.parse_and_remove
+                parse_func_name = "parse_and_remove"
         else:
             if pattern_check:
-                parse_func = feature_parser.parse_and_pattern
+                parse_func_name = "parse_and_pattern"
             else:
-                parse_func = feature_parser.parse
+                parse_func_name = "parse"
+        parse_func = getattr(feature_parser, parse_func_name)
+        # Пакетная функция: все SKU части батча приводятся к нижнему регистру до начала поиска
+        proc_batch_func = partial(feature_parser.parse_many, parse_func_name=parse_func_name)
     
-        super(FeatureParser, self).__init__(input_data_path, sku_sheet_name, sku_col_name, output_data_path, parse_func, max_batch_len, use_threads_count, set_msg_func, pbar, is_running_flag)
+        super(FeatureParser, self).__init__(input_data_path, sku_sheet_name, sku_col_name, output_data_path, parse_func, max_batch_len, use_threads_count, set_msg_func, pbar, is_running_flag,
+                                         proc_batch_func, pipelined=pipelined, pipeline_depth=pipeline_depth, workers_read_input=workers_read_input,
+                                         dedup_sku=dedup_sku, result_cache_size=result_cache_size, use_checkpoint=use_checkpoint, resume=resume,
+                                         config_hash=hash_config('FeatureParser', feature_name, remove_feature_check, pattern_check, feature_parser.get_fingerprint())
+                                         if use_checkpoint or resume else '', cache_line_index=cache_line_index)
 
         try:
             # Обработка
             #   Сообщение о начале обработки
-            set_message_with_countdown(" ".join(['Поиск характеристики', feature_name]), self.timer_start, set_msg_func)
+            if isinstance(feature_name, list):
+                set_message_with_countdown(" ".join(['Поиск характеристик', ", ".join(feature_name)]), self.timer_start, set_msg_func)
+            else:
+                set_message_with_countdown(" ".join(['Поиск характеристики', feature_name]), self.timer_start, set_msg_func)
             set_message_with_tab("".join(['в строках файла \"', input_data_path, '\";']), set_msg_func)
             if self.sku_reader.get_sku_excel_sheet() is not None:
                 set_message_with_tab("".join(['лист SKU: \"', self.sku_reader.get_sku_excel_sheet(), '\";']), self.set_msg_func)
@@ -354,21 +787,63 @@ class FeatureParser(SKUProcessorInterface):
             set_message_with_tab("".join(['результат обработки будет сохранен в файл: \"', output_data_path, '\"']), self.set_msg_func)
 
             # Создание пустого обработанного файла, в который будут записываться результаты распознавания по батчам
-            output_file_header = pd.DataFrame({'SKU': [], feature_name: []})
-            #   Добавление в создаваемый файл столбца для записи SKU без найденной характеристики 
-            if remove_feature_check:
-                dec_id_header = pd.DataFrame({'SKU без найденной характеристики': []})
-                output_file_header = pd.concat([output_file_header, dec_id_header], axis=1)
-            #   Добавление в создаваемый файл столбца для записи названий шаблонов 
-            if pattern_check:
-                pat_header = pd.DataFrame({'Шаблон': []})
-                output_file_header = pd.concat([output_file_header, pat_header], axis=1)
+            output_file_header = pd.DataFrame({'SKU': []})
+            #   Столбцы каждой характеристики идут подряд; если характеристик несколько, то к названиям дополнительных столбцов добавляется название характеристики
+            for header_feature_name in (feature_name if isinstance(feature_name, list) else [feature_name]):
+                feature_header = pd.DataFrame({header_feature_name: []})
+                output_file_header = pd.concat([output_file_header, feature_header], axis=1)
+                #   Добавление в создаваемый файл столбца для записи SKU без найденной характеристики 
+                if remove_feature_check:
+                    if isinstance(feature_name, list):
+                        dec_id_header = pd.DataFrame({" ".join(['SKU без найденной характеристики', header_feature_name]): []})
+                    else:
+                        dec_id_header = pd.DataFrame({'SKU без найденной характеристики': []})
+                    output_file_header = pd.concat([output_file_header, dec_id_header], axis=1)
+                #   Добавление в создаваемый файл столбца для записи названий шаблонов 
+                if pattern_check:
+                    if isinstance(feature_name, list):
+                        pat_header = pd.DataFrame({" ".join(['Шаблон', header_feature_name]): []})
+                    else:
+                        pat_header = pd.DataFrame({'Шаблон': []})
+                    output_file_header = pd.concat([output_file_header, pat_header], axis=1)
             #   Добавление в создаваемый файл столбцов для записи определяющих идентификаторов, если это необходимо
-            self.writer.write(output_file_header)
-            #   Сообщение о создании обработанного файла
-            set_message_with_countdown("".join(['Обработанный файл \"', output_data_path, '\" создан']), self.timer_start, self.set_msg_func)
+            self.write_output_header(output_file_header)
         except Exception as e:
             set_error_message(str(e), self.timer_start, self.set_msg_func)
         
         # Основные многопоточные вычисления
-        self.process()
\ No newline at end of file
+        self.process()
+
+
+def put_until_stopped(data_queue, item, stop_event):
+    """
+    Помещение item в ограниченную очередь data_queue; ожидание свободного места прерывается, если выставлен stop_event
+
+    :param data_queue: очередь (queue.Queue)
+    :param item: помещаемый элемент
+    :param stop_event: сигнал о прекращении работы (threading.Event)
+
+    :return: True, если элемент помещен в очередь, False, если ожидание прервано
+    """
+    while True:
+        try:
+            data_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            if stop_event.is_set():
+                return False
+
+def merge_chunk_columns(processed_chunks):
+    """
+    Объединение столбцов результатов частей батча в исходном порядке. Количество столбцов определяется по самой широкой части: у пустой части (например, если все ее строки
+    пропущены при чтении) столбцов результатов может не быть
+
+    :param processed_chunks: результаты частей батча, каждый - список столбцов (list)
+
+    :return: список объединенных столбцов (list)
+    """
+    columns = [[] for _ in range(max(map(len, processed_chunks), default=0))]
+    for chunk_columns in processed_chunks:
+        for column, chunk_column in zip(columns, chunk_columns):
+            column.extend(chunk_column)
+    return columns
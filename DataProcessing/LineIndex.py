@@ -0,0 +1,115 @@
+"""
+Индекс строк текстового файла: массив байтовых смещений начал строк. Позволяет за O(1) находить байтовый диапазон любых подряд идущих строк файла.
+Индекс составляется, только если строки файла совпадают с записями csv-файла
+"""
+import numpy as np
+import os
+
+# Размер блока, которым файл читается при поиске переносов строк
+SCAN_BLOCK_SIZE = 1 << 24
+# Окончание имени файла, в котором индекс строк хранится рядом с индексируемым файлом
+INDEX_FILE_SUFFIX = '.lines.npz'
+
+
+def is_line_indexable_encoding(encoding):
+    """
+    Проверка того, что в кодировке перенос строки кодируется одним байтом \\n, то есть индекс строк файла можно составить поиском этого байта
+
+    :param encoding: обозначение кодировки, None - кодировка по умолчанию UTF-8 (str)
+
+    :return: True, если по файлу в кодировке encoding можно составить индекс строк (bool)
+    """
+    encoding = encoding or 'utf-8'
+    return 'a\n'.encode(encoding) == b"".join(['a'.encode(encoding), b'\n'])
+
+
+def scan_line_offsets(data_path):
+    """
+    Поиск байтовых смещений начал строк файла за один проход по нему в двоичном режиме. Подходит для кодировок, в которых перенос строки кодируется байтом \\n (ASCII, UTF-8, cp1251 и т.п.).
+    Строки файла не совпадают с записями csv-файла, если в нем есть поле, начинающееся с кавычки (такое поле может содержать перенос строки), или перенос строки одним символом \\r;
+    тогда индекс не составляется
+
+    :param data_path: путь к файлу (str)
+
+    :return: смещения начал всех строк файла и, последним элементом, размер файла (np.ndarray, uint64) или None, если строки файла не совпадают с записями
+    """
+    line_starts = [np.zeros(1, dtype=np.uint64)]
+    file_size = 0
+    # Последний байт предыдущего блока; начало файла - как начало строки
+    prev_byte = 10
+    with open(data_path, 'rb') as f:
+        while True:
+            block = f.read(SCAN_BLOCK_SIZE)
+            if len(block) == 0:
+                break
+            block_bytes = np.frombuffer(block, dtype=np.uint8)
+            if not is_record_aligned_block(block_bytes, prev_byte):
+                return None
+            prev_byte = int(block_bytes[-1])
+            newline_positions = np.flatnonzero(block_bytes == 10)
+            line_starts.append((newline_positions + (file_size + 1)).astype(np.uint64))
+            file_size += len(block)
+    # Перенос строки одним символом \r в конце файла
+    if prev_byte == 13:
+        return None
+    offsets = np.concatenate(line_starts)
+    # После переноса в конце файла новая строка не начинается
+    if offsets[-1] == file_size:
+        offsets = offsets[:-1]
+    return np.append(offsets, np.uint64(file_size))
+
+
+def is_record_aligned_block(block_bytes, prev_byte):
+    """
+    Проверка того, что в блоке файла нет поля, начинающегося с кавычки (после табуляции или в начале строки), и переноса строки одним символом \\r
+
+    :param block_bytes: байты блока (np.ndarray, uint8)
+    :param prev_byte: последний байт предыдущего блока, 10 - для первого блока (int)
+
+    :return: True, если в блоке переносы строк разделяют записи csv-файла (bool)
+    """
+    # Байты, предшествующие позициям positions; для начала блока - последний байт предыдущего блока
+    preceding_bytes = lambda positions: np.where(positions > 0, block_bytes[np.maximum(positions - 1, 0)], prev_byte)
+    quote_positions = np.flatnonzero(block_bytes == 34)
+    if len(quote_positions) > 0 and np.isin(preceding_bytes(quote_positions), (9, 10, 13)).any():
+        return False
+    # \r, за которым в блоке не следует \n; \r в конце блока проверяется по первому байту следующего блока
+    cr_positions = np.flatnonzero(block_bytes[:-1] == 13)
+    if len(cr_positions) > 0 and (block_bytes[cr_positions + 1] != 10).any():
+        return False
+    return not (prev_byte == 13 and block_bytes[0] != 10)
+
+
+def load_line_offsets(data_path, use_cache=False):
+    """
+    Получение индекса строк файла. Если use_cache, то индекс читается из файла data_path + INDEX_FILE_SUFFIX, если тот составлен для файла того же размера и времени изменения,
+    иначе индекс составляется заново и сохраняется туда же (если сохранение невозможно, то индекс просто не сохраняется)
+
+    :param data_path: путь к файлу (str)
+    :param use_cache: флаг хранения индекса рядом с файлом, по умолчанию False (bool)
+
+    :return: смещения начал всех строк файла и, последним элементом, размер файла (np.ndarray, uint64) или None, если строки файла не совпадают с записями csv-файла
+    """
+    if not use_cache:
+        return scan_line_offsets(data_path)
+    stat = os.stat(data_path)
+    index_path = "".join([data_path, INDEX_FILE_SUFFIX])
+    try:
+        with np.load(index_path) as index_file:
+            # Индекс без отметки record_aligned составлен без проверки совпадения строк с записями и составляется заново
+            if int(index_file['file_size']) == stat.st_size and int(index_file['file_mtime_ns']) == stat.st_mtime_ns and bool(index_file['record_aligned']):
+                return index_file['offsets']
+    except (OSError, KeyError, ValueError):
+        pass
+    offsets = scan_line_offsets(data_path)
+    if offsets is None:
+        return None
+    try:
+        # Запись во временный файл и его переименование, чтобы не оставить недописанный индекс
+        tmp_index_path = "".join([index_path, '.tmp'])
+        with open(tmp_index_path, 'wb') as f:
+            np.savez(f, offsets=offsets, file_size=np.uint64(stat.st_size), file_mtime_ns=np.int64(stat.st_mtime_ns), record_aligned=np.bool_(True))
+        os.replace(tmp_index_path, index_path)
+    except OSError:
+        pass
+    return offsets
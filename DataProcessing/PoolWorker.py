@@ -0,0 +1,59 @@
+"""
+Функции, исполняемые в процессах пула обработки SKU. Функция обработки (вместе со справочником категорий или алгоритмом поиска характеристики, методом которого она является)
+передается процессу один раз при его создании, а задачи пула содержат только строки SKU или байтовые диапазоны файла, из которых процесс сам читает строки SKU
+"""
+from DataProcessing.SKUPreprocessing import read_csv_byte_range
+
+# Функция обработки, переданная процессу пула при его создании
+worker_proc_func = None
+# Флаг того, что функция обработки обрабатывает сразу список строк SKU и возвращает список столбцов
+worker_proc_batch = False
+# Флаг устранения повторов в прочитанных процессом строках SKU
+worker_dedup = False
+
+
+def init_pool_worker(proc_func, proc_batch=False, dedup=False):
+    """
+    Инициализация процесса пула: запоминание функции обработки
+
+    :param proc_func: функция обработки строки SKU или списка строк SKU
+    :param proc_batch: флаг того, что proc_func обрабатывает список строк SKU и возвращает список столбцов (bool)
+    :param dedup: флаг устранения повторов в строках SKU, которые процесс читает сам (bool)
+    """
+    global worker_proc_func, worker_proc_batch, worker_dedup
+    worker_proc_func = proc_func
+    worker_proc_batch = proc_batch
+    worker_dedup = dedup
+
+
+def call_pool_worker_func(data):
+    """
+    Применение функции обработки, переданной процессу при его создании, к данным задачи
+
+    :param data: строка SKU или список строк SKU
+
+    :return: результат функции обработки
+    """
+    return worker_proc_func(data)
+
+
+def read_and_call_pool_worker_func(byte_range_task):
+    """
+    Чтение строк SKU из байтового диапазона файла и их обработка функцией, переданной процессу при его создании
+
+    :param byte_range_task: параметры функции read_csv_byte_range (tuple)
+
+    :return: исходные SKU и результаты обработки: список столбцов, первый из которых - SKU, если функция обработки пакетная, иначе список строк, первый элемент которых - SKU
+    """
+    sku_rows = read_csv_byte_range(*byte_range_task)
+    if worker_dedup:
+        # Обработка только уникальных строк и раскладка результатов по всем строкам
+        unique_rows = list(dict.fromkeys(sku_rows))
+        if worker_proc_batch:
+            sku_results = dict(zip(unique_rows, zip(*worker_proc_func(unique_rows))))
+            return [sku_rows] + [list(column) for column in zip(*[sku_results[sku] for sku in sku_rows])]
+        sku_results = {sku: worker_proc_func(sku) for sku in unique_rows}
+        return [[sku] + sku_results[sku] for sku in sku_rows]
+    if worker_proc_batch:
+        return [sku_rows] + worker_proc_func(sku_rows)
+    return [[sku] + worker_proc_func(sku) for sku in sku_rows]
@@ -0,0 +1,95 @@
+"""
+Устранение повторяющихся SKU перед обработкой: каждая уникальная строка SKU батча обрабатывается один раз, результаты раскладываются по исходным строкам батча.
+Результаты могут храниться между батчами в ограниченном кэше, из которого давно не использованные строки вытесняются первыми
+"""
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Кэш результатов обработки строк SKU ограниченного размера с вытеснением давно не использованных строк (LRU). Ключ - исходная строка SKU
+    """
+    def __init__(self, max_size):
+        """
+        :param max_size: максимальное количество хранимых результатов, 0 - результаты не хранятся (int)
+        """
+        self.max_size = max_size
+        self.results = OrderedDict()
+
+    def __len__(self):
+        """
+        Количество хранимых результатов
+        """
+        return len(self.results)
+
+    def get(self, sku):
+        """
+        Получение результата обработки строки sku; строка становится последней в очереди вытеснения
+
+        :param sku: строка SKU
+
+        :return: результат обработки sku или None, если его нет в кэше
+        """
+        result = self.results.get(sku)
+        if result is not None:
+            self.results.move_to_end(sku)
+        return result
+
+    def put(self, sku, result):
+        """
+        Сохранение результата обработки строки sku с вытеснением давно не использованных результатов, если размер кэша превышен
+
+        :param sku: строка SKU
+        :param result: результат обработки sku (list)
+        """
+        if self.max_size <= 0:
+            return
+        self.results[sku] = result
+        self.results.move_to_end(sku)
+        while len(self.results) > self.max_size:
+            self.results.popitem(last=False)
+
+
+class DedupStats:
+    """
+    Статистика устранения повторов: количество строк SKU, повторов внутри батчей, результатов, взятых из кэша, и строк, обработанных на самом деле
+    """
+    def __init__(self):
+        self.rows_count = 0
+        self.batch_dup_count = 0
+        self.cache_hit_count = 0
+        self.processed_count = 0
+
+    def get_hit_rate(self):
+        """
+        :return: доля строк SKU, результат для которых получен без обработки (float)
+        """
+        if self.rows_count == 0:
+            return 0.
+        return (self.batch_dup_count + self.cache_hit_count) / self.rows_count
+
+
+def dedup_sku_rows(sku_rows, result_cache, stats):
+    """
+    Отбор строк SKU, которые нужно обработать: уникальные строки батча, результатов для которых нет в кэше result_cache
+
+    :param sku_rows: строки SKU батча (list)
+    :param result_cache: кэш результатов между батчами (ResultCache)
+    :param stats: статистика устранения повторов, дополняется по батчу (DedupStats)
+
+    :return: словарь уже известных результатов по строкам SKU (dict) и список строк SKU, которые нужно обработать, в порядке их первого появления (list)
+    """
+    known_results = {}
+    unique_rows = list(dict.fromkeys(sku_rows))
+    new_rows = []
+    for sku in unique_rows:
+        result = result_cache.get(sku)
+        if result is None:
+            new_rows.append(sku)
+        else:
+            known_results[sku] = result
+    stats.rows_count += len(sku_rows)
+    stats.batch_dup_count += len(sku_rows) - len(unique_rows)
+    stats.cache_hit_count += len(known_results)
+    stats.processed_count += len(new_rows)
+    return known_results, new_rows
@@ -1,20 +1,28 @@
-import pandas as pd
+# pandas, chardet, openpyxl и индекс строк (numpy) импортируются в функциях чтения файлов: функции очистки и предобработки SKU, которые нужны процессам пула,
+# импортируются без них
+import io
 import json
 import os
-import chardet
 import re
 
+from itertools import islice
+
 
 class SKUReaderCSV:
     """
-    Ридер и предобработчик SKU. Читает строки SKU из заданного csv-файла и предобрабатывает их для дальнейшего распозавания категорий
+    Ридер и предобработчик SKU. Читает строки SKU из заданного csv-файла и предобрабатывает их для дальнейшего распозавания категорий.
+    Если перенос строки в кодировке файла - байт \n и строки файла совпадают с записями (нет полей в кавычках, которые могут содержать перенос строки, и переносов строки одним
+    символом \r), то по файлу составляется индекс строк (байтовые смещения их начал) и каждый батч читается из своего байтового диапазона файла.
+    Иначе файл читается последовательно через открытый итератор по частям. В обоих случаях при чтении батчей подряд каждая строка файла разбирается один раз
     """
-    def __init__(self, data_path, sku_col_name=None, encoding=None):
+    def __init__(self, data_path, sku_col_name=None, encoding=None, chunk_len=10000, cache_line_index=False):
         """
         :param data_path: путь к читаемому файлу csv, txt содержащему SKU для обработки (str)
         :param sku_col_name: имя столбца файла по пути data_path, содержащему SKU для обработки, если подается пустое название столбца с SKU, то используется первая строка заданного
         файла (str)
         :param encoding: обозначение кодировки, использующейся в csv, txt-файле (str)
+        :param chunk_len: количество строк, разбираемых итератором по файлу за один раз (int)
+        :param cache_line_index: флаг хранения индекса строк рядом с читаемым файлом (файл <data_path>.lines.npz) для повторных чтений того же файла, по умолчанию False (bool)
         """
         self.data_path = data_path
         self.sku_col = sku_col_name
@@ -24,11 +32,28 @@ class SKUReaderCSV:
         else:
             self.sku_col = sku_col_name
         self.encoding = encoding
-        # Вычисление  длины читаемого файла
-        with open(self.data_path, 'r', encoding=encoding) as f:
-            for rows_count, line in enumerate(f):
-                pass
-        self.rows_count = rows_count
+        from DataProcessing.LineIndex import is_line_indexable_encoding, load_line_offsets
+
+        self.line_offsets = None
+        if is_line_indexable_encoding(encoding):
+            # Индекс строк: смещения начал строк файла (первая - заголовок) и размер файла; None, если строки файла не совпадают с записями
+            self.line_offsets = load_line_offsets(self.data_path, cache_line_index)
+        if self.line_offsets is not None:
+            self.rows_count = max(len(self.line_offsets) - 2, 0)
+        else:
+            # Вычисление  длины читаемого файла
+            with open(self.data_path, 'r', encoding=encoding) as f:
+                for rows_count, line in enumerate(f):
+                    pass
+            self.rows_count = rows_count
+        self.chunk_len = chunk_len
+        # Итератор по частям файла, открывается при первом чтении
+        self.chunks = None
+        # Номер строки файла (не считая заголовка), с которой начинается еще не прочитанная часть файла
+        self.cursor = 0
+        # Разобранные, но еще не прочитанные строки файла и позиция первой из них
+        self.buffer = []
+        self.buffer_pos = 0
 
     def __len__(self):
         """
@@ -39,19 +64,102 @@ class SKUReaderCSV:
     def read(self, start, rows_count):
         """
         Чтение rows_count строк SKU из csv-файла по пути self.data_path, колонки self.rows_col_name с заменой нестандартного символа переноса строки на \n, с кодировкой self.encoding, начиная со строки под
-        номером batch_start, не считая заголовка, удаление пустых строк
+        номером batch_start, не считая заголовка, удаление пустых строк.
+        Если есть индекс строк, то читается только байтовый диапазон батча. Иначе чтение продолжается с того места файла, где закончилось предыдущее; если start меньше него,
+        то файл читается заново с начала
         
         :param start: номер строки, с которой начинается читаемый батч, не считая заголовка (str)
         :param rows_count: количество строк, читаемых из файла начиная со start (str)
 
         :return: rows_count строк из файла из csv-файла self.file_path, колонки self.rows_col_name
         """
-        return pd.read_csv(self.data_path, usecols=[self.sku_col], skiprows=range(1, start + 1), nrows=rows_count, sep='\t', dtype='str', encoding=self.encoding, skip_blank_lines=False, keep_default_na=False, on_bad_lines='skip').replace(to_replace=r'\r\n', value ='\n', regex=True).dropna().squeeze(axis=1).values.tolist()
+        if self.line_offsets is not None:
+            return read_csv_byte_range(*self.get_byte_range_task(start, rows_count))
+        if self.chunks is None or start < self.cursor:
+            self.open_chunks()
+        # Пропуск строк до start
+        self.take_rows(start - self.cursor)
+        return [sku for sku in self.take_rows(rows_count) if isinstance(sku, str)]
+
+    def get_byte_range(self, start, rows_count):
+        """
+        Байтовый диапазон файла, содержащий rows_count строк, начиная со строки под номером start, не считая заголовка. Требует индекса строк
+
+        :param start: номер первой строки диапазона, не считая заголовка (int)
+        :param rows_count: количество строк в диапазоне (int)
+
+        :return: смещения начала и конца диапазона (tuple of int)
+        """
+        last_line = len(self.line_offsets) - 1
+        return int(self.line_offsets[min(start + 1, last_line)]), int(self.line_offsets[min(start + rows_count + 1, last_line)])
+
+    def get_byte_range_task(self, start, rows_count):
+        """
+        Параметры чтения rows_count строк, начиная со строки под номером start, не считая заголовка, функцией read_csv_byte_range, например, в другом процессе. Требует индекса строк
+
+        :param start: номер первой строки, не считая заголовка (int)
+        :param rows_count: количество строк (int)
+
+        :return: параметры функции read_csv_byte_range (tuple)
+        """
+        byte_start, byte_end = self.get_byte_range(start, rows_count)
+        return (self.data_path, self.get_header_end(), byte_start, byte_end, self.sku_col, self.encoding)
+
+    def get_header_end(self):
+        """
+        :return: смещение конца строки заголовка файла (int). Требует индекса строк
+        """
+        return int(self.line_offsets[min(1, len(self.line_offsets) - 1)])
+
+    def open_chunks(self):
+        """
+        Открытие итератора по частям файла с его начала
+        """
+        import pandas as pd
+
+        self.close()
+        self.chunks = pd.read_csv(self.data_path, usecols=[self.sku_col], chunksize=self.chunk_len, sep='\t', dtype='str', encoding=self.encoding, skip_blank_lines=False, keep_default_na=False, on_bad_lines='skip')
+        self.cursor = 0
+        self.buffer = []
+        self.buffer_pos = 0
+
+    def take_rows(self, rows_count):
+        """
+        Взятие rows_count следующих строк файла из итератора по частям файла
+
+        :param rows_count: количество строк (int)
+
+        :return: строки SKU, пропущенные значения - NaN (list)
+        """
+        rows = []
+        while len(rows) < rows_count:
+            if self.buffer_pos >= len(self.buffer):
+                # Разбор следующей части файла
+                chunk = next(self.chunks, None)
+                if chunk is None:
+                    break
+                self.buffer = chunk.replace(to_replace=r'\r\n', value ='\n', regex=True).squeeze(axis=1).values.tolist()
+                self.buffer_pos = 0
+            taken_rows = self.buffer[self.buffer_pos : self.buffer_pos + rows_count - len(rows)]
+            self.buffer_pos += len(taken_rows)
+            rows.extend(taken_rows)
+        self.cursor += len(rows)
+        return rows
+
+    def close(self):
+        """
+        Закрытие итератора по частям файла
+        """
+        if self.chunks is not None:
+            self.chunks.close()
+            self.chunks = None
 
     def get_sku_column_name(self):
         """
         :return: название колонки с SKU читаемого файла
         """
+        import pandas as pd
+
         return pd.read_csv(self.data_path, usecols=[self.sku_col], nrows=0, sep='\t', dtype='str', encoding=self.encoding, on_bad_lines='skip').dropna().columns[0]
     
     def get_sku_excel_sheet(self):
@@ -61,16 +169,46 @@ class SKUReaderCSV:
         return None
 
 
+def read_csv_byte_range(data_path, header_end, byte_start, byte_end, sku_col, encoding):
+    """
+    Чтение строк SKU из байтового диапазона csv-файла с заменой нестандартного символа переноса строки на \n, удаление пустых строк.
+    Диапазон разбирается вместе с заголовком файла, поэтому результат тот же, что и при чтении этих строк из всего файла. Диапазон должен начинаться и заканчиваться на границах строк файла
+
+    :param data_path: путь к csv-файлу (str)
+    :param header_end: смещение конца строки заголовка (int)
+    :param byte_start: смещение начала диапазона (int)
+    :param byte_end: смещение конца диапазона (int)
+    :param sku_col: название или номер столбца с SKU (str или int)
+    :param encoding: обозначение кодировки, использующейся в csv-файле (str)
+
+    :return: строки SKU из диапазона (list)
+    """
+    import pandas as pd
+
+    if byte_end <= byte_start:
+        return []
+    with open(data_path, 'rb') as f:
+        header = f.read(header_end)
+        f.seek(byte_start)
+        data = f.read(byte_end - byte_start)
+    return pd.read_csv(io.BytesIO(b"".join([header, data])), usecols=[sku_col], sep='\t', dtype='str', encoding=encoding, skip_blank_lines=False, keep_default_na=False, on_bad_lines='skip').replace(to_replace=r'\r\n', value ='\n', regex=True).dropna().squeeze(axis=1).values.tolist()
+
+
 class SKUReaderExcel:
     """
     Ридер и предобработчик SKU. Читает строки SKU из заданного  excel-файла и предобрабатывает их для дальнейшего распозавания категорий. Предок класса SKUReader
     """
+    # Индекс строк не составляется, строки excel-файла не читаются по байтовым диапазонам
+    line_offsets = None
+
     def __init__(self, data_path, sku_col_name=None, sku_sheet_name=None):
         """
         :param data_path: путь к читаемому файлу csv, txt, excel, содержащему SKU для обработки (str)
         :param sku_col_name: имя столбца файла по пути data_path, содержащему SKU для обработки; если подается пустое название столбца с SKU, то используется первая строка заданного файла (str)
         :param sku_sheet_name: название листа читаемого excel-файла, содержащего SKU; если подается пустое название листа с SKU, то используется первый лист заданного файла (str)
         """
+        import pandas as pd
+
         # Чтение excel-файла по заданному пути
         ex_file = pd.ExcelFile(data_path)
 
@@ -107,7 +245,115 @@ class SKUReaderExcel:
         :return: self.batch_len строк из excel-файла self.file_path, листа self.sheet_name, колонки self.rows_col_name
         """
         return self.data[start : start + rows_count]
+
+    def close(self):
+        """
+        Ничего не делает, так как данные excel-файла уже прочитаны целиком
+        """
+        pass
+    
+    def get_sku_column_name(self):
+        """
+        :return: название столбца с SKU читаемого файла
+        """
+        return self.column_name
     
+    def get_sku_excel_sheet(self):
+        """
+        :return: название листа с SKU читаемого файла
+        """
+        return self.sku_sheet_name
+
+class SKUReaderExcelStreaming:
+    """
+    Ридер и предобработчик SKU. Читает строки SKU из заданного excel-файла формата xlsx, xlsm потоково (openpyxl в режиме read_only): строки листа разбираются по мере чтения батчей,
+    поэтому память пропорциональна размеру батча; при создании ридера лист один раз просматривается для подсчета строк. Батчи эффективно читаются по порядку; при чтении батча,
+    предшествующего уже прочитанному, лист читается заново с начала
+    """
+    # Индекс строк не составляется, строки excel-файла не читаются по байтовым диапазонам
+    line_offsets = None
+
+    def __init__(self, data_path, sku_col_name=None, sku_sheet_name=None):
+        """
+        :param data_path: путь к читаемому excel-файлу формата xlsx, xlsm, содержащему SKU для обработки (str)
+        :param sku_col_name: имя столбца файла по пути data_path, содержащему SKU для обработки; если подается пустое название столбца с SKU, то используется первая строка заданного файла (str)
+        :param sku_sheet_name: название листа читаемого excel-файла, содержащего SKU; если подается пустое название листа с SKU, то используется первый лист заданного файла (str)
+        """
+        self.data_path = data_path
+        # Открытая книга и итератор по значениям SKU листа, открываются при первом чтении
+        self.workbook = None
+        self.sku_values = None
+        # Номер строки листа (не считая заголовка), с которой начинается еще не прочитанная часть листа
+        self.cursor = 0
+
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(data_path, read_only=True)
+        try:
+            # Если подается пустое название читаемого листа excel-файла, то используется первый лист заданного файла
+            if len(sku_sheet_name) == 0 or sku_sheet_name is None:
+                self.sku_sheet_name = workbook.sheetnames[0]
+            else:
+                self.sku_sheet_name = sku_sheet_name
+            sheet = workbook[self.sku_sheet_name]
+            # Названия столбцов - значения первой строки листа
+            header = [convert_excel_value(value) for value in next(sheet.iter_rows(max_row=1, values_only=True), ())]
+            # Если подается пустое название столбца с SKU, то используется первая строка заданного файла, заданного листа
+            if len(sku_col_name) == 0 or sku_col_name is None:
+                self.sku_col_pos = 0
+            elif sku_col_name in header:
+                self.sku_col_pos = header.index(sku_col_name)
+            else:
+                raise Exception("".join(['На листе \"', self.sku_sheet_name, '\" нет столбца \"', sku_col_name, '\"']))
+            self.column_name = header[self.sku_col_pos] if self.sku_col_pos < len(header) else ''
+            # Количество строк листа без пустых строк в конце: размеры листа, записанные в файле, включают отформатированные пустые строки
+            self.rows_count = sum(1 for _ in iter_excel_sku_values(sheet.iter_rows(min_row=2, values_only=True), self.sku_col_pos))
+        finally:
+            workbook.close()
+
+    def __len__(self):
+        """
+        Количество строк читаемого листа, не считая заголовка
+        """
+        return self.rows_count
+
+    def read(self, start, rows_count):
+        """
+        Чтение rows_count строк SKU с листа self.sku_sheet_name, начиная со строки под номером start, не считая заголовка
+
+        :param start: номер строки, с которой начинается читаемый батч, не считая заголовка (str)
+        :param rows_count: количество строк, читаемых из файла начиная со start (str)
+
+        :return: rows_count строк SKU (list)
+        """
+        if self.sku_values is None or start < self.cursor:
+            self.open_sheet()
+        # Пропуск строк до start
+        self.cursor += sum(1 for _ in islice(self.sku_values, start - self.cursor))
+        sku_rows = list(islice(self.sku_values, rows_count))
+        self.cursor += len(sku_rows)
+        return sku_rows
+
+    def open_sheet(self):
+        """
+        Открытие книги и итератора по значениям SKU листа с его начала
+        """
+        self.close()
+        import openpyxl
+
+        self.workbook = openpyxl.load_workbook(self.data_path, read_only=True)
+        self.sku_values = iter_excel_sku_values(self.workbook[self.sku_sheet_name].iter_rows(min_row=2, values_only=True), self.sku_col_pos)
+        self.cursor = 0
+
+    def close(self):
+        """
+        Закрытие книги
+        """
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
+            self.sku_values = None
+
     def get_sku_column_name(self):
         """
         :return: название столбца с SKU читаемого файла
@@ -120,6 +366,43 @@ class SKUReaderExcel:
         """
         return self.sku_sheet_name
 
+
+def convert_excel_value(value):
+    """
+    Приведение значения ячейки excel-файла к строке так же, как при чтении файла pandas с dtype='str' и keep_default_na=False
+
+    :param value: значение ячейки, прочитанное openpyxl
+
+    :return: строковое значение ячейки (str)
+    """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_excel_sku_values(rows, sku_col_pos):
+    """
+    Итератор по значениям SKU строк листа excel-файла. Пустые строки в конце листа пропускаются, как и при чтении файла pandas
+
+    :param rows: итератор по кортежам значений строк листа
+    :param sku_col_pos: номер столбца с SKU (int)
+
+    :return: строковые значения SKU (generator of str)
+    """
+    # Количество пустых строк подряд, значения которых выдаются, только если после них есть непустая строка
+    empty_rows_count = 0
+    for row in rows:
+        if all(value is None for value in row):
+            empty_rows_count += 1
+            continue
+        for _ in range(empty_rows_count):
+            yield ''
+        empty_rows_count = 0
+        yield convert_excel_value(row[sku_col_pos] if sku_col_pos < len(row) else None)
+
+
 """
 Райтер для записи данных в CSV файл
 
@@ -142,15 +425,16 @@ class SKUWriterCSV:
     def append(self, df):
         df.to_csv(self.file_path, sep='\t', index=False, header=False, mode='a', encoding=self.encoding, errors="ignore")
 
-def init_sku_reader(data_path, sku_sheet_name=None, sku_col_name=None):
+def init_sku_reader(data_path, sku_sheet_name=None, sku_col_name=None, cache_line_index=False):
     """
     Создание ридера (объекта, содержащий функцию read(batch_start, batch_len), считывающий batch_len строк SKU начиная с batch_start) и предобработчика батчей SKU из csv, txt или excel-файла, в зависимости от расширения файла
 
     :param file_path: путь к читаемому файлу содержащему SKU для обработки (str)
     :param sku_sheet_name: название листа читаемого excel-файла, содержащего SKU (если данные читаются из excel-файла); если подается пустое название столбца с SKU, то используется первая строка заданного файла (str)
     :param sku_col_name: имя столбца файла по пути data_path, содержащему SKU для обработки; если подается пустое название листа с SKU, то используется первый лист заданного файла (str)
+    :param cache_line_index: флаг хранения индекса строк csv, txt-файла рядом с ним для повторных чтений того же файла, по умолчанию False (bool)
 
-    :return: ридер и предобработчик батчей SKU из csv, txt или excel-файла, в зависимости от расширени файла (SKUReaderCSV или SKUReaderExcel)
+    :return: ридер и предобработчик батчей SKU из csv, txt или excel-файла, в зависимости от расширени файла (SKUReaderCSV, SKUReaderExcelStreaming или SKUReaderExcel)
     """
     #   Определение расширения файла
     file_ext = data_path.split('.')[-1]
@@ -159,7 +443,11 @@ def init_sku_reader(data_path, sku_sheet_name=None, sku_col_name=None):
         # Формат обрабатываемого файла - excel
         # Создание объекта-ридера SKU из excel-файла по пути input_data_path, из листа sku_sheet_name (или первого листа), из столбца sku_col_name (или первого столбца),
         # осуществляющего чтение и предобработку SKU
-        sku_reader = SKUReaderExcel(data_path, sku_col_name, sku_sheet_name)
+        if file_ext in json.load(open(os.path.join('config', 'file_ext.json')))['excel_streaming_ext']:
+            # Excel-файл читается потоково, по мере обработки батчей
+            sku_reader = SKUReaderExcelStreaming(data_path, sku_col_name, sku_sheet_name)
+        else:
+            sku_reader = SKUReaderExcel(data_path, sku_col_name, sku_sheet_name)
         # Заполнение пустого значения названия листа с SKU excel-файла
         if len(sku_sheet_name) == 0:
             sku_sheet_name = sku_reader.sku_sheet_name
@@ -167,10 +455,12 @@ def init_sku_reader(data_path, sku_sheet_name=None, sku_col_name=None):
         # Формат обрабатываемого файла - csv, txt
         # Определение кодировки обрабатываемого файла
         #   Сообщение о начале определния кодировки
+        import chardet
+
         bytesArr = open(data_path, 'rb').read(1000000)
         encoding = chardet.detect(bytesArr)['encoding']
         # Создание объекта-ридера SKU из csv-файла по пути input_data_path, из столбца sku_col_name (или первого столбца), осуществляющего чтение и предобработку SKU
-        sku_reader = SKUReaderCSV(data_path, sku_col_name, encoding)
+        sku_reader = SKUReaderCSV(data_path, sku_col_name, encoding, cache_line_index=cache_line_index)
     return sku_reader
 
 def preprocess_sku_for_recognizing(sku):
@@ -252,6 +542,73 @@ def base_cleanning(sku):
 
     return cleared_sku
 
+# Пробельные символы (все символы, которые находит \s), заменяемые replace_bad_spaces на обычный пробел
+BAD_SPACES = '\x09\x0a\x0b\x0c\x0d\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000'
+# Символы, заменяемые replace_symb2_all на пробел
+SYMB2 = '~«»“”"\'`#?<>‘∙\u2524\u2561\u2556\u2555\u2563\u2551\u2557\u255d\u255c\u255b\u2510\u2514\u2534\u252c\u251c\u2500\u253c\u255e\u255f\u255a\u2554\u2569\u2566\u2560\u2550\u256c\u2567\u2568\u2564\u2565\u2559\u2558\u2552\u2553\u256b\u256a\u2518\u250c\u2588\u2584\u258c\u2590\u2580'
+# Таблица замены символов, заменяемых replace_bad_spaces, replace_brackets и replace_backslashes
+BASE_CLEANNING_TRANSLATION = str.maketrans({**dict.fromkeys(BAD_SPACES, ' '), '{': '(', '[': '(', '}': ')', ']': ')', '\\': '/'})
+# Таблица замены символов, заменяемых replace_symb2_all
+SYMB2_TRANSLATION = str.maketrans(dict.fromkeys(SYMB2, ' '))
+# Символы, с которых (после пробелов) начинаются строки, изменяемые функциями удаления символов в начале строки
+START_SYMBOLS = frozenset(''.join([SYMB2, '.,_-–*!^=$@+/(']))
+# Шаблоны первого цикла очистки base_cleanning в порядке их применения
+START_CLEANNING_PATTERNS = [re.compile(r'^.{0,7}:'),
+                            re.compile(r'^\s*[~«»“”\"\'`#?>‘∙\u2524\u2561\u2556\u2555\u2563\u2551\u2557\u255d\u255c\u255b\u2510\u2514\u2534\u252c\u251c\u2500\u253c\u255e\u255f\u255a\u2554\u2569\u2566\u2560\u2550\u256c\u2567\u2568\u2564\u2565\u2559\u2558\u2552\u2553\u256b\u256a\u2518\u250c\u2588\u2584\u258c\u2590\u2580]+'),
+                            re.compile(r'^\s*[\.\,_\-–\*\!\^\=\$@\+\/]+'),
+                            re.compile(r'^\s*<.{0,}>'),
+                            re.compile(r'^\s*[<]+'),
+                            re.compile(r'^\s*\([MМ]\+?\)')]
+# Шаблоны замены сочетаний более одного символа на пробел в порядке их применения, вместе с заменяемым символом
+MANY_SYMBOLS_PATTERNS = [(symb, re.compile("".join([re.escape(symb), '+\\s*', re.escape(symb), '+[\\s', re.escape(symb), ']*']))) for symb in '*!$+/;_']
+# Шаблоны второго цикла очистки base_cleanning в порядке их применения
+END_CLEANNING_PATTERNS = [re.compile(r'КНОПКА[0-9-\s]{0,}$'),
+                          re.compile(r':[0-9/\s.,]{0,}$')]
+SQUEEZE_SPACES_PATTERN = re.compile(r'\s{2,}')
+
+
+def base_cleanning_fast(sku):
+    """
+    Общая очистка SKU, результат которой совпадает с результатом base_cleanning. Шаблоны скомпилированы заранее, замены отдельных символов делаются таблицами str.translate,
+    а шаблоны, которые не могут изменить строку (в ней нет нужных символов), не применяются
+
+    :param sku: строка SKU (string)
+
+    :return: измененная строка SKU
+    """
+    # Замена нестандартных пробельных символов, скобок и обратных слэшей; после нее единственный пробельный символ в строке - обычный пробел
+    cleared_sku = sku.translate(BASE_CLEANNING_TRANSLATION)
+    # Очистка начала строки до тех пор, пока она изменяет строку
+    while ':' in cleared_sku[:8] or cleared_sku.lstrip(' ')[:1] in START_SYMBOLS or '  ' in cleared_sku:
+        new_cleared_sku = cleared_sku
+        for pattern in START_CLEANNING_PATTERNS:
+            new_cleared_sku = pattern.sub('', new_cleared_sku)
+        new_cleared_sku = SQUEEZE_SPACES_PATTERN.sub(' ', new_cleared_sku)
+        if cleared_sku == new_cleared_sku:
+            break
+        cleared_sku = new_cleared_sku
+    # Замена некоторых символов строки на пробелы
+    cleared_sku = cleared_sku.translate(SYMB2_TRANSLATION)
+    # Замена сочетаний более одного символа на пробел
+    for symb, pattern in MANY_SYMBOLS_PATTERNS:
+        if cleared_sku.count(symb) > 1:
+            cleared_sku = pattern.sub(' ', cleared_sku)
+    # Очистка конца строки до тех пор, пока она изменяет строку
+    while 'КНОПКА' in cleared_sku or ':' in cleared_sku or '  ' in cleared_sku:
+        new_cleared_sku = cleared_sku
+        for pattern in END_CLEANNING_PATTERNS:
+            new_cleared_sku = pattern.sub('', new_cleared_sku)
+        new_cleared_sku = SQUEEZE_SPACES_PATTERN.sub(' ', new_cleared_sku)
+        if cleared_sku == new_cleared_sku:
+            break
+        cleared_sku = new_cleared_sku
+    # Удаление пробела в начале и в конце
+    if cleared_sku[:1] == ' ':
+        cleared_sku = cleared_sku[1:]
+    if cleared_sku[-1:] == ' ':
+        cleared_sku = cleared_sku[:-1]
+    return cleared_sku
+
 def add_spaces_at_start_end(sku):
     """
     Добавление пробелов в начало и конец строки
@@ -501,6 +858,6 @@ def remove_numbers_under_value(sku, value):
     return sku
 
 CLEAR_PATTERNS_DICT = {
-                      'Базовый': base_cleanning
+                      'Базовый': base_cleanning_fast
                       }
 
@@ -1,18 +1,40 @@
+import hashlib
+import json
 import re
 
 import FeatureParser.Patterns as Patterns
 
-spaces_line_regexp = r"^\s+$"
+spaces_line_regexp = re.compile(r"^\s+$")
+
+def normalize_sku(sku):
+    """
+    Приведение строки SKU к виду, в котором в ней ищутся характеристики: SKU в нижнем регистре, если SKU пустая или состоит из пробелов - пустая строка
+
+    :param sku string: строка SKU
+
+    :return: sku в нижнем регистре или пустая строка
+    """
+    if len(sku) == 0 or spaces_line_regexp.search(sku) is not None:
+        return ""
+    return sku.lower()
 
 class FeatureParser:
     """
     Содержит шаблоны для поиска характеристики и другие параметры
     """
-    def __init__(self, config):
+    def __init__(self, config, use_screening_reg=False):
+        """
+        :param config: конфигурация алгоритма поиска характеристики (dict)
+        :param use_screening_reg: флаг предварительного поиска в SKU обязательных строк всех шаблонов одним общим регулярным выражением, по результатам которого
+        применяются только те шаблоны, которые могут сработать, по умолчанию False (bool)
+        """
         # Составление алгоритмов отбора значений признаков по заданной конфигурации
+        self.config = config
 
         #   Список функций для поиска характеристик в SKU по шаблонам из конфигурационного файла
         self.parse_func_chain = []
+        #   Строки, одна из которых должна быть в SKU (в нижнем регистре), чтобы шаблон мог сработать, для каждого шаблона (None - шаблон применяется всегда)
+        self.required_literals_chain = []
         #   Значение характеристики по умолчанию (если не сработал ни один из шаблонов)
         self.default_val = ""
         #   Название значения по-умолчанию
@@ -23,93 +45,291 @@ class FeatureParser:
             patterns_config_arr = config["Patterns"]
             for pattern_config in patterns_config_arr:
                 pattern = pattern_type_select(pattern_config)
-                self.parse_func_chain.append(pattern.parse)
+                self.parse_func_chain.append(pattern.parse_low)
+                self.required_literals_chain.append(pattern.required_literals)
         #   Добавление значений по умолчанию
         if "DefaultValue" in config:
             self.default_val = config["DefaultValue"]
         if "DefaultName" in config:
             self.default_name = config["DefaultName"]
+        #   Общее регулярное выражение для предварительного поиска обязательных строк шаблонов (None - не используется)
+        self.screening_reg = None
+        if use_screening_reg:
+            self.screening_reg, self.screening_group_masks, self.screening_default_mask = compile_screening_reg(self.required_literals_chain)
+    
+    def get_fingerprint(self):
+        """
+        Отпечаток конфигурации алгоритма поиска характеристики
+
+        :return: хэш SHA-1 в шестнадцатеричном виде (str)
+        """
+        return hashlib.sha1(json.dumps(self.config, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def find_first_match(self, sku_low):
+        """
+        Поиск значения характеристики в sku_low по шаблонам self.parse_func_chain в порядке их приоритета. Шаблон пропускается без применения регулярных выражений, если в sku_low
+        нет ни одной из его обязательных строк
+
+        :param sku_low string: непустая строка SKU в нижнем регистре
+
+        :return: значение характеристики, его расположение в sku и название шаблона по первому сработавшему шаблону; если ни один шаблон не сработал, то None, None, None
+        """
+        if self.screening_reg is not None:
+            return self.find_first_match_screened(sku_low)
+        for pattern_func, required_literals in zip(self.parse_func_chain, self.required_literals_chain):
+            if required_literals is not None and not any(literal in sku_low for literal in required_literals):
+                continue
+            char_val, loc, pattern_name = pattern_func(sku_low)
+            if char_val is not None:
+                return char_val, loc, pattern_name
+        return None, None, None
+
+    def find_first_match_screened(self, sku_low):
+        """
+        Поиск значения характеристики в sku_low так же, как в find_first_match, но обязательные строки всех шаблонов ищутся одним проходом общего регулярного выражения
+        self.screening_reg, после чего в порядке приоритета применяются только шаблоны, которые могут сработать
 
+        :param sku_low string: непустая строка SKU в нижнем регистре
+
+        :return: то же, что и find_first_match
+        """
+        # Битовая маска шаблонов, которые могут сработать: шаблоны без обязательных строк и шаблоны, обязательные строки которых найдены
+        candidates_mask = self.screening_default_mask
+        group_masks = self.screening_group_masks
+        for match in self.screening_reg.finditer(sku_low):
+            candidates_mask |= group_masks[match.lastgroup]
+        pattern_num = 0
+        while candidates_mask:
+            if candidates_mask & 1:
+                char_val, loc, pattern_name = self.parse_func_chain[pattern_num](sku_low)
+                if char_val is not None:
+                    return char_val, loc, pattern_name
+            candidates_mask >>= 1
+            pattern_num += 1
+        return None, None, None
     
-    def parse(self, sku):
+    def parse(self, sku, sku_low=None):
         """
         Функция поиска значения характеристики в sku
 
         :param sku string: строка SKU, в которой осуществляется поиск значения характеристики
+        :param sku_low string: sku, приведенная к нижнему регистру функцией normalize_sku; по умолчанию None - sku приводится к нижнему регистру в самой функции
 
         :return: значение характеристики в формате строки, определенное по строке sku, если строка sku пустая или состоит из пробелов, возвращается пустая строка
         """
+        # Приведение SKU к нижнему регистру, если это не было сделано заранее
+        if sku_low is None:
+            sku_low = normalize_sku(sku)
         # Проверка, является ли строка sku пустой или состоящей из пробелов; если это не так, то идет парсинг характеристики, иначе возвращается нулевое значение
-        if len(sku) > 0 and re.search(spaces_line_regexp, sku) is None:
-            # Перебор всех функций self.parse_func_chain, по которым будет определяться значение характеристики по sku
-            for i, pattern_func in enumerate(self.parse_func_chain):
-                char_val, loc, pattern_name = pattern_func(sku)
-                #print(i)
-                # Если значение характеристики было найдено, то оно после дальнейшей обработки будет возвращено, иначе проводится поиск по следующему шаблону
-                if char_val is not None:
-                    return [char_val]
+        if len(sku_low) > 0:
+            # Поиск по шаблонам цепочки до первого сработавшего
+            char_val, loc, pattern_name = self.find_first_match(sku_low)
+            # Если значение характеристики было найдено, то оно после дальнейшей обработки будет возвращено
+            if char_val is not None:
+                return [char_val]
             return [self.default_val]
         return [""]
     
-    def parse_and_remove(self, sku):
+    def parse_and_remove(self, sku, sku_low=None):
         """
         Функция поиска значения характеристики в sku
 
         :param sku string: строка SKU, в которой осуществляется поиск значения характеристики
+        :param sku_low string: sku, приведенная к нижнему регистру функцией normalize_sku; по умолчанию None - sku приводится к нижнему регистру в самой функции
 
         :return: значение характеристики в формате строки, определенное по строке sku, если строка sku пустая или состоит из пробелов, возвращается пустая строка
         """
+        # Приведение SKU к нижнему регистру, если это не было сделано заранее
+        if sku_low is None:
+            sku_low = normalize_sku(sku)
         # Проверка, является ли строка sku пустой или состоящей из пробелов; если это не так, то идет парсинг характеристики, иначе возвращается нулевое значение
-        if len(sku) > 0 and re.search(spaces_line_regexp, sku) is None:
-            # Перебор всех функций self.parse_func_chain, по которым будет определяться значение характеристики по sku
-            for i, pattern_func in enumerate(self.parse_func_chain):
-                char_val, loc, pattern_name = pattern_func(sku)
-                # Если значение характеристики было найдено, то оно после дальнейшей обработки будет возвращено, иначе проводится поиск по следующему шаблону
-                if char_val is not None:
-                    removed_feature_sku = " ".join([sku[:loc[0]], sku[loc[1]:]])
-                    return [char_val, removed_feature_sku]
+        if len(sku_low) > 0:
+            # Поиск по шаблонам цепочки до первого сработавшего
+            char_val, loc, pattern_name = self.find_first_match(sku_low)
+            # Если значение характеристики было найдено, то оно после дальнейшей обработки будет возвращено
+            if char_val is not None:
+                removed_feature_sku = " ".join([sku[:loc[0]], sku[loc[1]:]])
+                return [char_val, removed_feature_sku]
             return [self.default_val, sku]
         return ["", ""]
     
-    def parse_and_pattern(self, sku):
+    def parse_and_pattern(self, sku, sku_low=None):
         """
         Функция поиска значения характеристики в sku, вывод названия шаблона
 
         :param sku string: строка SKU, в которой осуществляется поиск значения характеристики
+        :param sku_low string: sku, приведенная к нижнему регистру функцией normalize_sku; по умолчанию None - sku приводится к нижнему регистру в самой функции
 
         :return: значение характеристики в формате строки, определенное по строке sku, если строка sku пустая или состоит из пробелов, возвращается пустая строка
         """
+        # Приведение SKU к нижнему регистру, если это не было сделано заранее
+        if sku_low is None:
+            sku_low = normalize_sku(sku)
         # Проверка, является ли строка sku пустой или состоящей из пробелов; если это не так, то идет парсинг характеристики, иначе возвращается нулевое значение
-        if len(sku) > 0 and re.search(spaces_line_regexp, sku) is None:
-            # Перебор всех функций self.parse_func_chain, по которым будет определяться значение характеристики по sku
-            for i, pattern_func in enumerate(self.parse_func_chain):
-                char_val, loc, pattern_name = pattern_func(sku)
-                # Если значение характеристики было найдено, то оно после дальнейшей обработки будет возвращено, иначе проводится поиск по следующему шаблону
-                if char_val is not None:
-                    return [char_val, pattern_name]
+        if len(sku_low) > 0:
+            # Поиск по шаблонам цепочки до первого сработавшего
+            char_val, loc, pattern_name = self.find_first_match(sku_low)
+            # Если значение характеристики было найдено, то оно после дальнейшей обработки будет возвращено
+            if char_val is not None:
+                return [char_val, pattern_name]
             return [self.default_val, self.default_name]
         return ["", ""]
     
-    def parse_and_remove_and_pattern(self, sku):
+    def parse_and_remove_and_pattern(self, sku, sku_low=None):
         """
         Функция поиска значения характеристики в sku
 
         :param sku string: строка SKU, в которой осуществляется поиск значения характеристики
+        :param sku_low string: sku, приведенная к нижнему регистру функцией normalize_sku; по умолчанию None - sku приводится к нижнему регистру в самой функции
 
         :return: значение характеристики в формате строки, определенное по строке sku, если строка sku пустая или состоит из пробелов, возвращается пустая строка
         """
+        # Приведение SKU к нижнему регистру, если это не было сделано заранее
+        if sku_low is None:
+            sku_low = normalize_sku(sku)
         # Проверка, является ли строка sku пустой или состоящей из пробелов; если это не так, то идет парсинг характеристики, иначе возвращается нулевое значение
-        if len(sku) > 0 and re.search(spaces_line_regexp, sku) is None:
-            # Перебор всех функций self.parse_func_chain, по которым будет определяться значение характеристики по sku
-            for i, pattern_func in enumerate(self.parse_func_chain):
-                char_val, loc, pattern_name = pattern_func(sku)
-                # Если значение характеристики было найдено, то оно после дальнейшей обработки будет возвращено, иначе проводится поиск по следующему шаблону
-                if char_val is not None:
-                    removed_feature_sku = " ".join([sku[:loc[0]], sku[loc[1]:]])
-                    return [char_val, removed_feature_sku, pattern_name]
+        if len(sku_low) > 0:
+            # Поиск по шаблонам цепочки до первого сработавшего
+            char_val, loc, pattern_name = self.find_first_match(sku_low)
+            # Если значение характеристики было найдено, то оно после дальнейшей обработки будет возвращено
+            if char_val is not None:
+                removed_feature_sku = " ".join([sku[:loc[0]], sku[loc[1]:]])
+                return [char_val, removed_feature_sku, pattern_name]
             return [self.default_val, sku, self.default_name]
         return ["", "", ""]
 
+    def parse_many(self, sku_rows, parse_func_name="parse"):
+        """
+        Поиск значений характеристики по списку SKU за один вызов. Все SKU сначала приводятся к нижнему регистру, затем к каждой применяется функция parse_func_name.
+        Результат совпадает с поочередным применением parse_func_name
+
+        :param sku_rows: список SKU, в которых осуществляется поиск значений характеристики (list)
+        :param parse_func_name: название функции ("parse", "parse_and_remove", "parse_and_pattern" или "parse_and_remove_and_pattern")
+
+        :return: результат в виде списка столбцов - столбцов результатов функции parse_func_name (list)
+        """
+        return parse_rows_to_columns(getattr(self, parse_func_name), sku_rows)
+
+class MultiFeatureParser:
+    """
+    Содержит алгоритмы поиска нескольких характеристик; все характеристики ищутся в SKU за один вызов, результаты по характеристикам идут подряд в порядке их названий
+    """
+    def __init__(self, config, feature_names, use_screening_reg=False):
+        """
+        :param config: конфигурация алгоритмов поиска характеристик (содержание feature_parser_config.json) (dict)
+        :param feature_names: названия искомых характеристик из config (list of str)
+        :param use_screening_reg: флаг предварительного поиска обязательных строк шаблонов, см. FeatureParser, по умолчанию False (bool)
+        """
+        self.feature_names = list(feature_names)
+        # Алгоритмы поиска каждой характеристики
+        self.feature_parsers = [FeatureParser(config[feature_name], use_screening_reg) for feature_name in self.feature_names]
+
+    def get_fingerprint(self):
+        """
+        Отпечаток конфигурации алгоритмов поиска всех характеристик
+
+        :return: хэш SHA-1 в шестнадцатеричном виде (str)
+        """
+        return hashlib.sha1("".join([feature_parser.get_fingerprint() for feature_parser in self.feature_parsers]).encode('utf-8')).hexdigest()
+
+    def parse_each(self, parse_func_name, sku, sku_low=None):
+        """
+        Поиск всех характеристик в sku функцией parse_func_name алгоритма каждой характеристики; sku приводится к нижнему регистру один раз для всех характеристик
+
+        :param parse_func_name: название функции FeatureParser ("parse", "parse_and_remove", "parse_and_pattern" или "parse_and_remove_and_pattern")
+        :param sku string: строка SKU, в которой осуществляется поиск значений характеристик
+        :param sku_low string: sku, приведенная к нижнему регистру функцией normalize_sku; по умолчанию None - sku приводится к нижнему регистру в самой функции
+
+        :return: результаты функции parse_func_name по всем характеристикам подряд в одном списке
+        """
+        if sku_low is None:
+            sku_low = normalize_sku(sku)
+        result = []
+        for feature_parser in self.feature_parsers:
+            result.extend(getattr(feature_parser, parse_func_name)(sku, sku_low))
+        return result
+
+    def parse(self, sku, sku_low=None):
+        """
+        Поиск значений всех характеристик в sku, см. FeatureParser.parse
+        """
+        return self.parse_each("parse", sku, sku_low)
+
+    def parse_and_remove(self, sku, sku_low=None):
+        """
+        Поиск значений всех характеристик в sku, см. FeatureParser.parse_and_remove
+        """
+        return self.parse_each("parse_and_remove", sku, sku_low)
+
+    def parse_and_pattern(self, sku, sku_low=None):
+        """
+        Поиск значений всех характеристик в sku, см. FeatureParser.parse_and_pattern
+        """
+        return self.parse_each("parse_and_pattern", sku, sku_low)
+
+    def parse_and_remove_and_pattern(self, sku, sku_low=None):
+        """
+        Поиск значений всех характеристик в sku, см. FeatureParser.parse_and_remove_and_pattern
+        """
+        return self.parse_each("parse_and_remove_and_pattern", sku, sku_low)
+
+    def parse_many(self, sku_rows, parse_func_name="parse"):
+        """
+        Поиск значений всех характеристик по списку SKU за один вызов, см. FeatureParser.parse_many
+
+        :return: результат в виде списка столбцов - столбцов результатов функции parse_func_name по всем характеристикам подряд (list)
+        """
+        return parse_rows_to_columns(getattr(self, parse_func_name), sku_rows)
+
+def compile_screening_reg(required_literals_chain):
+    """
+    Составление общего регулярного выражения для поиска обязательных строк всех шаблонов цепочки за один проход по SKU. Выражение - просмотр вперед с альтернативой
+    именованных групп, по одной на каждую обязательную строку, поэтому оно находит в каждой позиции SKU самую длинную из начинающихся в ней обязательных строк.
+    Более короткие строки, начинающиеся в той же позиции, содержатся в найденной, поэтому маска группы включает все шаблоны, обязательные строки которых содержатся в строке группы
+
+    :param required_literals_chain: обязательные строки каждого шаблона цепочки (None - шаблон применяется всегда) (list)
+
+    :return: скомпилированное регулярное выражение (None, если обязательных строк нет), битовые маски шаблонов по названиям групп (dict), битовая маска шаблонов,
+    применяемых всегда (int)
+    """
+    default_mask = 0
+    literals = set()
+    for pattern_num, required_literals in enumerate(required_literals_chain):
+        if required_literals is None:
+            default_mask |= 1 << pattern_num
+        else:
+            literals.update(required_literals)
+    if len(literals) == 0:
+        return None, {}, default_mask
+    # Более длинные строки идут в альтернативе первыми
+    literals = sorted(literals, key=lambda literal: (-len(literal), literal))
+    group_masks = {}
+    alternatives = []
+    for literal_num, literal in enumerate(literals):
+        group_name = "".join(["l", str(literal_num)])
+        alternatives.append("".join(["(?P<", group_name, ">", re.escape(literal), ")"]))
+        group_mask = 0
+        for pattern_num, required_literals in enumerate(required_literals_chain):
+            if required_literals is not None and any(required_literal in literal for required_literal in required_literals):
+                group_mask |= 1 << pattern_num
+        group_masks[group_name] = group_mask
+    return re.compile("".join(["(?=", "|".join(alternatives), ")"])), group_masks, default_mask
+
+def parse_rows_to_columns(parse_func, sku_rows):
+    """
+    Применение функции поиска характеристики к каждой SKU из списка; все SKU приводятся к нижнему регистру до начала поиска
+
+    :param parse_func: функция поиска, принимающая SKU и SKU в нижнем регистре и возвращающая список значений
+    :param sku_rows: список SKU (list)
+
+    :return: результаты parse_func в виде списка столбцов (list)
+    """
+    sku_low_rows = [normalize_sku(sku) for sku in sku_rows]
+    result_rows = [parse_func(sku, sku_low) for sku, sku_low in zip(sku_rows, sku_low_rows)]
+    if len(result_rows) == 0:
+        return []
+    return [list(column) for column in zip(*result_rows)]
+
 def pattern_type_select(pattern_param_dict):
     """
     Выбор типа шаблона по строчному названию, из карты параметров pattern_dict с ключом "Type". Возвращает функцию парсинга характеристики по SKU, соответствующую выбранному шаблону.
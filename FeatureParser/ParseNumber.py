@@ -1,5 +1,8 @@
 import re
 
+# Регулярное выражение числа с "." или "," в качестве разделителя
+number_regexp = re.compile(r"\d+[.,]?\d*")
+
 """
 Функция извлекает из подаваемой строки первое число float64 "." или "," в качестве разделителя, возвращает ошибку, если в подаваемой строке нет чисел
 
@@ -10,9 +13,8 @@ import re
 def parse_number(s):
     # У числа s строчного типа "," меняется на "." затем число преобразуется к типу float
     try:
-        m = re.search("\d+[.,]?\d*", s)
+        m = number_regexp.search(s)
         loc = m.span()
-        num = float(re.findall("\d+[.,]?\d*", s)[0].replace(",", "."))
         num = float(s[loc[0]:loc[1]].replace(",", "."))
     except:
         num = None
@@ -1,8 +1,9 @@
-import numpy as np
+import math
 import re
 
 import FeatureParser.TypeConverters as TypeConverters
 from FeatureParser.ParseNumber import parse_number
+from FeatureParser.RequiredLiterals import best_clause, find_required_literals
 
 """
 Содержит шаблон для поиска числового значения характеристики и перевода его в строчный вид
@@ -23,11 +24,13 @@ class ValuePattern:
         self.value_parse_func = None
 	    # Функция, приводящая числовое значение к строчному
         self.value_to_str_func = None
+        # Строки, одна из которых обязательно есть в SKU в нижнем регистре, если шаблон срабатывает (None - такие строки не найдены)
+        self.required_literals = None
         # Значения параметров шаблона по умолчанию, если их нет в pattern_param
         name = ""
         mult = 1.
         min_val = 0.
-        max_val = np.inf
+        max_val = math.inf
         multiplicity = 0
         prefix = ""
         suffix = ""
@@ -145,12 +148,13 @@ class ValuePattern:
                 value_to_str_func = converter.transform
             self.prefix = prefix
             self.suffix = suffix
-            self.left_range_pat_arr = left_range_pat_arr
-            self.right_range_pat_arr = right_range_pat_arr
-            self.range_val_pat_arr = range_val_pat_arr
+            self.left_range_pat_arr = compile_regs(left_range_pat_arr)
+            self.right_range_pat_arr = compile_regs(right_range_pat_arr)
+            self.range_val_pat_arr = compile_regs(range_val_pat_arr)
             self.range_symbol = range_symbol
             self.value_parse_func = value_parse_func
             self.value_to_str_func = value_to_str_func
+            self.required_literals = num_val_pat.find_required_literals()
     
     """
     Поиск характеристики в SKU по шаблону valuePattern
@@ -161,7 +165,16 @@ class ValuePattern:
     """
     def parse(self, sku):
         # Приведение SKU к нижнему регистру
-        sku_low = sku.lower()
+        return self.parse_low(sku.lower())
+
+    """
+    Поиск характеристики в SKU, уже приведенном к нижнему регистру, по шаблону valuePattern
+
+    :param sku_low: SKU в нижнем регистре, по которому определяется характеристика
+
+    :return: характеристика, полученная по шаблону valuePattern в виде строки
+    """
+    def parse_low(self, sku_low):
         num_val, match_loc, name = self.value_parse_func(sku_low)
         if num_val is not None:
             # Поиск диапазона по регулярным выражениям
@@ -201,8 +214,8 @@ class ValuePattern:
 """
 class NumberValuePattern:
     def __init__(self, reg, name, mult, min_val, max_val, multiplicity, left_add_pat_arr, right_add_pat_arr, add_val_pat_arr, left_mult_pat_arr, right_mult_pat_arr, mult_val_pat_arr, exceptions_arr):
-        # Регулярное выражение для поиска индикатора характеристики
-        self.reg = reg
+        # Регулярное выражение для поиска индикатора характеристики (скомпилированное или словарь скомпилированных выражений "SelfReg", "LeftReg", "RightReg")
+        self.reg = compile_reg_dict(reg) if isinstance(reg, dict) else re.compile(reg)
         # Название шаблона
         self.name = name
         # Множитель массы из индикатора
@@ -215,19 +228,28 @@ class NumberValuePattern:
         self.multiplicity = multiplicity
         
         # Список шаблонов для поиска слагаемого слева
-        self.left_add_pat_arr = left_add_pat_arr
+        self.left_add_pat_arr = compile_regs(left_add_pat_arr)
         # Список шаблонов для поиска слагаемого справа
-        self.right_add_pat_arr = right_add_pat_arr
+        self.right_add_pat_arr = compile_regs(right_add_pat_arr)
         # Список шаблонов для поиска значений слагаемых
-        self.add_val_pat_arr = add_val_pat_arr
+        self.add_val_pat_arr = compile_regs(add_val_pat_arr)
         # Список шаблонов для поиска множителя слева
-        self.left_mult_pat_arr = left_mult_pat_arr
+        self.left_mult_pat_arr = compile_regs(left_mult_pat_arr)
         # Список шаблонов для поиска множителя справа
-        self.right_mult_pat_arr = right_mult_pat_arr
+        self.right_mult_pat_arr = compile_regs(right_mult_pat_arr)
         # Список шаблонов для поиска значений множителей
-        self.mult_val_pat_arr = mult_val_pat_arr
+        self.mult_val_pat_arr = compile_regs(mult_val_pat_arr)
         # Список шаблонов для полных исключений
-        self.exceptions_arr = exceptions_arr
+        self.exceptions_arr = [compile_reg_dict(exception_reg_dict) for exception_reg_dict in exceptions_arr]
+
+    """
+    Поиск строк, одна из которых обязательно есть в SKU, в котором найдено соответствие регулярному выражению self.reg (для словаря - всем его выражениям)
+
+    :return: кортеж обязательных строк (достаточно одной из них) или None, если такие строки не найдены
+    """
+    def find_required_literals(self):
+        regs = self.reg.values() if isinstance(self.reg, dict) else [self.reg]
+        return best_clause([frozenset(literals) for literals in map(find_required_literals, regs) if literals is not None])
 
     """
     Поиск значения характеристики с плавающей точкой по строке sku, согласно условиям из структуры pattern, в прямом порядке (значение слева sku преоритетней)
@@ -342,7 +364,7 @@ class NumberValuePattern:
     def parse_min(self, sku):
         # Поиск всех границ соответствий регулярному выражению self.reg
         matches = self.find_matches(sku)
-        val = np.inf
+        val = math.inf
         loc_borders = [0, 0]
         # Перебор и сложение всех соответствий
         for m in matches:
@@ -355,7 +377,7 @@ class NumberValuePattern:
                     val = val_cond
                     loc_borders = loc_borders_cond
             # Если число в соответствии найдено, поиск завершается
-        if val < np.inf:
+        if val < math.inf:
             return val, loc_borders, self.name
         # Если ни один вариант не подошел или не было найдено ни одно соответствие регулярному выражению, функция прекращает работу, а характеристика считается не найденной
         return None, None, None
@@ -395,17 +417,17 @@ class NumberValuePattern:
     """
     def find_matches(self, sku):
         matches = []
-        if isinstance(self.reg, str):
-            for m in re.finditer(self.reg, sku):
+        if not isinstance(self.reg, dict):
+            for m in self.reg.finditer(sku):
                 matches.append(m)
         else:
             if "SelfReg" in self.reg:
-                for match in re.finditer(self.reg["SelfReg"], sku):
+                for match in self.reg["SelfReg"].finditer(sku):
                     loc = match.span()
                     if "LeftReg" in self.reg:
                         left_found = False
                         left_reg = self.reg["LeftReg"]
-                        m = re.search(left_reg, sku[:loc[0]])
+                        m = left_reg.search(sku[:loc[0]])
                         if m is not None:
                             left_found = True
                     else:
@@ -414,7 +436,7 @@ class NumberValuePattern:
                         if "RightReg" in self.reg:
                             right_found = False
                             right_reg = self.reg["RightReg"]
-                            m = re.search(right_reg, sku[loc[1]:])
+                            m = right_reg.search(sku[loc[1]:])
                             if m is not None:
                                 right_found = True
                         else:
@@ -436,7 +458,7 @@ class NumberValuePattern:
             if "LeftReg" in exception_reg_dict:
                 left_found = False
                 left_exp_reg = exception_reg_dict["LeftReg"]
-                m = re.search(left_exp_reg, sku[:char_loc[0]])
+                m = left_exp_reg.search(sku[:char_loc[0]])
                 if m is not None:
                     left_found = True
             else:
@@ -445,7 +467,7 @@ class NumberValuePattern:
                 if "RightReg" in exception_reg_dict:
                     right_found = False
                     right_exp_reg = exception_reg_dict["RightReg"]
-                    m = re.search(right_exp_reg, sku[char_loc[1]:])
+                    m = right_exp_reg.search(sku[char_loc[1]:])
                     if m is not None:
                         right_found = True
                 else:
@@ -454,7 +476,7 @@ class NumberValuePattern:
                     if "SelfReg" in exception_reg_dict:
                         self_found = False
                         self_exp_reg = exception_reg_dict["SelfReg"]
-                        m = re.search(self_exp_reg, sku[char_loc[0] : char_loc[1]])
+                        m = self_exp_reg.search(sku[char_loc[0] : char_loc[1]])
                         if m is not None:
                             self_found = True
                     else:
@@ -501,9 +523,9 @@ class NumberValuePattern:
 
 :param sku: строка, в которой было найдено числовое значение характеристики и ведется поиск
 :param char_loc: локация (номера первого и последнего символов) числового значения характеристики в строке sku
-:param left_pattern_arr: массив регулярных выражений для поиска дополнительных значение слева от основного
-:param right_pattern_arr: массив регулярных выражений для поиска дополнительных значение справа от основного
-:param val_pattern_arr: массив регулярных выражений для поиска значений допольнительных значений
+:param left_pattern_arr: массив скомпилированных регулярных выражений для поиска дополнительных значение слева от основного
+:param right_pattern_arr: массив скомпилированных регулярных выражений для поиска дополнительных значение справа от основного
+:param val_pattern_arr: массив скомпилированных регулярных выражений для поиска значений допольнительных значений
 
 :return: дополнительное значение характеристики, если оно найдено; флаг, показывающий, что значение найдено
 """
@@ -516,7 +538,7 @@ def find_add_val(sku, char_loc, left_pattern_arr, right_pattern_arr, val_pattern
     for i in range(len(left_pattern_arr)):
         # Поиск левого дополнительного значения слева от индикатора характеристики в sku
         found_mult_arr = []
-        for m in re.finditer(left_pattern_arr[i], sku_left_part):
+        for m in left_pattern_arr[i].finditer(sku_left_part):
             found_mult_arr.append(m)
         # Если найден хотя бы один множитель
         if len(found_mult_arr) > 0:
@@ -524,14 +546,14 @@ def find_add_val(sku, char_loc, left_pattern_arr, right_pattern_arr, val_pattern
             b = found_mult_arr[-1].span()
             left_add = sku_left_part[b[0] : b[1]]
             str_val_arr = []
-            for m in re.finditer(val_pattern_arr[i], left_add):
+            for m in val_pattern_arr[i].finditer(left_add):
                 str_val_arr.append(m)
             add_val, loc = parse_number(left_add[str_val_arr[-1].span()[0] : str_val_arr[-1].span()[1]])
             # Если число извлечено верно, цикл прерывается, а значение найденного дополнительного значения и возвращается
             if add_val != None:
                 return add_val
         # Поиск первого правого дополнительного значения (самого левого) справа от индикатора характеристики в sku
-        for m in re.finditer(right_pattern_arr[i], sku_right_part):
+        for m in right_pattern_arr[i].finditer(sku_right_part):
             found_mult_arr.append(m)
         # Если найден хотя бы один множитель
         if len(found_mult_arr) > 0:
@@ -539,7 +561,7 @@ def find_add_val(sku, char_loc, left_pattern_arr, right_pattern_arr, val_pattern
             b = found_mult_arr[0].span()
             right_add = sku_right_part[b[0] : b[1]]
             str_val_arr = []
-            for m in re.finditer(val_pattern_arr[i], right_add):
+            for m in val_pattern_arr[i].finditer(right_add):
                 str_val_arr.append(m)
             add_val, loc = parse_number(right_add[str_val_arr[-1].span()[0] : str_val_arr[-1].span()[1]])
             # Если число извлечено верно, цикл прерывается, а значение найденного дополнительного значения и возвращается
@@ -567,28 +589,55 @@ def side_reg_symb_val(val_reg_str_arr, symb_reg_str_arr):
         right_pattern_arr.append("".join(["^", symb_reg_str_arr[i], val_reg_str_arr[i]]))
     return left_pattern_arr, right_pattern_arr
 
+"""
+Компиляция массива строчных регулярных выражений
+
+:param reg_str_arr: массив строчных регулярных выражений
+
+:return: массив скомпилированных регулярных выражений в том же порядке
+"""
+def compile_regs(reg_str_arr):
+    return [re.compile(reg_str) for reg_str in reg_str_arr]
+
+"""
+Компиляция словаря строчных регулярных выражений (например, с ключами "SelfReg", "LeftReg", "RightReg")
+
+:param reg_str_dict: словарь строчных регулярных выражений
+
+:return: словарь скомпилированных регулярных выражений с теми же ключами
+"""
+def compile_reg_dict(reg_str_dict):
+    return {key: re.compile(reg_str) for key, reg_str in reg_str_dict.items()}
+
 """
 Содержит шаблон для поиска постоянного значения характеристики - некоторые условия
 """
 class ConstValuePattern:
     def __init__(self, pattern_param_dict):
         # Регулярное выражение (строковое) для поиска индикатора в SKU, если его нет в patternParam, возвращается ошибка
-        self.reg = ""
+        self.reg = re.compile("")
         if "Reg" in pattern_param_dict:
-            self.reg = pattern_param_dict["Reg"]
+            self.reg = re.compile(pattern_param_dict["Reg"])
             # Константное значение характеристики, если его нет в patternParam, используется пустая строка
             self.val = ""
             if "Val" in pattern_param_dict:
                 self.val = pattern_param_dict["Val"]
+        # Строки, одна из которых обязательно есть в SKU в нижнем регистре, если шаблон срабатывает (None - такие строки не найдены)
+        self.required_literals = find_required_literals(self.reg)
 
     """
     Поиск соответствий регулярному выражению pattern.reg в строке sku, указывающей на то, что характеристика имеет константное значение, записанное в pattern.val
     """
     def parse(self, sku):
         # Приведение SKU к нижнему регистру
-        sku_low = sku.lower()
+        return self.parse_low(sku.lower())
+
+    """
+    Поиск соответствий регулярному выражению pattern.reg в строке sku_low, уже приведенной к нижнему регистру
+    """
+    def parse_low(self, sku_low):
         # Поиск соответствия в строке sku
-        match_arr = re.search(self.reg, sku_low)
+        match_arr = self.reg.search(sku_low)
         # Если найдено хотя бы одно соответствие, возвращается соответствующее значение из pattern
         if match_arr is not None:
             return self.val, [0, 0], ""
@@ -0,0 +1,94 @@
+import re
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+# Максимальное количество символов класса вида [*xх], при котором класс считается набором строк, одна из которых обязательна
+MAX_CLASS_LITERALS = 8
+
+"""
+Поиск строк, одна из которых обязательно содержится в любой строке, в которой есть соответствие регулярному выражению. Если в строке нет ни одной из них, то регулярное выражение
+применять не нужно
+
+:param reg: скомпилированное регулярное выражение
+
+:return: кортеж обязательных строк (достаточно одной из них) или None, если такие строки не найдены
+"""
+def find_required_literals(reg):
+    if reg.flags & re.IGNORECASE:
+        return None
+    try:
+        parsed_reg = sre_parse.parse(reg.pattern, reg.flags)
+    except Exception:
+        return None
+    return best_clause(seq_clauses(list(parsed_reg)))
+
+"""
+Выбор лучшего условия из списка условий: условие тем лучше, чем длиннее самая короткая из его строк и чем меньше в нем строк
+
+:param clauses: список условий - множеств строк, одна из которых обязательна
+
+:return: лучшее условие в виде кортежа строк без лишних строк или None, если условий нет
+"""
+def best_clause(clauses):
+    best = None
+    for clause in clauses:
+        if len(clause) == 0:
+            continue
+        if best is None or (min(map(len, clause)), -len(clause)) > (min(map(len, best)), -len(best)):
+            best = clause
+    if best is None:
+        return None
+    # Строки, содержащие другую строку условия, лишние: если в SKU есть такая строка, то есть и содержащаяся в ней
+    return tuple(sorted(literal for literal in best if not any(other != literal and other in literal for other in best)))
+
+"""
+Составление условий по последовательности элементов разобранного регулярного выражения: подряд идущие символы составляют обязательную строку, обязательные группы, повторения
+и альтернативы разбираются рекурсивно
+
+:param items: элементы разобранного регулярного выражения (список пар (код операции, аргумент))
+
+:return: список условий - множеств строк, одна из которых обязательна
+"""
+def seq_clauses(items):
+    clauses = []
+    literal_run = []
+    for op, arg in items:
+        if op is sre_constants.LITERAL:
+            literal_run.append(chr(arg))
+            continue
+        if op is sre_constants.IN and len(arg) == 1 and arg[0][0] is sre_constants.LITERAL:
+            literal_run.append(chr(arg[0][1]))
+            continue
+        if len(literal_run) > 0:
+            clauses.append(frozenset(["".join(literal_run)]))
+            literal_run = []
+        if op is sre_constants.SUBPATTERN:
+            add_flags, subitems = arg[1], arg[3]
+            if not add_flags & sre_constants.SRE_FLAG_IGNORECASE:
+                clauses.extend(seq_clauses(list(subitems)))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) or op is getattr(sre_constants, 'POSSESSIVE_REPEAT', None):
+            min_count, subitems = arg[0], arg[2]
+            if min_count >= 1:
+                clauses.extend(seq_clauses(list(subitems)))
+        elif op is sre_constants.BRANCH:
+            branch_clause = set()
+            for subitems in arg[1]:
+                alternative_clause = best_clause(seq_clauses(list(subitems)))
+                if alternative_clause is None:
+                    branch_clause = None
+                    break
+                branch_clause.update(alternative_clause)
+            if branch_clause:
+                clauses.append(frozenset(branch_clause))
+        elif op is sre_constants.IN:
+            # Класс из нескольких символов без диапазонов и отрицания: обязателен один из его символов
+            if len(arg) <= MAX_CLASS_LITERALS and all(class_op is sre_constants.LITERAL for class_op, class_arg in arg):
+                clauses.append(frozenset(chr(class_arg) for class_op, class_arg in arg))
+    if len(literal_run) > 0:
+        clauses.append(frozenset(["".join(literal_run)]))
+    return clauses
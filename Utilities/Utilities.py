@@ -1,9 +1,9 @@
-import numpy as np
-
 from datetime import datetime
 from math import floor
 
 def conv_nan(val):
+    import numpy as np
+
     if val is np.nan:
         return None
     return val
@@ -85,3 +85,20 @@ class ListWraper():
         Возвращает результат функции self.func от переменной input в списке
         """
         return [self.func(input)]
+
+class ColumnWraper():
+    """
+    Класс содержащий некоторую функцию от одной переменной и применяющий ее сразу к списку значений с возвращением результатов одним столбцом. Используется для пакетной обработки
+    частей батча функцией, обрабатывающей одну строку
+    """
+    def __init__(self, func):
+        """
+        :param func: некоторая функция от одной переменной
+        """
+        self.func = func
+
+    def func_return_column(self, input_list):
+        """
+        Возвращает список из одного столбца - результатов функции self.func от каждого значения input_list
+        """
+        return [list(map(self.func, input_list))]
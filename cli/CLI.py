@@ -0,0 +1,305 @@
+"""
+Запуск распознавания категорий, очистки SKU, поиска характеристик и составления справочников из командной строки, без графического интерфейса.
+Сообщения о работе и прогресс выводятся в stderr. Запуск из директории приложения (в ней должны быть config и saves):
+
+python -m cli.CLI recognize <справочник> <обрабатываемый файл> <обработанный файл> [параметры]
+python -m cli.CLI clean <обрабатываемый файл> <обработанный файл> [параметры]
+python -m cli.CLI features <обрабатываемый файл> <обработанный файл> --feature <характеристика> [параметры]
+python -m cli.CLI build-directory <название справочника> <excel-файл> [параметры]
+python -m cli.CLI list
+"""
+import sys
+import os
+import json
+import argparse
+
+import multiprocessing as mp
+
+from datetime import datetime
+
+from Utilities.Utilities import set_message_with_countdown
+
+# Модули обработки импортируются в функциях подкоманд: разбор аргументов и --help не ждут импорта pandas и numpy, а процессы пула, запускаемые заново (spawn),
+# импортируют этот модуль без них
+
+# Путь к конфигурации алгоритмов поиска характеристик
+FEATURE_PARSER_CONFIG_PATH = os.path.join('config', 'feature_parser_config.json')
+# Максимальная длина батча по умолчанию (совпадает с графическим интерфейсом)
+DEFAULT_MAX_BATCH_LEN = 100000
+# Ширина полосы прогресса в символах
+PROGRESS_BAR_WIDTH = 40
+
+
+class ConsoleOutput:
+    """
+    Вывод сообщений и прогресса в поток stream (по умолчанию stderr). Содержит функции reset, set и используется как progress bar обработчиков SKU;
+    полоса прогресса рисуется, только если поток - терминал, иначе выводятся только сообщения
+    """
+    def __init__(self, stream=None, quiet=False):
+        """
+        :param stream: поток вывода, по умолчанию sys.stderr
+        :param quiet: флаг вывода только сообщений об ошибках, по умолчанию False (bool)
+        """
+        self.stream = sys.stderr if stream is None else stream
+        self.quiet = quiet
+        self.draw_progress = not quiet and self.stream.isatty()
+        # Значение отображаемой величины, соответствующее 100%, и текущее значение
+        self.max_value = 100
+        self.value = 0
+        # Флаг того, что последняя строка потока - полоса прогресса
+        self.progress_shown = False
+
+    def set_message(self, msg):
+        """
+        Вывод сообщения; полоса прогресса выводится заново под сообщением
+
+        :param msg: строка сообщения (str)
+        """
+        if self.quiet and 'ERROR!!!' not in msg:
+            return
+        if self.progress_shown:
+            self.stream.write('\r\033[K')
+        self.stream.write("".join([msg, '\n']))
+        if self.progress_shown:
+            self.write_progress()
+        self.stream.flush()
+
+    def reset(self, max_value):
+        """
+        Перезапуск прогресса - присвоение максимального значения, соответствующего 100%, и выставление нулевого значения
+
+        :param max_value: значение отображаемой величины, соответствующее 100%
+        """
+        self.max_value = max_value
+        self.set(0)
+
+    def set(self, value):
+        """
+        Выставление значения прогресса
+
+        :param value: выставляемое значение прогресса (абсолютное)
+        """
+        self.value = value
+        if self.draw_progress:
+            self.write_progress()
+            self.stream.flush()
+
+    def write_progress(self):
+        """
+        Вывод полосы прогресса в текущую строку потока
+        """
+        share = min(self.value / self.max_value, 1.) if self.max_value > 0 else 1.
+        filled_len = int(share * PROGRESS_BAR_WIDTH)
+        self.stream.write("".join(['\r[', '#' * filled_len, '.' * (PROGRESS_BAR_WIDTH - filled_len), '] ', str(int(share * 100)), '% (', str(self.value), '/',
+                                   str(self.max_value), ')']))
+        self.progress_shown = True
+
+    def finish(self):
+        """
+        Завершение строки полосы прогресса
+        """
+        if self.progress_shown:
+            self.stream.write('\n')
+            self.stream.flush()
+            self.progress_shown = False
+
+
+def load_feature_parser_config():
+    """
+    :return: конфигурация алгоритмов поиска характеристик (содержание feature_parser_config.json) или пустой словарь, если файла нет (dict)
+    """
+    try:
+        with open(FEATURE_PARSER_CONFIG_PATH, encoding='utf-8') as config_file:
+            return json.load(config_file)
+    except OSError:
+        return {}
+
+def get_processing_kwargs(args):
+    """
+    Общие параметры обработчиков SKU из аргументов командной строки
+
+    :param args: разобранные аргументы командной строки (argparse.Namespace)
+
+    :return: именованные параметры обработчика SKU (dict)
+    """
+    return {'pipelined': args.pipelined,
+            'pipeline_depth': args.pipeline_depth,
+            'workers_read_input': args.workers_read_input,
+            'dedup_sku': args.dedup,
+            'result_cache_size': args.result_cache_size,
+            'use_checkpoint': args.checkpoint,
+            'resume': args.resume,
+            'cache_line_index': args.cache_line_index}
+
+def run_recognize(args, console):
+    """
+    Распознавание категорий по SKU из обрабатываемого файла по справочнику из saves
+    """
+    from DataProcessing.DataProcessing import CategoryRecognizer
+    from CategoryDirectory.DirectorySaves import load_directory
+
+    # Справочник читается процессами пула из общего отображенного в память файла, если не нужен автомат Ахо-Корасик
+    sel_dir = load_directory(args.directory, args.aho_corasick, shared=not args.aho_corasick)
+    console.set_message("".join(['Справочник \"', args.directory, '\" загружен для использования в дальнейшей обработки SKU']))
+    CategoryRecognizer(args.input, args.sheet, args.column, args.output, sel_dir, args.batch_len, args.dec_id, args.threads, console.set_message, console, None,
+                       args.aho_corasick, **get_processing_kwargs(args))
+
+def run_clean(args, console):
+    """
+    Очистка SKU из обрабатываемого файла по шаблону очистки
+    """
+    from DataProcessing.DataProcessing import SKUCleaner
+
+    SKUCleaner(args.input, args.sheet, args.column, args.output, args.batch_len, args.pattern, args.threads, console.set_message, console, None,
+               **get_processing_kwargs(args))
+
+def run_features(args, console):
+    """
+    Поиск одной или нескольких характеристик в SKU из обрабатываемого файла
+    """
+    from DataProcessing.DataProcessing import FeatureParser
+    from FeatureParser.FeatureParser import FeatureParser as FP, MultiFeatureParser
+
+    config = load_feature_parser_config()
+    unknown_features = [feature_label for feature_label in args.feature if feature_label not in config]
+    if len(unknown_features) > 0:
+        raise Exception(" ".join(['Характеристики не найдены в', FEATURE_PARSER_CONFIG_PATH, ':', ", ".join(unknown_features)]))
+    if len(args.feature) == 1:
+        feature_label = args.feature[0]
+        feature_parser = FP(config[feature_label], args.screening)
+    else:
+        feature_label = args.feature
+        feature_parser = MultiFeatureParser(config, args.feature, args.screening)
+    console.set_message(" ".join(['Алгоритм для поиска характеристики', ", ".join(args.feature), 'составлен']))
+    FeatureParser(args.input, args.sheet, args.column, args.output, feature_label, feature_parser, args.batch_len, args.threads, args.remove_feature, args.pattern_check,
+                  console.set_message, console, None, **get_processing_kwargs(args))
+
+def run_build_directory(args, console):
+    """
+    Составление справочника по excel-файлу и его сохранение в saves
+    """
+    from CategoryDirectory.CategoryDirectory import CategoryDirectory
+    from CategoryDirectory.DirectorySaves import save_directory
+    from DataProcessing.SKUPreprocessing import preprocess_sku_for_recognizing
+
+    timer_start = datetime.now()
+    category_dir = CategoryDirectory(args.name, args.data_path, args.sheet, args.category_col, args.main_col, args.main_limit_col, args.add_limit_col, args.excluding_col,
+                                     preprocess_sku_for_recognizing, console.set_message)
+    set_message_with_countdown("".join(['Сохранение справочника \"', args.name, '\"']), timer_start, console.set_message)
+    save_directory(category_dir, args.name)
+    set_message_with_countdown("".join(['Справочник \"', args.name, '\" составлен и сохранен']), timer_start, console.set_message)
+
+def run_list(args, console):
+    """
+    Вывод в stdout названий сохраненных справочников, шаблонов очистки и характеристик
+    """
+    from CategoryDirectory.DirectorySaves import find_directories
+    from DataProcessing.SKUPreprocessing import CLEAR_PATTERNS_DICT
+
+    print('Справочники:')
+    for dir_name in find_directories():
+        print("".join(['\t', dir_name]))
+    print('Шаблоны очистки:')
+    for pattern_name in CLEAR_PATTERNS_DICT:
+        print("".join(['\t', pattern_name]))
+    print('Характеристики:')
+    for feature_label in load_feature_parser_config():
+        print("".join(['\t', feature_label]))
+
+def add_processing_arguments(parser):
+    """
+    Добавление в parser аргументов, общих для обработчиков SKU
+
+    :param parser: парсер аргументов подкоманды (argparse.ArgumentParser)
+    """
+    parser.add_argument('input', help='путь к обрабатываемому файлу (csv, txt или excel)')
+    parser.add_argument('output', help='путь к обработанному файлу (csv)')
+    parser.add_argument('--sheet', default='', help='название листа SKU в обрабатываемом excel-файле, по умолчанию первый лист')
+    parser.add_argument('--column', default='', help='название столбца SKU в обрабатываемом файле, по умолчанию первый столбец')
+    parser.add_argument('--batch-len', type=int, default=DEFAULT_MAX_BATCH_LEN, help='максимальное количество строк SKU в батче')
+    parser.add_argument('--threads', type=int, default=mp.cpu_count(), help='количество процессов обработки, по умолчанию все доступные')
+    parser.add_argument('--pipelined', action='store_true', help='чтение, обработка и запись батчей одновременно в разных потоках')
+    parser.add_argument('--pipeline-depth', type=int, default=2, help='максимальное количество батчей, ожидающих обработки или записи при --pipelined')
+    parser.add_argument('--workers-read-input', action='store_true', help='чтение частей батчей из csv-файла самими процессами пула')
+    parser.add_argument('--dedup', action='store_true', help='обработка каждой уникальной строки SKU батча один раз')
+    parser.add_argument('--result-cache-size', type=int, default=0, help='количество результатов, хранимых между батчами при --dedup')
+    parser.add_argument('--checkpoint', action='store_true', help='сохранение контрольной точки после записи каждого батча')
+    parser.add_argument('--resume', action='store_true', help='продолжение прерванной обработки с контрольной точки')
+    parser.add_argument('--cache-line-index', action='store_true', help='хранение индекса строк csv, txt-файла рядом с ним (<обрабатываемый файл>.lines.npz) для повторных обработок')
+
+def create_parser():
+    """
+    :return: парсер аргументов командной строки (argparse.ArgumentParser)
+    """
+    parser = argparse.ArgumentParser(prog='python -m cli.CLI', description='Распознавание категорий, очистка SKU и поиск характеристик без графического интерфейса')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    # Аргументы, общие для всех подкоманд
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument('--quiet', action='store_true', help='выводить только сообщения об ошибках')
+
+    recognize_parser = subparsers.add_parser('recognize', help='распознавание категорий по справочнику', parents=[common_parser])
+    recognize_parser.add_argument('directory', help='название справочника из saves')
+    add_processing_arguments(recognize_parser)
+    recognize_parser.add_argument('--dec-id', action='store_true', help='выводить решающие идентификаторы')
+    recognize_parser.add_argument('--aho-corasick', action='store_true', help='искать идентификаторы автоматом Ахо-Корасик')
+    recognize_parser.set_defaults(func=run_recognize)
+
+    clean_parser = subparsers.add_parser('clean', help='очистка SKU', parents=[common_parser])
+    add_processing_arguments(clean_parser)
+    clean_parser.add_argument('--pattern', default='Базовый', help='название шаблона очистки')
+    clean_parser.set_defaults(func=run_clean)
+
+    features_parser = subparsers.add_parser('features', help='поиск характеристик', parents=[common_parser])
+    add_processing_arguments(features_parser)
+    features_parser.add_argument('--feature', action='append', required=True, help='название характеристики из config/feature_parser_config.json; '
+                                                                                    'повторяется, чтобы искать несколько характеристик за один проход')
+    features_parser.add_argument('--remove-feature', action='store_true', help='выводить SKU без найденной характеристики')
+    features_parser.add_argument('--pattern-check', action='store_true', help='выводить название шаблона, по которому найдена характеристика')
+    features_parser.add_argument('--screening', action='store_true', help='предварительный поиск обязательных строк шаблонов общим регулярным выражением')
+    features_parser.set_defaults(func=run_features)
+
+    build_parser = subparsers.add_parser('build-directory', help='составление справочника и сохранение его в saves', parents=[common_parser])
+    build_parser.add_argument('name', help='название составляемого справочника')
+    build_parser.add_argument('data_path', help='путь к excel-файлу с данными для справочника')
+    build_parser.add_argument('--sheet', default='', help='название листа, по умолчанию первый лист')
+    build_parser.add_argument('--category-col', default='', help='столбец обозначений категорий, по умолчанию первый столбец')
+    build_parser.add_argument('--main-col', default='', help='столбец основных идентификаторов, по умолчанию второй столбец')
+    build_parser.add_argument('--main-limit-col', default='', help='столбец основных ограничивающих идентификаторов, по умолчанию третий столбец')
+    build_parser.add_argument('--add-limit-col', default='', help='столбец дополнительных ограничивающих идентификаторов, по умолчанию четвертый столбец')
+    build_parser.add_argument('--excluding-col', default='', help='столбец исключающих идентификаторов, по умолчанию пятый столбец')
+    build_parser.set_defaults(func=run_build_directory)
+
+    list_parser = subparsers.add_parser('list', help='названия сохраненных справочников, шаблонов очистки и характеристик', parents=[common_parser])
+    list_parser.set_defaults(func=run_list)
+    return parser
+
+def main(argv=None):
+    """
+    Разбор аргументов командной строки и запуск выбранной подкоманды
+
+    :param argv: аргументы командной строки, по умолчанию sys.argv[1:] (list)
+
+    :return: код завершения: 0 - успешно, 1 - ошибка, 130 - прервано пользователем (int)
+    """
+    args = create_parser().parse_args(argv)
+    console = ConsoleOutput(quiet=args.quiet)
+    try:
+        args.func(args, console)
+    except KeyboardInterrupt:
+        console.finish()
+        console.set_message('Обработка прервана')
+        return 130
+    except Exception as e:
+        console.finish()
+        # Ошибки обработчиков уже выведены через set_message, остальные выводятся здесь
+        if str(e) != 'ERROR!!!':
+            console.set_message(" ".join(['ERROR!!!', str(e)]))
+        return 1
+    console.finish()
+    return 0
+
+
+if __name__ == "__main__":
+    # Для того, чтобы exe-файл работал в Windows
+    mp.freeze_support()
+    sys.exit(main())
@@ -1,7 +1,6 @@
 import sys
 import os
 import json
-import pickle
 
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QIntValidator, QIcon
@@ -9,9 +8,10 @@ from PyQt5.QtCore import QObject, QThread, pyqtSignal
 
 import multiprocessing as mp
 
-from DataProcessing.DataProcessing import CategoryRecognizer, SKUCleaner, FeatureParser
+# Обработчики SKU (pandas) импортируются при запуске обработки, чтобы окно приложения открывалось быстрее
 from DataProcessing.SKUPreprocessing import CLEAR_PATTERNS_DICT, preprocess_sku_for_recognizing
 from CategoryDirectory.CategoryDirectory import CategoryDirectory
+from CategoryDirectory.DirectorySaves import find_directories, save_directory, load_directory
 from FeatureParser.FeatureParser import FeatureParser as FP
 
 
@@ -145,6 +145,10 @@ class ProcessingTab(AppGUI):
         # Чекбокс вывода идентификаторов
         self.id_output_check = QCheckBox("Выводить соответствующие идентифиаторы", self)
         tab_layout.addWidget(self.id_output_check)
+
+        # Чекбокс поиска идентификаторов автоматом Ахо-Корасик
+        self.aho_corasick_check = QCheckBox("Искать идентификаторы автоматом Ахо-Корасик", self)
+        tab_layout.addWidget(self.aho_corasick_check)
         
         # Блок параметров вычислений
         #   Макет-сетка
@@ -213,11 +217,7 @@ class ProcessingTab(AppGUI):
         :return: добавляет названия доступных справочников в комбобокс выбора справочника
         """
         self.select_dir_combo.clear()
-        try:
-            dir_list = os.listdir('saves')
-        except:
-            dir_list = []
-        self.select_dir_combo.addItems(dir_list)
+        self.select_dir_combo.addItems(find_directories())
     
     def input_file_path_btn_click(self):
         """
@@ -259,6 +259,7 @@ class ProcessingTab(AppGUI):
             self.max_batch_len_line_edit.setText(dir_tab_config['max_batch_len'])
             self.id_output_check.setChecked(dir_tab_config['dec_id'])
             self.sku_sheet_name_line_edit.setText(dir_tab_config['sku_sheet_name'])
+            self.aho_corasick_check.setChecked(dir_tab_config['aho_corasick'])
         except:
             pass
     
@@ -275,7 +276,8 @@ class ProcessingTab(AppGUI):
                            'output_data_path': self.output_file_path_line_edit.text(),
                            'use_threads_count': self.use_threads_count_line_edit.text(),
                            'max_batch_len': self.max_batch_len_line_edit.text(),
-                           'dec_id': self.id_output_check.isChecked()
+                           'dec_id': self.id_output_check.isChecked(),
+                           'aho_corasick': self.aho_corasick_check.isChecked()
                           }
 
     def save_config(self):
@@ -304,8 +306,11 @@ class ProcessingTab(AppGUI):
         try:
             try:
                 # Сбор данных из GUI и определение параметров файла с данными для обработки, подготовка к началу рассчетов
-                #   Загрузка выбранного справочника, по нему будет идти распознавание категорий
-                sel_dir = load_directory(self.select_dir_combo.currentText())
+                # Флаг, означающий, что идентификаторы ищутся автоматом Ахо-Корасик
+                use_aho_corasick = self.aho_corasick_check.isChecked()
+                #   Загрузка выбранного справочника, по нему будет идти распознавание категорий; автомат Ахо-Корасик загружается, только если он нужен,
+                #   иначе справочник читается процессами пула из общего отображенного в память файла
+                sel_dir = load_directory(self.select_dir_combo.currentText(), use_aho_corasick, shared=not use_aho_corasick)
                 #   Сообщение о завершении загрузки справочника
                 self.app_win.worker.set_message_to_gui_from_thread("".join(['Справочник \"', self.select_dir_combo.currentText(), '\" загружен для использования в дальнейшей обработки SKU']))
                 #self.app_win.info_win.set_message_to_gui("".join(['Справочник \"', self.select_dir_combo.currentText(), '\" загружен для использования в дальнейшей обработки SKU']))
@@ -342,8 +347,9 @@ class ProcessingTab(AppGUI):
                 raise Exception("ERROR!!!")
 
             # Распознавание SKU из обрабатываемого файла в соответствии заданному справочнику и запись результатов обработки в обработанный файл
+            from DataProcessing.DataProcessing import CategoryRecognizer
             CategoryRecognizer(input_data_path, sku_sheet_name, sku_col_name, output_data_path, sel_dir, max_batch_len, get_dec_id, use_threads_count,
-            self.app_win.worker.set_message_to_gui_from_thread, ThreadProgressBar(self.app_win.worker), self.app_win.is_running_flag)
+            self.app_win.worker.set_message_to_gui_from_thread, ThreadProgressBar(self.app_win.worker), self.app_win.is_running_flag, use_aho_corasick)
             #self.app_win.info_win.set_message_to_gui, self.pbar)
             #   Сохранение считанных строк окна в конфигурационный файл json, в следующую сессию эти строки записываются при открытии окна
             try:
@@ -599,26 +605,6 @@ class DirectoryTab(AppGUI):
             # Сигнал о завершении процесса
             self.app_win.worker.finished.emit()
 
-def save_directory(dir, dir_name):
-    """
-    :param dir: справочик категорий - объект CategoryDirectory, который сохраняется в диреторию saves
-    :param dir_name: название справочника категорий dir, под которым он будет сохраняться
-
-    :return: сохраняет справочник dir в директорию saves с названием dir_name; если директория saves отсутствует, создает ее
-    """
-    if not os.path.exists('saves'):
-        os.makedirs('saves')
-    with open(os.path.join('saves', dir_name), 'wb') as file:
-        pickle.dump(dir, file, protocol=pickle.HIGHEST_PROTOCOL)
-
-def load_directory(dir_name):
-    """
-    Загружает справочник по заданному пути, если папка с сохраненными справочниками существует
-    :param dir_name: путь до загружаемого справочника
-    :return: справочник по заданному пути, объект CategoryDirectory
-    """
-    with open(os.path.join('saves', dir_name), 'rb') as file:
-        return pickle.load(file)
 
 class SKUCleanTab(AppGUI):
     """
@@ -895,6 +881,7 @@ class SKUCleanTab(AppGUI):
                 self.app_win.worker.set_message_to_gui_from_thread(error_message(str(e)))
                 raise Exception("ERROR!!!")
             # Распознавание SKU из обрабатываемого файла в соответствии заданному справочнику и запись результатов обработки в обработанный файл
+            from DataProcessing.DataProcessing import SKUCleaner
             SKUCleaner(input_data_path, sku_sheet_name, sku_col_name, output_data_path, max_batch_len, clean_pattern, use_threads_count,
             self.app_win.worker.set_message_to_gui_from_thread, ThreadProgressBar(self.app_win.worker), self.app_win.is_running_flag)
             #self.app_win.info_win.set_message_to_gui, self.pbar, self.app_win.is_running_flag)
@@ -1218,6 +1205,7 @@ class FeatureParsingTab(AppGUI):
                 #raise Exception("ERROR!!!")
 
             # Поиск характеристик из обрабатываемого файла в соответствии заданному справочнику и запись результатов обработки в обработанный файл
+            from DataProcessing.DataProcessing import FeatureParser
             FeatureParser(input_data_path, sku_sheet_name, sku_col_name, output_data_path, feature_label, feature_parser, max_batch_len, use_threads_count, remove_feature_check, pattern_check,
             self.app_win.worker.set_message_to_gui_from_thread, ThreadProgressBar(self.app_win.worker), self.app_win.is_running_flag)
             #self.app_win.info_win.set_message_to_gui, self.pbar)
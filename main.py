@@ -1,10 +1,10 @@
 import multiprocessing as mp
 
-from gui.GUI import run_app
-
 
 if __name__== "__main__":
     # Для того, чтобы exe-файл работал в Windows
     mp.freeze_support()
+    # Графический интерфейс импортируется только в главном процессе: процессы пула, запускаемые заново (spawn), импортируют main.py без PyQt5 и модулей обработки
+    from gui.GUI import run_app
     # Запуск окна приложения
     run_app()
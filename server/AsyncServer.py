@@ -0,0 +1,230 @@
+"""
+HTTP-сервис распознавания категорий на asyncio с микропакетной обработкой: одиночные запросы собираются в пакеты (см. server.MicroBatcher), которые обрабатываются
+пулом процессов, хранящим справочник. Запуск из директории приложения (в ней должны быть config и saves):
+
+python -m server.AsyncServer --directory <справочник> [--workers 4] [--max-batch-len 256] [--max-delay-ms 5] [--port 8081]
+
+POST /recognize {"sku": "..."} -> {"result": <категория>}; {"skus": [...]} -> {"results": [...]} (каждый SKU ставится в очередь отдельно)
+GET /metrics -> глубина очереди, количество обрабатываемых пакетов, размеры пакетов и задержки
+При ошибке в запросе возвращается код 400, при слишком большом запросе - 413, при заполненной очереди - 503, и {"error": <сообщение>}
+"""
+import sys
+import json
+import argparse
+import asyncio
+
+import multiprocessing as mp
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from http import HTTPStatus
+
+from CategoryDirectory.DirectorySaves import load_directory
+from DataProcessing.PoolWorker import init_pool_worker, call_pool_worker_func
+from server.MicroBatcher import MicroBatcher, ColumnsToRows, QueueFullError
+from server.RecognitionService import ServiceRequestError, DEC_ID_RESULT_KEYS
+from server.Server import to_json_value, MAX_REQUEST_BODY_LEN
+from Utilities.Utilities import set_message_with_countdown
+
+
+class AsyncRecognitionApp:
+    """
+    Обработка HTTP-запросов распознавания категорий через микропакетный диспетчер
+    """
+    def __init__(self, batcher, get_dec_id=False):
+        """
+        :param batcher: диспетчер, результаты которого - кортежи столбцов identify_category_batch или identify_category_and_dec_id_batch по SKU (MicroBatcher)
+        :param get_dec_id: флаг вывода решающих идентификаторов (bool)
+        """
+        self.batcher = batcher
+        self.get_dec_id = get_dec_id
+
+    async def recognize(self, sku):
+        """
+        :param sku: строка SKU (str)
+
+        :return: обозначение категории или, если self.get_dec_id, словарь с категорией и решающими идентификаторами
+        """
+        if not isinstance(sku, str):
+            raise ServiceRequestError('SKU должен быть строкой')
+        row = await self.batcher.submit(sku)
+        if self.get_dec_id:
+            return dict(zip(DEC_ID_RESULT_KEYS, row))
+        return row[0]
+
+    async def handle(self, method, path, body):
+        """
+        Обработка запроса
+
+        :param method: метод HTTP (str)
+        :param path: путь запроса (str)
+        :param body: тело запроса (bytes)
+
+        :return: код ответа HTTP и содержание ответа (tuple)
+        """
+        if method == 'GET' and path == '/metrics':
+            return 200, self.batcher.get_metrics()
+        if method != 'POST' or path != '/recognize':
+            return 404, {'error': " ".join(['Неизвестный запрос', method, path])}
+        try:
+            try:
+                request = json.loads(body.decode('utf-8'))
+            except ValueError as e:
+                raise ServiceRequestError(" ".join(['Тело запроса не является JSON:', str(e)]))
+            if not isinstance(request, dict):
+                raise ServiceRequestError('Тело запроса должно быть JSON-объектом')
+            if 'sku' in request:
+                return 200, {'result': await self.recognize(request['sku'])}
+            sku_rows = request.get('skus')
+            if not isinstance(sku_rows, list):
+                raise ServiceRequestError('В запросе должен быть "sku" или список "skus"')
+            return 200, {'results': await asyncio.gather(*[self.recognize(sku) for sku in sku_rows])}
+        except ServiceRequestError as e:
+            return 400, {'error': str(e)}
+        except QueueFullError as e:
+            return 503, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': " ".join(['ERROR!!!', str(e)])}
+
+    async def handle_connection(self, reader, writer):
+        """
+        Чтение запросов HTTP/1.1 из соединения и отправка ответов; соединение остается открытым для следующих запросов (keep-alive), пока клиент его не закроет
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header_line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                # Тело запроса с неверной или слишком большой длиной не читается: после ответа соединение закрывается
+                try:
+                    body_len = int(headers.get('content-length', 0))
+                except ValueError:
+                    body_len = -1
+                if body_len < 0:
+                    await self.write_response(writer, 400, {'error': 'Неверный заголовок Content-Length'}, False)
+                    break
+                if body_len > MAX_REQUEST_BODY_LEN:
+                    await self.write_response(writer, 413, {'error': 'Слишком большой запрос'}, False)
+                    break
+                body = await reader.readexactly(body_len)
+                status, data = await self.handle(method, path, body)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self.write_response(writer, status, data, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # Оборванное соединение или неверная строка запроса: соединение закрывается
+            pass
+        finally:
+            writer.close()
+
+    async def write_response(self, writer, status, data, keep_alive):
+        """
+        Отправка ответа с JSON-телом
+
+        :param writer: поток записи соединения (asyncio.StreamWriter)
+        :param status: код ответа HTTP (int)
+        :param data: содержание ответа (dict)
+        :param keep_alive: флаг того, что соединение остается открытым для следующих запросов (bool)
+        """
+        response_body = json.dumps(data, ensure_ascii=False, default=to_json_value).encode('utf-8')
+        writer.write("".join(['HTTP/1.1 ', str(status), ' ', HTTPStatus(status).phrase, '\r\n',
+                              'Content-Type: application/json; charset=utf-8\r\n',
+                              'Content-Length: ', str(len(response_body)), '\r\n',
+                              'Connection: ', 'keep-alive' if keep_alive else 'close', '\r\n\r\n']).encode('latin-1'))
+        writer.write(response_body)
+        await writer.drain()
+
+
+def create_batcher(directory, get_dec_id=False, use_aho_corasick=False, workers=0, max_batch_len=256, max_delay_ms=5., max_queue_len=100000):
+    """
+    Создание микропакетного диспетчера распознавания категорий по справочнику directory
+
+    :param directory: справочник (CategoryDirectory или SharedCategoryDirectory)
+    :param get_dec_id: флаг вывода решающих идентификаторов (bool)
+    :param use_aho_corasick: флаг поиска идентификаторов автоматом Ахо-Корасик (bool)
+    :param workers: количество процессов пула, хранящих справочник; 0 - пакеты обрабатываются в потоке текущего процесса (int)
+    :param max_batch_len: максимальное количество SKU в пакете (int)
+    :param max_delay_ms: максимальное время ожидания пакета (мс) (float)
+    :param max_queue_len: максимальное количество SKU, ожидающих отправки в пул (int)
+
+    :return: диспетчер (MicroBatcher)
+    """
+    if get_dec_id:
+        batch_func = ColumnsToRows(partial(directory.identify_category_and_dec_id_batch, use_aho_corasick=use_aho_corasick))
+    else:
+        batch_func = ColumnsToRows(partial(directory.identify_category_batch, use_aho_corasick=use_aho_corasick))
+    if workers <= 0:
+        return MicroBatcher(batch_func, None, max_batch_len, max_delay_ms, 1, max_queue_len)
+    # Справочник передается каждому процессу пула один раз при его создании; общий справочник (SharedCategoryDirectory) передается только путем к файлу
+    executor = ProcessPoolExecutor(workers, initializer=init_pool_worker, initargs=(batch_func, True))
+    # Запуск процессов пула до приема запросов
+    list(executor.map(call_pool_worker_func, [[''] for _ in range(workers)]))
+    return MicroBatcher(call_pool_worker_func, executor, max_batch_len, max_delay_ms, workers, max_queue_len)
+
+def create_parser():
+    """
+    :return: парсер аргументов командной строки (argparse.ArgumentParser)
+    """
+    parser = argparse.ArgumentParser(prog='python -m server.AsyncServer', description='HTTP-сервис распознавания категорий с микропакетной обработкой запросов')
+    parser.add_argument('--directory', required=True, help='название справочника из saves')
+    parser.add_argument('--dec-id', action='store_true', help='выводить решающие идентификаторы')
+    parser.add_argument('--aho-corasick', action='store_true', help='искать идентификаторы автоматом Ахо-Корасик')
+    parser.add_argument('--workers', type=int, default=mp.cpu_count(), help='количество процессов пула; 0 - обработка в текущем процессе')
+    parser.add_argument('--max-batch-len', type=int, default=256, help='максимальное количество SKU в пакете')
+    parser.add_argument('--max-delay-ms', type=float, default=5., help='максимальное время ожидания пакета (мс): больше - крупнее пакеты, меньше - меньше задержка')
+    parser.add_argument('--max-queue-len', type=int, default=100000, help='максимальное количество SKU в очереди, при превышении запросы отклоняются (503)')
+    parser.add_argument('--host', default='127.0.0.1', help='адрес сервиса, по умолчанию принимаются только локальные запросы')
+    parser.add_argument('--port', type=int, default=8081, help='порт сервиса')
+    return parser
+
+async def serve(app, host, port, set_msg_func):
+    """
+    Прием соединений до отмены (Ctrl+C)
+    """
+    server = await asyncio.start_server(app.handle_connection, host, port)
+    set_msg_func("".join(['Сервис запущен: http://', host, ':', str(server.sockets[0].getsockname()[1])]))
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    """
+    Загрузка справочника, запуск пула процессов и HTTP-сервиса до прерывания (Ctrl+C)
+
+    :param argv: аргументы командной строки, по умолчанию sys.argv[1:] (list)
+
+    :return: код завершения: 0 - сервис остановлен, 1 - ошибка загрузки (int)
+    """
+    args = create_parser().parse_args(argv)
+    timer_start = datetime.now()
+    set_msg_func = lambda msg: set_message_with_countdown(msg, timer_start, lambda line: print(line, file=sys.stderr, flush=True))
+    try:
+        directory = load_directory(args.directory, args.aho_corasick, shared=not args.aho_corasick)
+        set_msg_func("".join(['Справочник \"', args.directory, '\" загружен']))
+        batcher = create_batcher(directory, args.dec_id, args.aho_corasick, args.workers, args.max_batch_len, args.max_delay_ms, args.max_queue_len)
+    except Exception as e:
+        set_msg_func(" ".join(['ERROR!!!', str(e)]))
+        return 1
+    try:
+        asyncio.run(serve(AsyncRecognitionApp(batcher, args.dec_id), args.host, args.port, set_msg_func))
+    except KeyboardInterrupt:
+        set_msg_func('Сервис остановлен')
+    finally:
+        if batcher.executor is not None:
+            batcher.executor.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    # Для того, чтобы exe-файл работал в Windows
+    mp.freeze_support()
+    sys.exit(main())
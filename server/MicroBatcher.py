@@ -0,0 +1,188 @@
+"""
+Микропакетная обработка одиночных запросов: запросы, пришедшие в течение max_delay_ms или до набора max_batch_len штук, обрабатываются одним пакетом в пуле процессов,
+результат каждого запроса возвращается через его future. Чем больше max_delay_ms и max_batch_len, тем больше пакеты и пропускная способность и тем больше задержка
+одиночного запроса при малой нагрузке
+"""
+import asyncio
+import time
+
+
+class QueueFullError(Exception):
+    """
+    Очередь ожидающих запросов заполнена, запрос не принят
+    """
+
+
+class ColumnsToRows:
+    """
+    Пакетная функция, результат которой - список столбцов (как у identify_category_batch), приведенная к списку результатов по строкам.
+    Передается процессам пула, поэтому функция batch_func должна сериализоваться pickle
+    """
+    def __init__(self, batch_func):
+        """
+        :param batch_func: функция от списка строк SKU, возвращающая список столбцов результатов
+        """
+        self.batch_func = batch_func
+
+    def __call__(self, sku_rows):
+        """
+        :return: результаты по строкам sku_rows - кортежи значений столбцов (list)
+        """
+        return list(zip(*self.batch_func(sku_rows)))
+
+
+class BatcherStats:
+    """
+    Статистика микропакетной обработки: принятые, отклоненные и обработанные запросы, пакеты, глубина очереди и задержки
+    """
+    def __init__(self):
+        self.submitted_count = 0
+        self.rejected_count = 0
+        self.completed_count = 0
+        self.failed_count = 0
+        self.batch_count = 0
+        # Пакеты, отправленные по заполнению и по истечении max_delay_ms
+        self.full_batch_count = 0
+        self.timer_batch_count = 0
+        self.max_batch_len = 0
+        self.max_queue_depth = 0
+        # Суммы задержек запросов от приема до результата и от приема до отправки в пул (с)
+        self.latency_sum = 0.
+        self.max_latency = 0.
+        self.queue_wait_sum = 0.
+
+
+class MicroBatcher:
+    """
+    Диспетчер asyncio, собирающий одиночные запросы в пакеты для функции batch_func, которая выполняется в executor (пуле процессов)
+    """
+    def __init__(self, batch_func, executor=None, max_batch_len=256, max_delay_ms=5., max_in_flight=1, max_queue_len=100000):
+        """
+        :param batch_func: функция от списка запросов, возвращающая список результатов в том же порядке; при executor - пуле процессов должна сериализоваться pickle
+        :param executor: пул, в котором выполняется batch_func (concurrent.futures.Executor), по умолчанию None - пул потоков цикла событий
+        :param max_batch_len: максимальное количество запросов в пакете; пакет отправляется сразу, как только он набран (int)
+        :param max_delay_ms: максимальное время ожидания первого запроса пакета до его отправки (мс) (float)
+        :param max_in_flight: максимальное количество одновременно обрабатываемых пакетов, обычно равно количеству процессов пула (int)
+        :param max_queue_len: максимальное количество ожидающих отправки запросов, при превышении запросы отклоняются (QueueFullError) (int)
+        """
+        self.batch_func = batch_func
+        self.executor = executor
+        self.max_batch_len = max_batch_len
+        self.max_delay = max_delay_ms / 1000.
+        self.max_in_flight = max_in_flight
+        self.max_queue_len = max_queue_len
+        # Ожидающие отправки запросы: (запрос, future, время приема)
+        self.pending = []
+        # Количество пакетов, обрабатываемых в пуле
+        self.in_flight = 0
+        # Таймер отправки неполного пакета
+        self.timer = None
+        self.stats = BatcherStats()
+
+    async def submit(self, item):
+        """
+        Прием одиночного запроса и ожидание его результата
+
+        :param item: запрос (строка SKU)
+
+        :return: результат batch_func для item
+        """
+        if len(self.pending) >= self.max_queue_len:
+            self.stats.rejected_count += 1
+            raise QueueFullError("".join(['Очередь заполнена: ', str(len(self.pending)), ' запросов ожидают обработки']))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((item, future, time.perf_counter()))
+        self.stats.submitted_count += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, len(self.pending))
+        self.schedule_flush()
+        return await future
+
+    def schedule_flush(self):
+        """
+        Отправка набранных пакетов, пока есть свободные места в пуле; неполный пакет ждет таймера, пока его первый запрос ждет меньше max_delay_ms
+        """
+        now = time.perf_counter()
+        while len(self.pending) > 0 and self.in_flight < self.max_in_flight:
+            if len(self.pending) >= self.max_batch_len:
+                self.stats.full_batch_count += 1
+            elif now - self.pending[0][2] >= self.max_delay:
+                self.stats.timer_batch_count += 1
+            else:
+                break
+            batch = self.pending[:self.max_batch_len]
+            del self.pending[:self.max_batch_len]
+            self.in_flight += 1
+            asyncio.ensure_future(self.run_batch(batch))
+        # Таймер для первого запроса, который еще не отправлен
+        if len(self.pending) > 0 and self.timer is None and self.in_flight < self.max_in_flight:
+            delay = max(self.max_delay - (now - self.pending[0][2]), 0.)
+            self.timer = asyncio.get_running_loop().call_later(delay, self.on_timer)
+
+    def on_timer(self):
+        """
+        Отправка неполного пакета по истечении max_delay_ms
+        """
+        self.timer = None
+        self.schedule_flush()
+
+    async def run_batch(self, batch):
+        """
+        Обработка пакета в пуле и передача результатов в future запросов
+
+        :param batch: запросы пакета: (запрос, future, время приема) (list)
+        """
+        loop = asyncio.get_running_loop()
+        dispatch_time = time.perf_counter()
+        self.stats.batch_count += 1
+        self.stats.max_batch_len = max(self.stats.max_batch_len, len(batch))
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_func, [item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise Exception("".join(['Количество результатов пакета ', str(len(results)), ' не совпадает с количеством запросов ', str(len(batch))]))
+        except Exception as e:
+            self.stats.failed_count += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            done_time = time.perf_counter()
+            for (_, future, submit_time), result in zip(batch, results):
+                self.stats.completed_count += 1
+                self.stats.latency_sum += done_time - submit_time
+                self.stats.max_latency = max(self.stats.max_latency, done_time - submit_time)
+                self.stats.queue_wait_sum += dispatch_time - submit_time
+                # Запрос, ожидание которого отменено, пропускается
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.in_flight -= 1
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.schedule_flush()
+
+    def get_metrics(self):
+        """
+        :return: текущие глубина очереди и количество обрабатываемых пакетов, параметры и статистика микропакетной обработки (dict)
+        """
+        stats = self.stats
+        done_count = max(stats.completed_count, 1)
+        return {'queue_depth': len(self.pending),
+                'max_queue_depth': stats.max_queue_depth,
+                'in_flight_batches': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'max_batch_len': self.max_batch_len,
+                'max_delay_ms': self.max_delay * 1000.,
+                'submitted': stats.submitted_count,
+                'rejected': stats.rejected_count,
+                'completed': stats.completed_count,
+                'failed': stats.failed_count,
+                'batches': stats.batch_count,
+                'full_batches': stats.full_batch_count,
+                'timer_batches': stats.timer_batch_count,
+                'mean_batch_len': stats.completed_count / max(stats.batch_count, 1),
+                'largest_batch_len': stats.max_batch_len,
+                'mean_latency_ms': stats.latency_sum / done_count * 1000.,
+                'max_latency_ms': stats.max_latency * 1000.,
+                'mean_queue_wait_ms': stats.queue_wait_sum / done_count * 1000.}
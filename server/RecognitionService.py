@@ -0,0 +1,165 @@
+"""
+Обработка небольших пакетов SKU без файлов: справочники категорий и алгоритмы поиска характеристик загружаются один раз и хранятся в памяти между запросами.
+Используется HTTP-сервисом (см. server.Server); результаты совпадают с результатами обработки файлов, так как применяются те же функции справочника, очистки и поиска характеристик
+"""
+import json
+import os
+
+from CategoryDirectory.DirectorySaves import find_directories, load_directory
+from DataProcessing.SKUPreprocessing import CLEAR_PATTERNS_DICT
+from FeatureParser.FeatureParser import FeatureParser as FP
+
+# Путь к конфигурации алгоритмов поиска характеристик
+FEATURE_PARSER_CONFIG_PATH = os.path.join('config', 'feature_parser_config.json')
+# Шаблон очистки по умолчанию
+DEFAULT_CLEAN_PATTERN = 'Базовый'
+# Названия полей результата распознавания с решающими идентификаторами в порядке столбцов identify_category_and_dec_id_batch
+DEC_ID_RESULT_KEYS = ('category', 'main_id', 'main_limit_id', 'add_limit_id')
+
+
+class ServiceRequestError(Exception):
+    """
+    Ошибка в запросе к сервису: неизвестный справочник, характеристика или шаблон, неверный формат SKU
+    """
+
+
+class RecognitionService:
+    """
+    Справочники категорий и алгоритмы поиска характеристик, загруженные один раз для обработки пакетов SKU из запросов
+    """
+    def __init__(self, directory_names, feature_names=None, use_aho_corasick=False, max_batch_len=100000, set_msg_func=None):
+        """
+        :param directory_names: названия справочников из saves, которые загружаются для распознавания категорий (list)
+        :param feature_names: названия характеристик из config/feature_parser_config.json, алгоритмы поиска которых составляются; None - все характеристики (list)
+        :param use_aho_corasick: флаг поиска идентификаторов автоматом Ахо-Корасик, иначе справочники читаются из отображенных в память файлов (bool)
+        :param max_batch_len: максимальное количество SKU в одном запросе (int)
+        :param set_msg_func: функция вывода сообщения, по умолчанию None - сообщения не выводятся
+        """
+        self.use_aho_corasick = use_aho_corasick
+        self.max_batch_len = max_batch_len
+        self.set_msg_func = set_msg_func if set_msg_func is not None else (lambda msg: None)
+        # Справочники по названиям
+        self.directories = {}
+        saved_directories = find_directories()
+        for dir_name in directory_names:
+            if dir_name not in saved_directories:
+                raise Exception("".join(['Справочник \"', dir_name, '\" не найден в saves']))
+            self.directories[dir_name] = load_directory(dir_name, use_aho_corasick, shared=not use_aho_corasick)
+            self.set_msg_func("".join(['Справочник \"', dir_name, '\" загружен']))
+        # Алгоритмы поиска характеристик по названиям
+        with open(FEATURE_PARSER_CONFIG_PATH, encoding='utf-8') as config_file:
+            config = json.load(config_file)
+        if feature_names is None:
+            feature_names = list(config.keys())
+        self.feature_parsers = {}
+        for feature_name in feature_names:
+            if feature_name not in config:
+                raise Exception(" ".join(['Характеристика', feature_name, 'не найдена в', FEATURE_PARSER_CONFIG_PATH]))
+            try:
+                self.feature_parsers[feature_name] = FP(config[feature_name])
+            except Exception as e:
+                # Характеристика с ошибкой в конфигурации не мешает работе остальных
+                self.set_msg_func(" ".join(['Алгоритм для поиска характеристики', feature_name, 'не составлен:', str(e)]))
+                continue
+            self.set_msg_func(" ".join(['Алгоритм для поиска характеристики', feature_name, 'составлен']))
+
+    def get_info(self):
+        """
+        :return: названия загруженных справочников, характеристик и шаблонов очистки (dict)
+        """
+        return {'directories': list(self.directories),
+                'features': list(self.feature_parsers),
+                'clean_patterns': list(CLEAR_PATTERNS_DICT)}
+
+    def check_sku_rows(self, sku_rows):
+        """
+        Проверка пакета SKU из запроса
+
+        :param sku_rows: пакет SKU
+
+        :return: пакет SKU (list)
+        """
+        if not isinstance(sku_rows, list) or not all(isinstance(sku, str) for sku in sku_rows):
+            raise ServiceRequestError('"skus" должен быть списком строк')
+        if len(sku_rows) > self.max_batch_len:
+            raise ServiceRequestError("".join(['В запросе больше ', str(self.max_batch_len), ' SKU']))
+        return sku_rows
+
+    def get_directory(self, dir_name=None):
+        """
+        :param dir_name: название справочника; None - единственный загруженный справочник
+
+        :return: справочник (CategoryDirectory или SharedCategoryDirectory)
+        """
+        if dir_name is None:
+            if len(self.directories) != 1:
+                raise ServiceRequestError(" ".join(['Не указан справочник "directory", загружены:', ", ".join(self.directories)]))
+            return next(iter(self.directories.values()))
+        if not isinstance(dir_name, str) or dir_name not in self.directories:
+            raise ServiceRequestError("".join(['Справочник \"', str(dir_name), '\" не загружен']))
+        return self.directories[dir_name]
+
+    def recognize(self, sku_rows, dir_name=None, get_dec_id=False):
+        """
+        Распознавание категорий пакета SKU
+
+        :param sku_rows: пакет SKU (list)
+        :param dir_name: название справочника; None - единственный загруженный справочник (str)
+        :param get_dec_id: флаг вывода решающих идентификаторов (bool)
+
+        :return: список обозначений категорий или, если get_dec_id, список словарей с категорией и решающими идентификаторами (list)
+        """
+        directory = self.get_directory(dir_name)
+        sku_rows = self.check_sku_rows(sku_rows)
+        if not get_dec_id:
+            return directory.identify_category_batch(sku_rows, self.use_aho_corasick)[0]
+        columns = directory.identify_category_and_dec_id_batch(sku_rows, self.use_aho_corasick)
+        return [dict(zip(DEC_ID_RESULT_KEYS, row)) for row in zip(*columns)]
+
+    def clean(self, sku_rows, pattern_name=DEFAULT_CLEAN_PATTERN):
+        """
+        Очистка пакета SKU
+
+        :param sku_rows: пакет SKU (list)
+        :param pattern_name: название шаблона очистки из CLEAR_PATTERNS_DICT (str)
+
+        :return: список очищенных SKU (list)
+        """
+        if not isinstance(pattern_name, str) or pattern_name not in CLEAR_PATTERNS_DICT:
+            raise ServiceRequestError("".join(['Шаблон очистки \"', str(pattern_name), '\" не найден']))
+        return list(map(CLEAR_PATTERNS_DICT[pattern_name], self.check_sku_rows(sku_rows)))
+
+    def parse_features(self, sku_rows, feature_names=None, remove_feature=False, pattern_check=False):
+        """
+        Поиск характеристик в пакете SKU
+
+        :param sku_rows: пакет SKU (list)
+        :param feature_names: названия искомых характеристик; None - все загруженные характеристики (list)
+        :param remove_feature: флаг вывода SKU без найденной характеристики (bool)
+        :param pattern_check: флаг вывода названия шаблона, по которому найдена характеристика (bool)
+
+        :return: список словарей по SKU: название характеристики - словарь со значением и, если нужно, SKU без характеристики и названием шаблона (list)
+        """
+        if feature_names is None:
+            feature_names = list(self.feature_parsers)
+        if not isinstance(feature_names, list) or not all(isinstance(feature_name, str) for feature_name in feature_names):
+            raise ServiceRequestError('"features" должен быть списком названий характеристик')
+        unknown_features = [feature_name for feature_name in feature_names if feature_name not in self.feature_parsers]
+        if len(unknown_features) > 0:
+            raise ServiceRequestError(" ".join(['Характеристики не загружены:', ", ".join(map(str, unknown_features))]))
+        sku_rows = self.check_sku_rows(sku_rows)
+        # Выбор функции и названий полей ее результата, как при обработке файла
+        result_keys = ['value']
+        parse_func_name = 'parse'
+        if remove_feature:
+            result_keys.append('sku_without_feature')
+            parse_func_name = "_".join([parse_func_name, 'and_remove'])
+        if pattern_check:
+            result_keys.append('pattern')
+            parse_func_name = "_".join([parse_func_name, 'and_pattern'])
+        results = [{} for _ in sku_rows]
+        for feature_name in feature_names:
+            columns = self.feature_parsers[feature_name].parse_many(sku_rows, parse_func_name)
+            for result, row in zip(results, zip(*columns)):
+                result[feature_name] = dict(zip(result_keys, row))
+        return results
@@ -0,0 +1,196 @@
+"""
+Локальный HTTP-сервис распознавания категорий, очистки SKU и поиска характеристик. Справочники и алгоритмы поиска характеристик загружаются один раз при запуске.
+Запуск из директории приложения (в ней должны быть config и saves):
+
+python -m server.Server --directory <справочник> [--directory <справочник>] [--feature <характеристика>] [--host 127.0.0.1] [--port 8080]
+
+Запросы - POST с JSON-телом, ответы - JSON:
+POST /recognize {"skus": [...], "directory": "<справочник>", "dec_id": false} -> {"results": [<категория> или {"category", "main_id", "main_limit_id", "add_limit_id"}, ...]}
+POST /clean {"skus": [...], "pattern": "Базовый"} -> {"results": [<очищенный SKU>, ...]}
+POST /features {"skus": [...], "features": [...], "remove_feature": false, "pattern": false} -> {"results": [{<характеристика>: {"value", "sku_without_feature", "pattern"}}, ...]}
+GET /info -> {"directories": [...], "features": [...], "clean_patterns": [...]}
+При ошибке в запросе возвращается код 400, при слишком большом запросе - 413, и {"error": <сообщение>}
+"""
+import sys
+import json
+import argparse
+
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from server.RecognitionService import RecognitionService, ServiceRequestError, DEFAULT_CLEAN_PATTERN
+from Utilities.Utilities import set_message_with_countdown
+
+# Максимальный размер тела запроса (байт)
+MAX_REQUEST_BODY_LEN = 64 * 1024 * 1024
+
+
+def to_json_value(value):
+    """
+    Приведение значений, которые json не сериализует (числа numpy в справочниках, сохраненных pickle), к значениям python
+
+    :param value: значение результата
+
+    :return: значение, сериализуемое json
+    """
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class RecognitionRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP-запросов к сервису; сервис (RecognitionService) хранится в self.server.service
+    """
+    def do_GET(self):
+        """
+        Ответ на GET /info - названия загруженных справочников, характеристик и шаблонов очистки
+        """
+        if self.path != '/info':
+            self.send_json(404, {'error': "".join(['Неизвестный путь ', self.path])})
+            return
+        self.send_json(200, self.server.service.get_info())
+
+    def do_POST(self):
+        """
+        Ответ на POST /recognize, /clean, /features
+        """
+        handler = self.server.routes.get(self.path)
+        if handler is None:
+            self.send_json(404, {'error': "".join(['Неизвестный путь ', self.path])})
+            return
+        try:
+            try:
+                body_len = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                body_len = -1
+            if body_len < 0:
+                raise ServiceRequestError('Неверный заголовок Content-Length')
+            if body_len > MAX_REQUEST_BODY_LEN:
+                # Тело запроса не читается, соединение закрывается после ответа
+                self.close_connection = True
+                self.send_json(413, {'error': 'Слишком большой запрос'})
+                return
+            try:
+                request = json.loads(self.rfile.read(body_len).decode('utf-8'))
+            except ValueError as e:
+                raise ServiceRequestError(" ".join(['Тело запроса не является JSON:', str(e)]))
+            if not isinstance(request, dict):
+                raise ServiceRequestError('Тело запроса должно быть JSON-объектом')
+            results = handler(self.server.service, request)
+        except ServiceRequestError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self.send_json(500, {'error': " ".join(['ERROR!!!', str(e)])})
+            return
+        self.send_json(200, {'results': results})
+
+    def send_json(self, status, data):
+        """
+        Отправка ответа с JSON-телом
+
+        :param status: код ответа HTTP (int)
+        :param data: содержание ответа (dict)
+        """
+        body = json.dumps(data, ensure_ascii=False, default=to_json_value).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """
+        Вывод сообщений о запросах, если сервис запущен без --quiet
+        """
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def handle_recognize(service, request):
+    """
+    :return: результат POST /recognize
+    """
+    return service.recognize(request.get('skus'), request.get('directory'), bool(request.get('dec_id', False)))
+
+def handle_clean(service, request):
+    """
+    :return: результат POST /clean
+    """
+    return service.clean(request.get('skus'), request.get('pattern', DEFAULT_CLEAN_PATTERN))
+
+def handle_features(service, request):
+    """
+    :return: результат POST /features
+    """
+    return service.parse_features(request.get('skus'), request.get('features'), bool(request.get('remove_feature', False)), bool(request.get('pattern', False)))
+
+# Функции обработки запросов по путям
+ROUTES = {'/recognize': handle_recognize,
+          '/clean': handle_clean,
+          '/features': handle_features}
+
+
+def create_server(service, host='127.0.0.1', port=8080, quiet=False):
+    """
+    Создание HTTP-сервера; каждый запрос обрабатывается в отдельном потоке
+
+    :param service: загруженный сервис (RecognitionService)
+    :param host: адрес, на котором сервер принимает запросы, по умолчанию только локальные запросы (str)
+    :param port: порт, 0 - любой свободный порт (int)
+    :param quiet: флаг отключения сообщений о запросах (bool)
+
+    :return: HTTP-сервер, адрес которого - server.server_address (ThreadingHTTPServer)
+    """
+    server = ThreadingHTTPServer((host, port), RecognitionRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.routes = ROUTES
+    server.quiet = quiet
+    return server
+
+def create_parser():
+    """
+    :return: парсер аргументов командной строки (argparse.ArgumentParser)
+    """
+    parser = argparse.ArgumentParser(prog='python -m server.Server', description='Локальный HTTP-сервис распознавания категорий, очистки SKU и поиска характеристик')
+    parser.add_argument('--directory', action='append', default=[], help='название справочника из saves; повторяется, чтобы загрузить несколько справочников')
+    parser.add_argument('--feature', action='append', default=None, help='название характеристики из config/feature_parser_config.json, по умолчанию все характеристики')
+    parser.add_argument('--aho-corasick', action='store_true', help='искать идентификаторы автоматом Ахо-Корасик')
+    parser.add_argument('--max-batch-len', type=int, default=100000, help='максимальное количество SKU в одном запросе')
+    parser.add_argument('--host', default='127.0.0.1', help='адрес сервиса, по умолчанию принимаются только локальные запросы')
+    parser.add_argument('--port', type=int, default=8080, help='порт сервиса')
+    parser.add_argument('--quiet', action='store_true', help='не выводить сообщения о запросах')
+    return parser
+
+def main(argv=None):
+    """
+    Загрузка справочников и алгоритмов поиска характеристик и запуск HTTP-сервиса до прерывания (Ctrl+C)
+
+    :param argv: аргументы командной строки, по умолчанию sys.argv[1:] (list)
+
+    :return: код завершения: 0 - сервис остановлен, 1 - ошибка загрузки (int)
+    """
+    args = create_parser().parse_args(argv)
+    timer_start = datetime.now()
+    set_msg_func = lambda msg: print(msg, file=sys.stderr, flush=True)
+    try:
+        service = RecognitionService(args.directory, args.feature, args.aho_corasick, args.max_batch_len,
+                                     lambda msg: set_message_with_countdown(msg, timer_start, set_msg_func))
+        server = create_server(service, args.host, args.port, args.quiet)
+    except Exception as e:
+        set_message_with_countdown(" ".join(['ERROR!!!', str(e)]), timer_start, set_msg_func)
+        return 1
+    set_message_with_countdown("".join(['Сервис запущен: http://', server.server_address[0], ':', str(server.server_address[1])]), timer_start, set_msg_func)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        set_message_with_countdown('Сервис остановлен', timer_start, set_msg_func)
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Общие настройки тестов: модули приложения импортируются из директории проекта, а функции, читающие config и saves, запускаются из нее
+"""
+import os
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+
+@pytest.fixture(scope='session')
+def project_dir():
+    """
+    Запуск тестов из директории проекта, в которой находится config
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(PROJECT_DIR)
+        yield PROJECT_DIR
+
+
+# Символы случайных идентификаторов и SKU: небольшой алфавит, чтобы идентификаторы часто встречались в SKU
+IDENTIFIER_ALPHABET = 'АБВГabc12'
+SKU_ALPHABET = 'АБВГДЕЖабвabc12 -'
+
+
+@pytest.fixture(scope='session')
+def category_directory(tmp_path_factory):
+    """
+    :return: справочник из 300 случайных категорий, составленный по excel-файлу (CategoryDirectory)
+    """
+    import random
+
+    import openpyxl
+
+    from CategoryDirectory.CategoryDirectory import CategoryDirectory
+    from DataProcessing.SKUPreprocessing import preprocess_sku_for_recognizing
+
+    rng = random.Random(3)
+    make_identifiers = lambda counts: ";".join("".join(rng.choice(IDENTIFIER_ALPHABET) for _ in range(rng.randint(2, 3))) for _ in range(rng.choice(counts)))
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Категория', 'Главные', 'Главные ограничивающие', 'Дополнительные ограничивающие', 'Исключающие'])
+    for i in range(300):
+        # Часть обозначений категорий - строки из цифр
+        category = str(i) if i % 7 == 0 else "".join(['cat', str(i)])
+        sheet.append([category, make_identifiers([0, 1, 2, 3]), make_identifiers([0, 0, 1, 2]), make_identifiers([0, 0, 1, 2]), make_identifiers([0, 1, 2])])
+    data_path = str(tmp_path_factory.mktemp('directory') / 'directory.xlsx')
+    workbook.save(data_path)
+    return CategoryDirectory('test', data_path, '', '', '', '', '', '', preprocess_sku_for_recognizing, lambda msg: None)
+
+
+@pytest.fixture(scope='session')
+def fuzz_skus():
+    """
+    :return: 5000 случайных SKU из символов идентификаторов справочника category_directory (list)
+    """
+    import random
+
+    rng = random.Random(5)
+    return ["".join(rng.choice(SKU_ALPHABET) for _ in range(rng.randint(0, 25))) for _ in range(5000)]
@@ -0,0 +1,46 @@
+"""
+Проверка совпадения результатов base_cleanning_fast и эталонной base_cleanning
+"""
+import random
+
+import pytest
+
+from DataProcessing.SKUPreprocessing import base_cleanning, base_cleanning_fast, BAD_SPACES, SYMB2, CLEAR_PATTERNS_DICT
+
+# Части строк для случайных SKU: специальные символы и сочетания, на которые реагируют шаблоны очистки
+FUZZ_TOKENS = list(BAD_SPACES) + list(SYMB2) + list('.,_-–*!^=$@+/;:(){}[]\\<>') + \
+              ['КНОПКА', 'КНОПКА 1', 'КНОПКА-2', ':12', ': 3,5', '(M)', '(М+)', '<note>', 'abc', 'МОЛОКО', '2,5%', '1 КГ', '12:34', ' ', '  ', '0']
+# Строки, на которых последовательные замены сочетаний символов влияют друг на друга
+CASCADE_CASES = ['!* *!', '*!*!', '$+ +$', '+/ /+', ';_ _;', '* * ! !', '//\\\\', '!!**!!', '_;_;_']
+# Строки SKU с типичным мусором
+DIRTY_SKUS = ['', ' ', 'МОЛОКО 2,5% 1Л', '  **!!Молоко  "Простоквашино"  2,5%  КНОПКА 12', 'ABC: молоко', '1234567:молоко',
+              '(M)  Кефир 1%', '(М+)Кефир', '<акция> <новинка> Сыр 45%', '<<Сыр', '...,,--Сметана', '~«Творог» 9%:12/3', 'Хлеб [нарезка] {400 г} \\ батон',
+              'Масло сливочное\t82,5%\n', '█▄ Йогурт ║ 2%', '#?Сок 1л;;; яблоко__', 'Вода $$ газ ++ 0,5 :', 'Чай // черный \\\\ 25 пак КНОПКА-1 :5']
+
+
+def generate_fuzz_skus(count, seed=0):
+    """
+    :return: count случайных строк из FUZZ_TOKENS (list)
+    """
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, 12))) for _ in range(count)]
+
+
+@pytest.mark.parametrize('sku', CASCADE_CASES + DIRTY_SKUS)
+def test_base_cleanning_fast_equals_reference(sku):
+    assert base_cleanning_fast(sku) == base_cleanning(sku)
+
+
+def test_base_cleanning_fast_cascade_example():
+    # Последовательные замены: '!* *!' -> '! !' (замена "*") -> ' ' (замена "!")
+    assert base_cleanning('!* *!') == ''
+    assert base_cleanning_fast('!* *!') == ''
+
+
+def test_base_cleanning_fast_equals_reference_fuzz():
+    mismatches = [sku for sku in generate_fuzz_skus(50000) if base_cleanning_fast(sku) != base_cleanning(sku)]
+    assert mismatches == []
+
+
+def test_base_pattern_uses_fast_cleanning():
+    assert CLEAR_PATTERNS_DICT['Базовый'] is base_cleanning_fast
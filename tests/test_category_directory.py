@@ -0,0 +1,73 @@
+"""
+Проверка совпадения результатов определения категорий с эталонным перебором категорий по порядку (identify_category_and_dec_id_cython): автомат Ахо-Корасик, пакетные функции,
+справочник, сохраненный в двоичном формате и загруженный, и общий справочник, читаемый из отображенного в память файла
+"""
+import pytest
+
+from CategoryDirectory.DirectoryFile import save_directory_file, load_directory_file
+from CategoryDirectory.SharedCategoryDirectory import SharedCategoryDirectory
+
+
+@pytest.fixture(scope='module')
+def expected_rows(category_directory, fuzz_skus):
+    """
+    :return: эталонные результаты - категория и решающие идентификаторы по каждому SKU (list)
+    """
+    return [category_directory.identify_category_and_dec_id_cython(sku) for sku in fuzz_skus]
+
+
+@pytest.fixture(scope='module')
+def directory_path(category_directory, tmp_path_factory):
+    """
+    :return: путь к справочнику, сохраненному в двоичном формате (str)
+    """
+    data_path = str(tmp_path_factory.mktemp('saves') / 'test')
+    save_directory_file(category_directory, data_path)
+    return data_path
+
+
+def rows_from_columns(columns):
+    """
+    :return: результаты по строкам из списка столбцов (list)
+    """
+    return [list(row) for row in zip(*columns)]
+
+
+def test_fuzz_corpus_finds_categories(expected_rows):
+    # Случайные SKU должны находить категории, иначе сравнение ничего не проверяет
+    assert sum(1 for row in expected_rows if row[0] != '') > len(expected_rows) // 10
+
+
+def test_single_category_equals_dec_id(category_directory, fuzz_skus, expected_rows):
+    assert [category_directory.identify_category_cython(sku) for sku in fuzz_skus] == [row[:1] for row in expected_rows]
+
+
+def test_aho_corasick_equals_reference(category_directory, fuzz_skus, expected_rows):
+    assert [category_directory.identify_category_and_dec_id_aho_corasick(sku) for sku in fuzz_skus] == expected_rows
+    assert [category_directory.identify_category_aho_corasick(sku) for sku in fuzz_skus] == [row[:1] for row in expected_rows]
+
+
+@pytest.mark.parametrize('use_aho_corasick', [False, True])
+def test_batch_equals_reference(category_directory, fuzz_skus, expected_rows, use_aho_corasick):
+    assert rows_from_columns(category_directory.identify_category_and_dec_id_batch(fuzz_skus, use_aho_corasick)) == expected_rows
+    assert category_directory.identify_category_batch(fuzz_skus, use_aho_corasick) == [[row[0] for row in expected_rows]]
+
+
+@pytest.mark.parametrize('load_matching_index', [False, True])
+def test_saved_directory_equals_reference(directory_path, fuzz_skus, expected_rows, load_matching_index):
+    loaded_directory = load_directory_file(directory_path, load_matching_index)
+    assert [loaded_directory.identify_category_and_dec_id_cython(sku) for sku in fuzz_skus] == expected_rows
+    # Без автомата Ахо-Корасик справочником пользуются только перебором категорий
+    if load_matching_index:
+        assert [loaded_directory.identify_category_and_dec_id_aho_corasick(sku) for sku in fuzz_skus] == expected_rows
+        assert rows_from_columns(loaded_directory.identify_category_and_dec_id_batch(fuzz_skus, True)) == expected_rows
+
+
+def test_shared_directory_equals_reference(directory_path, fuzz_skus, expected_rows):
+    shared_directory = SharedCategoryDirectory(directory_path)
+    try:
+        assert rows_from_columns(shared_directory.identify_category_and_dec_id_batch(fuzz_skus)) == expected_rows
+        assert shared_directory.identify_category_batch(fuzz_skus) == [[row[0] for row in expected_rows]]
+        assert [shared_directory.identify_category_and_dec_id_cython(sku) for sku in fuzz_skus[:500]] == expected_rows[:500]
+    finally:
+        shared_directory.close()
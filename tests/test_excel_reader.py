@@ -0,0 +1,46 @@
+"""
+Проверка потокового чтения excel-файлов (SKUReaderExcelStreaming): количество строк и строки SKU совпадают с чтением листа pandas
+"""
+import openpyxl
+import pandas as pd
+import pytest
+
+from openpyxl.styles import PatternFill
+
+from DataProcessing.SKUPreprocessing import SKUReaderExcelStreaming
+
+SKU_ROWS = ['молоко', 'кефир', None, 'сыр', 123, 2.5, 'хлеб', None, 'йогурт']
+
+
+@pytest.fixture
+def excel_path(tmp_path):
+    """
+    :return: путь к xlsx-файлу с SKU и отформатированными пустыми строками в конце листа (str)
+    """
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['sku', 'x'])
+    for i, sku in enumerate(SKU_ROWS):
+        sheet.append([sku, i])
+    # Пустые строки с заливкой увеличивают размеры листа, записанные в файле
+    fill = PatternFill(fill_type='solid', start_color='FFFF00')
+    for row in range(len(SKU_ROWS) + 2, len(SKU_ROWS) + 17):
+        sheet.cell(row=row, column=1).fill = fill
+    data_path = str(tmp_path / 'input.xlsx')
+    workbook.save(data_path)
+    return data_path
+
+
+def test_rows_count_skips_formatted_empty_rows(excel_path):
+    reader = SKUReaderExcelStreaming(excel_path, '', '')
+    assert len(reader) == len(SKU_ROWS)
+
+
+@pytest.mark.parametrize('batch_len', [1, 4, 100])
+def test_batches_equal_pandas(excel_path, batch_len):
+    reader = SKUReaderExcelStreaming(excel_path, '', '')
+    rows = []
+    for start in range(0, len(reader), batch_len):
+        rows.extend(reader.read(start, batch_len))
+    reader.close()
+    assert rows == pd.read_excel(excel_path, dtype='str', keep_default_na=False).iloc[:, 0].tolist()
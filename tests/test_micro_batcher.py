@@ -0,0 +1,164 @@
+"""
+Проверка микропакетной обработки (server.MicroBatcher) и HTTP-сервиса на asyncio (server.AsyncServer) на локальном адресе
+"""
+import asyncio
+import json
+
+import pytest
+
+from server.AsyncServer import AsyncRecognitionApp
+from server.MicroBatcher import MicroBatcher, ColumnsToRows, QueueFullError
+from server.Server import MAX_REQUEST_BODY_LEN
+
+
+class StubBatchFunc:
+    """
+    Пакетная функция в виде функций справочника: возвращает столбцы - SKU в верхнем регистре и длины SKU; запоминает полученные пакеты
+    """
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, sku_rows):
+        self.batches.append(list(sku_rows))
+        return [[sku.upper() for sku in sku_rows], [len(sku) for sku in sku_rows]]
+
+
+def failing_batch_func(sku_rows):
+    raise RuntimeError('ошибка пакета')
+
+
+def test_full_batches_keep_order():
+    stub = StubBatchFunc()
+    skus = ["".join(['sku', str(i)]) for i in range(8)]
+
+    async def run():
+        batcher = MicroBatcher(ColumnsToRows(stub), max_batch_len=4, max_delay_ms=10000., max_in_flight=1)
+        results = await asyncio.gather(*[batcher.submit(sku) for sku in skus])
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results == [(sku.upper(), len(sku)) for sku in skus]
+    assert stub.batches == [skus[:4], skus[4:]]
+    metrics = batcher.get_metrics()
+    assert metrics['submitted'] == 8
+    assert metrics['completed'] == 8
+    assert metrics['batches'] == 2
+    assert metrics['full_batches'] == 2
+    assert metrics['timer_batches'] == 0
+    assert metrics['largest_batch_len'] == 4
+    assert metrics['mean_batch_len'] == 4
+    assert metrics['queue_depth'] == 0
+    assert metrics['in_flight_batches'] == 0
+
+
+def test_partial_batch_sent_by_timer():
+    stub = StubBatchFunc()
+
+    async def run():
+        batcher = MicroBatcher(ColumnsToRows(stub), max_batch_len=100, max_delay_ms=5.)
+        results = await asyncio.gather(*[batcher.submit(sku) for sku in ['a', 'bb', 'ccc']])
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results == [('A', 1), ('BB', 2), ('CCC', 3)]
+    assert stub.batches == [['a', 'bb', 'ccc']]
+    metrics = batcher.get_metrics()
+    assert metrics['timer_batches'] == 1
+    assert metrics['full_batches'] == 0
+    assert metrics['max_queue_depth'] == 3
+    assert metrics['mean_queue_wait_ms'] > 0.
+
+
+def test_queue_full_rejects_request():
+    async def run():
+        batcher = MicroBatcher(ColumnsToRows(StubBatchFunc()), max_batch_len=100, max_delay_ms=20., max_queue_len=2)
+        accepted = [asyncio.ensure_future(batcher.submit(sku)) for sku in ['a', 'b']]
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await batcher.submit('c')
+        return batcher, await asyncio.gather(*accepted)
+
+    batcher, results = asyncio.run(run())
+    assert results == [('A', 1), ('B', 1)]
+    assert batcher.get_metrics()['rejected'] == 1
+
+
+def test_batch_error_passed_to_requests():
+    async def run():
+        batcher = MicroBatcher(failing_batch_func, max_batch_len=2, max_delay_ms=10000.)
+        results = await asyncio.gather(batcher.submit('a'), batcher.submit('b'), return_exceptions=True)
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.get_metrics()['failed'] == 2
+
+
+async def send_raw_request(port, request):
+    """
+    :return: строка статуса и содержание ответа (tuple)
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    await writer.drain()
+    status_line = (await reader.readline()).decode('latin-1').strip()
+    headers = {}
+    while True:
+        header_line = await reader.readline()
+        if header_line in (b'\r\n', b''):
+            break
+        name, _, value = header_line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    writer.close()
+    return status_line, json.loads(body.decode('utf-8'))
+
+
+def run_with_app(requests):
+    """
+    Запуск сервиса на свободном порту и отправка запросов по очереди
+
+    :param requests: байтовые строки запросов (list)
+
+    :return: ответы сервиса (list)
+    """
+    async def run():
+        batcher = MicroBatcher(ColumnsToRows(StubBatchFunc()), max_batch_len=16, max_delay_ms=1.)
+        server = await asyncio.start_server(AsyncRecognitionApp(batcher).handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return [await send_raw_request(port, request) for request in requests]
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(run())
+
+
+def make_request(method, path, body=b'', headers=None):
+    """
+    :return: байтовая строка запроса HTTP/1.1 (bytes)
+    """
+    header_lines = "".join(["".join([name, ': ', value, '\r\n']) for name, value in (headers or {'Content-Length': str(len(body))}).items()])
+    return b"".join(["".join([method, ' ', path, ' HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n', header_lines, '\r\n']).encode('latin-1'), body])
+
+
+def test_app_recognize_and_metrics():
+    responses = run_with_app([make_request('POST', '/recognize', json.dumps({'skus': ['a', 'bb']}).encode('utf-8')),
+                              make_request('POST', '/recognize', json.dumps({'sku': 'ccc'}).encode('utf-8')),
+                              make_request('GET', '/metrics')])
+    assert responses[0] == ('HTTP/1.1 200 OK', {'results': ['A', 'BB']})
+    assert responses[1] == ('HTTP/1.1 200 OK', {'result': 'CCC'})
+    assert responses[2][1]['completed'] == 3
+
+
+@pytest.mark.parametrize('request_bytes, status_line', [
+    (make_request('POST', '/recognize', headers={'Content-Length': str(MAX_REQUEST_BODY_LEN + 1)}), 'HTTP/1.1 413 Request Entity Too Large'),
+    (make_request('POST', '/recognize', headers={'Content-Length': 'abc'}), 'HTTP/1.1 400 Bad Request'),
+    (make_request('POST', '/recognize', headers={'Content-Length': '-1'}), 'HTTP/1.1 400 Bad Request'),
+    (make_request('POST', '/recognize', b'{"sku": 1}'), 'HTTP/1.1 400 Bad Request'),
+    (make_request('GET', '/unknown'), 'HTTP/1.1 404 Not Found')], ids=['too_large', 'bad_content_length', 'negative_content_length', 'bad_sku', 'unknown_path'])
+def test_app_error_responses(request_bytes, status_line):
+    response_status_line, data = run_with_app([request_bytes])[0]
+    assert response_status_line == status_line
+    assert 'error' in data
@@ -0,0 +1,146 @@
+"""
+Проверка HTTP-сервиса (server.Server) на локальном адресе: сервер запускается на свободном порту в отдельном потоке
+"""
+import json
+import threading
+
+from http.client import HTTPConnection
+
+import pytest
+
+import CategoryDirectory.DirectorySaves as DirectorySaves
+
+from CategoryDirectory.DirectoryFile import save_directory_file
+from DataProcessing.SKUPreprocessing import CLEAR_PATTERNS_DICT
+from FeatureParser.FeatureParser import FeatureParser as FP
+from server.RecognitionService import RecognitionService, FEATURE_PARSER_CONFIG_PATH, DEC_ID_RESULT_KEYS
+from server.Server import create_server, MAX_REQUEST_BODY_LEN
+
+
+def run_server(service):
+    """
+    Запуск сервиса на свободном порту в отдельном потоке до выхода из генератора
+
+    :param service: сервис (RecognitionService)
+
+    :return: адрес и порт запущенного сервиса (tuple)
+    """
+    server = create_server(service, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture(scope='module')
+def server_address(project_dir):
+    """
+    :return: адрес и порт запущенного сервиса без справочников, с алгоритмом поиска характеристики Weight (tuple)
+    """
+    yield from run_server(RecognitionService([], ['Weight']))
+
+
+@pytest.fixture(scope='module', params=[False, True], ids=['shared', 'aho_corasick'])
+def directory_server_address(request, project_dir, category_directory, tmp_path_factory):
+    """
+    :return: адрес и порт запущенного сервиса со справочником test, сохраненным во временную директорию saves (tuple)
+    """
+    saves_dir = tmp_path_factory.mktemp('saves')
+    save_directory_file(category_directory, str(saves_dir / 'test'))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(DirectorySaves, 'SAVES_DIR', str(saves_dir))
+        service = RecognitionService(['test'], [], use_aho_corasick=request.param)
+    yield from run_server(service)
+    # Общий справочник держит отображенный в память файл до закрытия
+    for directory in service.directories.values():
+        if hasattr(directory, 'close'):
+            directory.close()
+
+
+def send_request(server_address, method, path, body=None, headers=None):
+    """
+    :param headers: заголовки запроса, дополняющие Content-Type (dict)
+
+    :return: код ответа и содержание ответа (tuple)
+    """
+    connection = HTTPConnection(*server_address, timeout=10)
+    try:
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        connection.request(method, path, body=body, headers={'Content-Type': 'application/json', **(headers or {})})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read().decode('utf-8'))
+    finally:
+        connection.close()
+
+
+def test_info(server_address):
+    status, data = send_request(server_address, 'GET', '/info')
+    assert status == 200
+    assert data == {'directories': [], 'features': ['Weight'], 'clean_patterns': list(CLEAR_PATTERNS_DICT)}
+
+
+def test_clean(server_address):
+    skus = ['  **Молоко  "Простоквашино" 2,5%  КНОПКА 12', 'Хлеб [нарезка]']
+    status, data = send_request(server_address, 'POST', '/clean', {'skus': skus, 'pattern': 'Базовый'})
+    assert status == 200
+    assert data == {'results': [CLEAR_PATTERNS_DICT['Базовый'](sku) for sku in skus]}
+
+
+def test_features(server_address):
+    skus = ['Молоко 2,5% 900 г', 'Сыр 0,2кг', 'Хлеб']
+    status, data = send_request(server_address, 'POST', '/features', {'skus': skus, 'features': ['Weight'], 'remove_feature': True})
+    assert status == 200
+    # Результат совпадает с результатом функции, применяемой при обработке файла
+    with open(FEATURE_PARSER_CONFIG_PATH, encoding='utf-8') as config_file:
+        values, skus_without_feature = FP(json.load(config_file)['Weight']).parse_many(skus, 'parse_and_remove')
+    assert data == {'results': [{'Weight': {'value': value, 'sku_without_feature': sku_without_feature}}
+                                for value, sku_without_feature in zip(values, skus_without_feature)]}
+
+
+@pytest.mark.parametrize('path, body', [('/clean', {'skus': ['a'], 'pattern': ['x']}),
+                                        ('/clean', {'skus': ['a'], 'pattern': 'Нет такого шаблона'}),
+                                        ('/clean', {'skus': 'a'}),
+                                        ('/clean', {'skus': ['a', 1]}),
+                                        ('/features', {'skus': ['a'], 'features': [['Weight']]}),
+                                        ('/features', {'skus': ['a'], 'features': ['Нет такой характеристики']}),
+                                        ('/features', {'skus': ['a'], 'features': 'Weight'}),
+                                        ('/recognize', {'skus': ['a']}),
+                                        ('/recognize', {'skus': ['a'], 'directory': ['x']}),
+                                        ('/clean', b'{not json'),
+                                        ('/clean', [1, 2])])
+def test_bad_request(server_address, path, body):
+    status, data = send_request(server_address, 'POST', path, body)
+    assert status == 400
+    assert 'error' in data
+
+
+@pytest.mark.parametrize('content_length, expected_status', [('-1', 400), ('abc', 400), (str(MAX_REQUEST_BODY_LEN + 1), 413)],
+                         ids=['negative', 'not_number', 'too_large'])
+def test_bad_content_length(server_address, content_length, expected_status):
+    # Тело запроса не отправляется: сервис отвечает по заголовку, не читая тело
+    status, data = send_request(server_address, 'POST', '/clean', headers={'Content-Length': content_length})
+    assert status == expected_status
+    assert 'error' in data
+
+
+@pytest.mark.parametrize('dec_id', [False, True])
+def test_recognize_equals_directory(directory_server_address, category_directory, fuzz_skus, dec_id):
+    skus = fuzz_skus[:1000]
+    status, data = send_request(directory_server_address, 'POST', '/recognize', {'skus': skus, 'directory': 'test', 'dec_id': dec_id})
+    assert status == 200
+    # Результат совпадает с эталонным перебором категорий справочника
+    expected_rows = [category_directory.identify_category_and_dec_id_cython(sku) for sku in skus]
+    if dec_id:
+        assert data == {'results': [dict(zip(DEC_ID_RESULT_KEYS, row)) for row in expected_rows]}
+    else:
+        assert data == {'results': [row[0] for row in expected_rows]}
+
+
+@pytest.mark.parametrize('method, path', [('GET', '/unknown'), ('POST', '/unknown'), ('POST', '/info')])
+def test_unknown_path(server_address, method, path):
+    status, data = send_request(server_address, method, path, {} if method == 'POST' else None)
+    assert status == 404
+    assert 'error' in data
@@ -0,0 +1,92 @@
+"""
+Проверка чтения csv-файлов батчами (SKUReaderCSV) по индексу строк и без него: результат совпадает с чтением всего файла одним вызовом pandas.read_csv
+"""
+import pandas as pd
+import pytest
+
+import DataProcessing.LineIndex as LineIndex
+
+from DataProcessing.DataProcessing import SKUCleaner
+from DataProcessing.LineIndex import scan_line_offsets
+from DataProcessing.SKUPreprocessing import SKUReaderCSV, CLEAR_PATTERNS_DICT
+
+# Содержание файлов: (байты файла, составляется ли индекс строк)
+CSV_FILES = {'plain': ('sku\tx\r\nмолоко\t1\r\nкефир\t2\r\n\r\nсыр\t3\r\nхлеб\t4\r\n'.encode('utf-8'), True),
+             'inner_quotes': ('sku\tx\nМолоко "Простоквашино" 2,5%\t1\nСок "Добрый\t2\nсыр\t3\n'.encode('utf-8'), True),
+             'quoted_newline': ('sku\tx\r\nмолоко\t1\r\n"кефир\r\nпродолжение"\t2\r\n\r\nсыр\t3\r\nхлеб\t4\r\n"йогурт"\t5\r\n'.encode('utf-8'), False),
+             'cr_only': ('sku\rмолоко\rкефир\rсыр\r'.encode('utf-8'), False),
+             'cr_inside': ('sku\tx\nмолоко\rкефир\t1\nсыр\t2\n'.encode('utf-8'), False)}
+
+
+class StubProgressBar:
+    def reset(self, max_value):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def read_whole_file(data_path):
+    """
+    :return: строки SKU всего файла, прочитанные одним вызовом pandas.read_csv, как при чтении файла без батчей (list)
+    """
+    return pd.read_csv(data_path, usecols=[0], sep='\t', dtype='str', encoding='utf-8', skip_blank_lines=False, keep_default_na=False,
+                       on_bad_lines='skip').replace(to_replace=r'\r\n', value='\n', regex=True).dropna().squeeze(axis=1).values.tolist()
+
+
+@pytest.fixture(params=sorted(CSV_FILES))
+def csv_file(request, tmp_path):
+    """
+    :return: путь к csv-файлу и флаг того, что по нему составляется индекс строк (tuple)
+    """
+    data, indexable = CSV_FILES[request.param]
+    data_path = tmp_path / 'input.csv'
+    data_path.write_bytes(data)
+    return str(data_path), indexable
+
+
+@pytest.mark.parametrize('batch_len', [1, 2, 3, 100])
+def test_batches_equal_whole_file(csv_file, batch_len):
+    data_path, indexable = csv_file
+    reader = SKUReaderCSV(data_path, '', 'utf-8')
+    assert (reader.line_offsets is not None) == indexable
+    rows = []
+    for start in range(0, len(reader), batch_len):
+        rows.extend(reader.read(start, batch_len))
+    reader.close()
+    assert rows == read_whole_file(data_path)
+
+
+def test_cr_only_rows_count(tmp_path):
+    data_path = tmp_path / 'input.csv'
+    data_path.write_bytes(CSV_FILES['cr_only'][0])
+    reader = SKUReaderCSV(str(data_path), '', 'utf-8')
+    assert len(reader) == 3
+    assert reader.read(0, 3) == ['молоко', 'кефир', 'сыр']
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 3, 7])
+def test_scan_across_blocks(csv_file, block_size, monkeypatch):
+    # Кавычки и \r на границе блоков проверяются так же, как внутри блока
+    data_path, _ = csv_file
+    expected_offsets = scan_line_offsets(data_path)
+    monkeypatch.setattr(LineIndex, 'SCAN_BLOCK_SIZE', block_size)
+    offsets = scan_line_offsets(data_path)
+    if expected_offsets is None:
+        assert offsets is None
+    else:
+        assert offsets.tolist() == expected_offsets.tolist()
+
+
+def test_workers_read_input_falls_back(project_dir, tmp_path):
+    data_path = tmp_path / 'input.csv'
+    data_path.write_bytes(CSV_FILES['quoted_newline'][0])
+    output_path = tmp_path / 'output.csv'
+    messages = []
+    cleaner = SKUCleaner(str(data_path), '', '', str(output_path), 2, 'Базовый', 2, messages.append, StubProgressBar(), workers_read_input=True)
+    assert not cleaner.workers_read_input
+    assert any('основным процессом' in msg for msg in messages)
+    output = pd.read_csv(output_path, sep='\t', dtype='str', keep_default_na=False)
+    skus = read_whole_file(str(data_path))
+    assert output.iloc[:, 0].tolist() == skus
+    assert output.iloc[:, 1].tolist() == [CLEAR_PATTERNS_DICT['Базовый'](sku) for sku in skus]